@@ -0,0 +1,57 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Benchmarks for pylibad4. Most of them run against the stub library in
+*tests/stub* and need a C compiler, the others use the simulated backend.
+Run them from the repository root, e.g.::
+
+    python -m benchmarks.bench_prototypes
+
+"""
+import timeit
+import tracemalloc
+
+
+def calls_per_second(func, duration=0.5):
+    """
+    Return the number of calls of *func* per second.
+
+    The number of calls is calibrated so that one measurement takes at least
+    *duration* seconds, the best of three measurements is used.
+
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * duration / 0.2))
+    best = min(timer.repeat(repeat=3, number=number))
+    return number / best
+
+
+def _peak_memory(func, number):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(number):
+            func()
+        return tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+
+
+def allocated_bytes(func, number=1000):
+    """
+    Return the peak of memory in bytes allocated during *number* calls of
+    *func*, measured with :mod:`tracemalloc` relative to an empty function.
+
+    Memory which is allocated and released again within a call counts as
+    well as memory kept by the calls, so a result of 0 means that *func*
+    doesn't allocate at all.
+
+    """
+    func()  # the first call may fill caches
+    baseline = _peak_memory(lambda: None, number)
+    return max(0, _peak_memory(func, number) - baseline)
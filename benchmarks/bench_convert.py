@@ -0,0 +1,76 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Compare the conversion of raw samples into voltage values by single
+:func:`ad_sample_to_float` calls, by :func:`samples_to_float` and by the
+lookup table of :func:`samples_to_float_lut`.
+
+"""
+from __future__ import print_function
+import time
+import numpy
+from pylibad4 import libad4
+from pylibad4.convert import samples_to_float, samples_to_float_lut, \
+    conversion_table
+from pylibad4.libad4 import ad_open, ad_close, ad_sample_to_float
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+from tests.stub import build_stub_library
+from . import calls_per_second
+
+
+CHANNEL = AD_CHA_TYPE_ANALOG_IN | 1
+SAMPLE_COUNTS = (1000, 1000000)
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return the time to build the conversion table in
+    seconds and a list of tuples (method, sample count, samples/s).
+
+    """
+    libad4.load_library(build_stub_library())
+    handle = ad_open('usbbase')
+
+    start = time.perf_counter()
+    conversion_table(handle, CHANNEL, 0)
+    build_time = time.perf_counter() - start
+
+    results = []
+    for count in SAMPLE_COUNTS:
+        data = numpy.random.randint(0, 1 << 16, count).astype(numpy.uint16)
+        out = numpy.empty(count, dtype=numpy.float32)
+        methods = [
+            ('samples_to_float',
+             lambda: samples_to_float(handle, CHANNEL, 0, data, out)),
+            ('samples_to_float_lut',
+             lambda: samples_to_float_lut(handle, CHANNEL, 0, data, out)),
+        ]
+        if count <= 1000:
+            samples = data.tolist()
+            methods.insert(0, (
+                'ad_sample_to_float',
+                lambda: [ad_sample_to_float(handle, CHANNEL, 0, x)
+                         for x in samples]))
+        for name, func in methods:
+            results.append(
+                (name, count, count * calls_per_second(func, duration)))
+
+    ad_close(handle)
+    libad4.set_backend(None)
+    return build_time, results
+
+
+def main():
+    build_time, results = run()
+    print('conversion table built in {:.3f} s'.format(build_time))
+    print('{:<24} {:>10} {:>18}'.format('method', 'samples',
+                                        'samples [1/s]'))
+    for name, count, rate in results:
+        print('{:<24} {:>10,} {:>18,.0f}'.format(name, count, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Measure how the cycle rate of a :class:`Coordinator` scales with the number
+of devices compared with reading the devices one after another. The devices
+are simulated by :class:`SimulatedLibrary` with an artificial latency per
+call, which stands for the driver and USB round trip of a real device.
+
+"""
+from __future__ import print_function
+import time
+from pylibad4 import libad4
+from pylibad4.coordinator import Coordinator
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+
+
+DEVICE_COUNTS = (1, 2, 4, 8)
+LATENCY = 0.002
+CHANNELS = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 17)]
+
+
+def cycles_per_second(func, duration):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def run(duration=1.0, latency=LATENCY):
+    """
+    Run the benchmark and return a list of tuples
+    (device count, sequential cycles/s, parallel cycles/s).
+
+    """
+    libad4.set_backend(SimulatedLibrary(latency=latency))
+
+    results = []
+    for count in DEVICE_COUNTS:
+        names = ['usbbase:{}'.format(i) for i in range(count)]
+        with Coordinator(names, CHANNELS) as coordinator:
+            # same plans read one after another in the calling thread
+            plans = coordinator._plans
+
+            def sequential():
+                for plan in plans:
+                    plan.read()
+
+            results.append((count, cycles_per_second(sequential, duration),
+                            cycles_per_second(coordinator.acquire,
+                                              duration)))
+
+    libad4.set_backend(None)
+    return results
+
+
+def main():
+    print('latency per call: {:.1f} ms'.format(LATENCY * 1000))
+    print('{:>8} {:>18} {:>18} {:>8}'.format(
+        'devices', 'sequential [1/s]', 'parallel [1/s]', 'speedup'))
+    for count, sequential, parallel in run():
+        print('{:>8} {:>18,.1f} {:>18,.1f} {:>7.1f}x'.format(
+            count, sequential, parallel, parallel / sequential))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Compare setting several lines of a digital port with one
+:func:`ad_set_digital_line` call per line against staging the lines in a
+:class:`DigitalPort` and committing them with one :func:`ad_digital_out`
+call, on the stub library and on the simulator with a latency per call
+like a USB device. Reading all lines with :func:`ad_get_digital_line` is
+compared with :meth:`DigitalPort.read_lines`, and :func:`unpack_lines` on a
+recorded block with shifting every line out of the words.
+
+"""
+from __future__ import print_function
+import numpy
+from pylibad4 import libad4
+from pylibad4.digital import DigitalPort, unpack_lines
+from pylibad4.libad4 import ad_open, ad_close, ad_set_digital_line, \
+    ad_get_digital_line, ad_set_line_direction
+from pylibad4.simulator import SimulatedLibrary
+from tests.stub import build_stub_library
+from . import calls_per_second
+
+
+LINE_COUNTS = (1, 4, 16)
+
+#: count of data words of the recorded block
+BLOCK_SIZE = 1000000
+
+#: latency per call of the simulated device in seconds
+LATENCY = 0.0001
+
+
+def variants(handle, count):
+    """
+    Return functions inverting *count* lines of port 1 per call.
+
+    """
+    port = DigitalPort(handle, 1)
+    state = [False]
+
+    def set_digital_line():
+        state[0] = not state[0]
+        for line in range(count):
+            ad_set_digital_line(handle, 1, line, state[0])
+
+    def commit():
+        for line in range(count):
+            port.toggle_line(line)
+        port.commit()
+
+    return [('ad_set_digital_line', set_digital_line),
+            ('DigitalPort.commit', commit)]
+
+
+def read_variants(handle):
+    """
+    Return functions reading the 16 lines of port 1.
+
+    """
+    port = DigitalPort(handle, 1)
+
+    def get_digital_line():
+        return [ad_get_digital_line(handle, 1, line) for line in range(16)]
+
+    return [('ad_get_digital_line', get_digital_line),
+            ('DigitalPort.read_lines', port.read_lines)]
+
+
+def unpack_variants(block):
+    """
+    Return functions unpacking the lines of *block*.
+
+    """
+    shifts = numpy.arange(16, dtype=block.dtype)
+
+    def shift():
+        return (block[:, None] >> shifts) & 1 == 1
+
+    return [('shift', shift), ('unpack_lines', lambda: unpack_lines(block))]
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a list of tuples
+    (backend, function, line count, cycles/s); the unpacking of the block
+    is reported as backend ``numpy``.
+
+    """
+    results = []
+    backends = [('stub', build_stub_library()),
+                ('simulator {:g} us/call'.format(LATENCY * 1e6),
+                 SimulatedLibrary(latency=LATENCY))]
+    for backend, library in backends:
+        if isinstance(library, str):
+            libad4.load_library(library)
+        else:
+            libad4.set_backend(library)
+        handle = ad_open('usbbase')
+        ad_set_line_direction(handle, 1, 0x0000)
+        for count in LINE_COUNTS:
+            for name, func in variants(handle, count):
+                results.append((backend, name, count,
+                                calls_per_second(func, duration)))
+        for name, func in read_variants(handle):
+            results.append((backend, name, 16,
+                            calls_per_second(func, duration)))
+        ad_close(handle)
+
+    block = numpy.random.randint(0, 1 << 16, BLOCK_SIZE).astype(numpy.uint16)
+    for name, func in unpack_variants(block):
+        results.append(('numpy {} words'.format(BLOCK_SIZE), name, 16,
+                        calls_per_second(func, duration)))
+
+    libad4.set_backend(None)
+    return results
+
+
+def main():
+    print('{:<24} {:<22} {:>6} {:>14}'.format(
+        'backend', 'function', 'lines', 'cycles [1/s]'))
+    for backend, name, count, rate in run():
+        print('{:<24} {:<22} {:>6} {:>14,.0f}'.format(
+            backend, name, count, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Measure the throughput of the :class:`EdgeDetector` on blocks of 16 bit
+data words with different shares of changed samples, compared with copying
+the block as reference for the memory bandwidth.
+
+"""
+from __future__ import print_function
+import numpy
+from pylibad4.edges import EdgeDetector
+from . import calls_per_second
+
+
+BLOCK_SIZE = 1000000
+
+#: share of the samples in which the lines change
+CHANGE_RATES = (0.001, 0.01, 0.1, 1.0)
+
+
+def block(change_rate, size=BLOCK_SIZE):
+    """
+    Return a block of random data words which change in about
+    *change_rate* of the samples.
+
+    """
+    changes = numpy.random.random_sample(size) < change_rate
+    values = numpy.random.randint(0, 1 << 16, changes.sum() + 1)
+    return values[numpy.cumsum(changes)].astype(numpy.uint16)
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a list of tuples
+    (case, change rate, words/s, events per block).
+
+    """
+    results = []
+    for change_rate in CHANGE_RATES:
+        words = block(change_rate)
+        if change_rate == CHANGE_RATES[0]:
+            rate = calls_per_second(words.copy, duration)
+            results.append(('numpy.copy', None, rate * len(words), 0))
+
+        detector = EdgeDetector()
+        events = len(detector.process(words))
+        rate = calls_per_second(lambda: detector.process(words), duration)
+        results.append(('EdgeDetector', change_rate, rate * len(words),
+                        events))
+    return results
+
+
+def main():
+    print('block of {:,} words'.format(BLOCK_SIZE))
+    print('{:<14} {:>8} {:>16} {:>10}'.format('case', 'changes', 'words [1/s]',
+                                              'events'))
+    for name, change_rate, rate, events in run():
+        print('{:<14} {:>8} {:>16,.0f} {:>10,}'.format(
+            name, '' if change_rate is None else '{:g}'.format(change_rate),
+            rate, events))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Compare the calls per second of the wrappers and the prepared objects with
+the stub library loaded by ctypes and by cffi.
+
+"""
+from __future__ import print_function
+import numpy
+from pylibad4 import libad4
+from pylibad4.arrays import compile_channels, ad_discrete_inv_array
+from pylibad4.device import Device
+from pylibad4.libad4 import *  # noqa
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT
+from tests.stub import build_stub_library
+from . import calls_per_second
+
+
+AI = AD_CHA_TYPE_ANALOG_IN | 1
+AO = AD_CHA_TYPE_ANALOG_OUT | 1
+CHANNELS = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 17)]
+FFIS = ('ctypes', 'cffi')
+
+
+def cases(device):
+    """
+    Return a list of tuples (name, function) for the library loaded last.
+
+    """
+    handle = device.handle
+    channel = device.analog_input(1)
+    plan = AcquisitionPlan(handle, CHANNELS)
+    channels, ranges = compile_channels(CHANNELS, [0] * len(CHANNELS))
+    out = numpy.empty(len(CHANNELS), dtype=numpy.uint64)
+    return [
+        ('ad_digital_in', lambda: ad_digital_in(handle, 1)),
+        ('ad_digital_out', lambda: ad_digital_out(handle, 1, 0xff)),
+        ('ad_analog_in', lambda: ad_analog_in(handle, 1, 0)),
+        ('ad_discrete_in', lambda: ad_discrete_in(handle, AI, 0)),
+        ('ad_discrete_out', lambda: ad_discrete_out(handle, AO, 0, 0x8000)),
+        ('ad_sample_to_float',
+         lambda: ad_sample_to_float(handle, AI, 0, 0x8000)),
+        ('ad_get_range_info', lambda: ad_get_range_info(handle, AI, 0)),
+        ('ad_discrete_inv (16)',
+         lambda: ad_discrete_inv(handle, CHANNELS, [0] * 16)),
+        ('ad_discrete_inv_array (16)',
+         lambda: ad_discrete_inv_array(handle, channels, ranges, out)),
+        ('AcquisitionPlan.read (16)', lambda: plan.read(out)),
+        ('Channel.read_raw', channel.read_raw),
+        ('Channel.read', channel.read),
+    ]
+
+
+def run(duration=0.2, rounds=3):
+    """
+    Run the benchmark and return a list of tuples
+    (case name, ctypes calls/s, cffi calls/s).
+
+    The libraries are measured alternately and the best of *rounds* rounds
+    is used, so load changes of the machine affect both alike.
+
+    """
+    path = build_stub_library()
+    libraries = [libad4.open_library(path, ffi) for ffi in FFIS]
+    devices = []
+    names = None
+    funcs = []
+    for library in libraries:
+        libad4.set_backend(library)
+        devices.append(Device('usbbase'))
+        names, library_funcs = zip(*cases(devices[-1]))
+        funcs.append(library_funcs)
+
+    rates = [[0.0] * len(names) for _ in libraries]
+    for _ in range(rounds):
+        for i in range(len(names)):
+            for library, library_funcs, library_rates in zip(
+                    libraries, funcs, rates):
+                libad4.set_backend(library)
+                library_rates[i] = max(
+                    library_rates[i],
+                    calls_per_second(library_funcs[i], duration))
+
+    for library, device in zip(libraries, devices):
+        libad4.set_backend(library)
+        device.close()
+    libad4.set_backend(None)
+    return list(zip(names, *rates))
+
+
+def main():
+    print('{:<28} {:>14} {:>14} {:>8}'.format(
+        'case', 'ctypes [1/s]', 'cffi [1/s]', 'speedup'))
+    for name, ctypes_rate, cffi_rate in run():
+        print('{:<28} {:>14,.0f} {:>14,.0f} {:>7.2f}x'.format(
+            name, ctypes_rate, cffi_rate, cffi_rate / ctypes_rate))
+
+
+if __name__ == '__main__':
+    main()
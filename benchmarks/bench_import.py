@@ -0,0 +1,52 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Measure the time of ``import pylibad4`` in a fresh interpreter, with and
+without resolving ``pylibad4.__version__``. In a source checkout the version
+is determined by running git, which only happens on the first access of
+``__version__``.
+
+"""
+from __future__ import print_function
+import subprocess
+import sys
+import time
+
+
+STATEMENTS = [
+    ('interpreter', 'pass'),
+    ('import pylibad4', 'import pylibad4'),
+    ('import + __version__', 'import pylibad4; pylibad4.__version__'),
+]
+
+
+def startup_time(statement, repeat=20):
+    """
+    Return the best time in seconds of running *statement* in a new Python
+    process.
+
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def main():
+    baseline = None
+    for name, statement in STATEMENTS:
+        duration = startup_time(statement)
+        if baseline is None:
+            baseline = duration
+        print('{:<24} {:>8.1f} ms {:>+8.1f} ms'.format(
+            name, duration * 1e3, (duration - baseline) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Compare a sequencer cycle writing four outputs with one
+:func:`ad_discrete_out` call per output against the :class:`OutputManager`,
+on the simulated LAN-AD16f with a latency per call. The analog outputs
+change every 4th cycle, the digital ports every 10th.
+
+"""
+from __future__ import print_function
+import itertools
+from pylibad4 import libad4, instrument
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_out
+from pylibad4.outputs import OutputManager
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO
+from . import calls_per_second
+
+
+#: the simulated LAN-AD16f has the analog outputs and digital ports 0 and 1
+ANALOG = [AD_CHA_TYPE_ANALOG_OUT | i for i in (0, 1)]
+DIGITAL = [AD_CHA_TYPE_DIGITAL_IO | i for i in (0, 1)]
+
+#: latency per call of the simulated device in seconds
+LATENCY = 0.0001
+
+#: count of cycles for counting the library calls
+CYCLES = 1000
+
+
+def values(cycle):
+    """
+    Return the list of tuples (channel, raw value) of *cycle*.
+
+    """
+    return ([(channel, 0x8000 + cycle // 4 % 16) for channel in ANALOG] +
+            [(channel, cycle // 10 % 2) for channel in DIGITAL])
+
+
+def variants(handle):
+    """
+    Return the cycle functions.
+
+    """
+    cycles = itertools.count()
+    outputs = OutputManager(handle)
+
+    def discrete_out():
+        for channel, data in values(next(cycles)):
+            ad_discrete_out(handle, channel, 0, data)
+
+    def manager():
+        for channel, data in values(next(cycles)):
+            outputs.set(channel, data)
+        outputs.flush()
+
+    return [('ad_discrete_out', discrete_out), ('OutputManager', manager)]
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a list of tuples
+    (function, cycles/s, library calls per cycle).
+
+    """
+    libad4.set_backend(SimulatedLibrary(latency=LATENCY))
+    handle = ad_open('lanbase:192.168.0.1')
+
+    results = []
+    for name, func in variants(handle):
+        rate = calls_per_second(func, duration)
+        library = instrument.enable()
+        for _ in range(CYCLES):
+            func()
+        calls = sum(stats['calls'] for stats in library.snapshot().values())
+        instrument.disable()
+        results.append((name, rate, calls / float(CYCLES)))
+
+    ad_close(handle)
+    libad4.set_backend(None)
+    return results
+
+
+def main():
+    print('{} outputs, simulator {:g} us/call'.format(
+        len(ANALOG) + len(DIGITAL), LATENCY * 1e6))
+    print('{:<18} {:>14} {:>16}'.format('function', 'cycles [1/s]',
+                                        'calls / cycle'))
+    for name, rate, calls in run():
+        print('{:<18} {:>14,.0f} {:>16.2f}'.format(name, rate, calls))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Compare repeated multi-channel reads with :func:`ad_discrete_inv`,
+:func:`ad_discrete_inv_array` and :class:`AcquisitionPlan` by call rate and
+by the memory allocated per call.
+
+"""
+from __future__ import print_function
+import numpy
+from pylibad4 import libad4
+from pylibad4.arrays import compile_channels, ad_discrete_inv_array
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_inv
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+from tests.stub import build_stub_library
+from . import calls_per_second, allocated_bytes
+
+
+CHANNEL_COUNTS = (1, 16, 64)
+NUMBER = 1000
+
+
+def variants(handle, count):
+    """
+    Return the read functions for *count* channels.
+
+    """
+    channel_list = [AD_CHA_TYPE_ANALOG_IN | (i % 16 + 1)
+                    for i in range(count)]
+    range_list = [0] * count
+
+    channels, ranges = compile_channels(channel_list, range_list)
+    out = numpy.empty(count, dtype=numpy.uint64)
+    plan = AcquisitionPlan(handle, channel_list, range_list)
+
+    return [
+        ('ad_discrete_inv',
+         lambda: ad_discrete_inv(handle, channel_list, range_list)),
+        ('ad_discrete_inv_array',
+         lambda: ad_discrete_inv_array(handle, channels, ranges, out)),
+        ('AcquisitionPlan.read', lambda: plan.read(out)),
+    ]
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a list of tuples
+    (function name, channel count, calls/s, bytes allocated during
+    :data:`NUMBER` calls).
+
+    """
+    libad4.load_library(build_stub_library())
+    handle = ad_open('usbbase')
+
+    results = []
+    for count in CHANNEL_COUNTS:
+        for name, func in variants(handle, count):
+            results.append((name, count, calls_per_second(func, duration),
+                            allocated_bytes(func, NUMBER)))
+
+    ad_close(handle)
+    libad4.set_backend(None)
+    return results
+
+
+def main():
+    print('{:<24} {:>8} {:>14} {:>16}'.format(
+        'function', 'channels', 'calls [1/s]',
+        'alloc [B/{}]'.format(NUMBER)))
+    for name, count, rate, allocated in run():
+        print('{:<24} {:>8} {:>14,.0f} {:>16,}'.format(
+            name, count, rate, allocated))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Compare the per-call cost of assigning *argtypes* and *restype* on every call
+(the way the wrappers used to work) with calling foreign functions whose
+prototypes were bound once by :func:`pylibad4.prototypes.bind_prototypes`.
+
+"""
+from __future__ import print_function
+from ctypes import CDLL, byref, c_int32, c_uint32, c_float
+from pylibad4.prototypes import bind_prototypes
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+from tests.stub import build_stub_library
+from . import calls_per_second
+
+
+CHANNEL = AD_CHA_TYPE_ANALOG_IN | 1
+
+
+def legacy_calls(dll, handle):
+    """
+    Return call functions that look up the symbol and set the prototype
+    before every call.
+
+    """
+    def discrete_in():
+        f = dll.ad_discrete_in
+        f.argtypes = [c_int32, c_int32, c_int32]
+        f.restype = c_int32
+        data = c_uint32()
+        f(handle, CHANNEL, 0, byref(data))
+        return data.value
+
+    def analog_in():
+        f = dll.ad_analog_in
+        f.argtypes = [c_int32, c_int32, c_int32]
+        f.restype = c_int32
+        value = c_float()
+        f(handle, 1, 0, byref(value))
+        return value.value
+
+    def sample_to_float():
+        f = dll.ad_sample_to_float
+        f.argtypes = [c_int32, c_int32, c_int32, c_uint32]
+        f.restype = c_int32
+        value = c_float()
+        f(handle, CHANNEL, 0, 0x8000, byref(value))
+        return value.value
+
+    def digital_out():
+        f = dll.ad_digital_out
+        f.argtypes = [c_int32, c_int32, c_uint32]
+        f.restype = c_int32
+        f(handle, 1, 0xff)
+
+    return [('ad_discrete_in', discrete_in), ('ad_analog_in', analog_in),
+            ('ad_sample_to_float', sample_to_float),
+            ('ad_digital_out', digital_out)]
+
+
+def bound_calls(dll, handle):
+    """
+    Return call functions using the prototypes bound at load time.
+
+    """
+    def discrete_in():
+        data = c_uint32()
+        dll.ad_discrete_in(handle, CHANNEL, 0, data)
+        return data.value
+
+    def analog_in():
+        value = c_float()
+        dll.ad_analog_in(handle, 1, 0, value)
+        return value.value
+
+    def sample_to_float():
+        value = c_float()
+        dll.ad_sample_to_float(handle, CHANNEL, 0, 0x8000, value)
+        return value.value
+
+    def digital_out():
+        dll.ad_digital_out(handle, 1, 0xff)
+
+    return [('ad_discrete_in', discrete_in), ('ad_analog_in', analog_in),
+            ('ad_sample_to_float', sample_to_float),
+            ('ad_digital_out', digital_out)]
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a list of tuples
+    (function name, legacy calls/s, bound calls/s).
+
+    """
+    path = build_stub_library()
+
+    # two library objects, so the legacy calls can't reuse bound prototypes
+    legacy_dll = CDLL(path)
+    bound_dll = bind_prototypes(CDLL(path))
+    handle = bound_dll.ad_open(b'usbbase')
+
+    results = []
+    for (name, legacy), (_, bound) in zip(legacy_calls(legacy_dll, handle),
+                                          bound_calls(bound_dll, handle)):
+        results.append((name, calls_per_second(legacy, duration),
+                        calls_per_second(bound, duration)))
+
+    bound_dll.ad_close(handle)
+    return results
+
+
+def main():
+    print('{:<20} {:>14} {:>14} {:>8}'.format(
+        'function', 'legacy [1/s]', 'bound [1/s]', 'speedup'))
+    for name, legacy, bound in run():
+        print('{:<20} {:>14,.0f} {:>14,.0f} {:>7.1f}x'.format(
+            name, legacy, bound, bound / legacy))
+
+
+if __name__ == '__main__':
+    main()
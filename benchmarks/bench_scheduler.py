@@ -0,0 +1,84 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Measure the timing of a 1 kHz polling job: a ``time.sleep`` loop compared
+with the :class:`Scheduler`. The job reads an analog input of the simulated
+backend.
+
+"""
+from __future__ import print_function
+import time
+from pylibad4 import libad4
+from pylibad4.device import Device
+from pylibad4.histogram import Histogram
+from pylibad4.scheduler import Scheduler
+from pylibad4.simulator import SimulatedLibrary
+
+
+RATE = 1000.0
+
+
+def sleep_loop(func, period, duration):
+    """
+    Call *func* in a ``time.sleep`` loop and return the histogram of the
+    lateness against the ideal deadlines and the count of calls.
+
+    """
+    lateness = Histogram()
+    start = time.monotonic()
+    count = 0
+    while True:
+        now = time.monotonic()
+        if now - start >= duration:
+            break
+        lateness.add(now - (start + count * period))
+        func()
+        count += 1
+        time.sleep(period)
+    return lateness, count
+
+
+def run(duration=2.0, rate=RATE):
+    """
+    Run the benchmark and return a list of tuples
+    (method, expected runs, runs, skipped runs, lateness histogram).
+
+    """
+    libad4.set_backend(SimulatedLibrary())
+    results = []
+    with Device('usbbase') as device:
+        read = device.analog_input(1).read
+        expected = int(duration * rate)
+
+        lateness, count = sleep_loop(read, 1.0 / rate, duration)
+        results.append(('time.sleep loop', expected, count, 0, lateness))
+
+        scheduler = Scheduler()
+        job = scheduler.add(read, rate=rate)
+        scheduler.run(duration)
+        results.append(('Scheduler', expected, job.runs, job.skipped,
+                        job.lateness))
+
+    libad4.set_backend(None)
+    return results
+
+
+def main():
+    print('rate: {:g} Hz'.format(RATE))
+    for name, expected, runs, skipped, lateness in run():
+        summary = lateness.summary()
+        print('\n{}: {} of {} runs, {} skipped'.format(
+            name, runs, expected, skipped))
+        print('lateness p50 {:.1f} us, p99 {:.1f} us, p99.9 {:.1f} us, '
+              'max {:.1f} us'.format(*[summary[k] * 1e6 for k in
+                                       ('p50', 'p99', 'p999', 'max')]))
+        for lower, upper, count in lateness.buckets():
+            print('  {:>10.1f} .. {:>10.1f} us {:>8}'.format(
+                lower * 1e6, upper * 1e6, count))
+
+
+if __name__ == '__main__':
+    main()
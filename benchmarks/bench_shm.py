@@ -0,0 +1,82 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Fan-out of an :class:`AcquisitionProcess` to several consumer processes. The
+worker reads 16 channels of the simulated backend as fast as possible; each
+consumer fetches every block without copying it and sums up the samples.
+The count of device reads doesn't depend on the count of consumers.
+
+"""
+from __future__ import print_function
+import multiprocessing
+import time
+from pylibad4.shm import AcquisitionProcess, SharedMemoryClient
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+
+
+CHANNELS = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 17)]
+BLOCK_SIZE = 100
+
+
+def consume(name, duration, queue):
+    """
+    Fetch blocks for *duration* seconds and put the count of blocks
+    received and lost into *queue*.
+
+    """
+    with SharedMemoryClient(name) as client:
+        received = 0
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            if not client.wait(0.1):
+                continue
+            sequence, timestamps, data = client.fetch()
+            data.sum()
+            received += len(data)
+            del timestamps, data
+        queue.put((received, client.lost))
+
+
+def run(consumers, duration=2.0):
+    """
+    Return the count of blocks published by the worker and a list of
+    tuples (received, lost) of the consumers.
+
+    """
+    with AcquisitionProcess('usbbase', CHANNELS, block_size=BLOCK_SIZE,
+                            capacity=256, backend=SimulatedLibrary) as acq:
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=consume,
+                                             args=(acq.name, duration, queue))
+                     for _ in range(consumers)]
+        start = acq.written
+        for process in processes:
+            process.start()
+        time.sleep(duration)
+        written = acq.written - start
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    return written, results
+
+
+def main():
+    duration = 2.0
+    print('{} channels, {} samples per block'.format(len(CHANNELS),
+                                                     BLOCK_SIZE))
+    print('{:>9} {:>16} {:>22} {:>8}'.format(
+        'consumers', 'published [1/s]', 'received [1/s/client]', 'lost'))
+    for consumers in (0, 1, 2, 4, 8):
+        written, results = run(consumers, duration)
+        received = sum(r[0] for r in results) / max(1, consumers)
+        lost = sum(r[1] for r in results)
+        print('{:>9} {:>16,.0f} {:>22,.0f} {:>8}'.format(
+            consumers, written / duration, received / duration, lost))
+
+
+if __name__ == '__main__':
+    main()
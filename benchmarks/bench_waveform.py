@@ -0,0 +1,129 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Compare the highest update rate of a sine on two analog outputs: a
+:class:`Scheduler` job calling :func:`ad_analog_out` per output against the
+:class:`WaveformPlayer`, which writes pre-converted rows with one
+:func:`ad_discrete_outv` call. Both run on the stub library and on the
+simulator with a latency per call like a USB device. The player is also run
+at 1 kHz to report the achieved rate and the missed deadlines.
+
+"""
+from __future__ import print_function
+import time
+import numpy
+from pylibad4 import libad4
+from pylibad4.libad4 import ad_open, ad_close, ad_analog_out
+from pylibad4.scheduler import Scheduler, CATCH_UP
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT
+from pylibad4.waveform import WaveformPlayer
+from tests.stub import build_stub_library
+
+
+OUTPUTS = (1, 2)
+SAMPLES = 1000
+RATE = 1000.0
+
+#: latency per call of the simulated device in seconds
+LATENCY = 0.0001
+
+
+def sine(samples=SAMPLES):
+    """
+    Return one period of a sine on each output, shifted by 90 degrees.
+
+    """
+    t = numpy.arange(samples) / float(samples)
+    return numpy.column_stack([5.0 * numpy.sin(2 * numpy.pi * (t + i / 4.0))
+                               for i in range(len(OUTPUTS))])
+
+
+def highest_rates(handle, waveform, duration):
+    """
+    Return the rows per second of the :func:`ad_analog_out` job and of the
+    player, both running as fast as possible.
+
+    """
+    points = iter(range(1 << 62))
+
+    def analog_out():
+        row = waveform[next(points) % SAMPLES]
+        for output, value in zip(OUTPUTS, row):
+            ad_analog_out(handle, output, 0, value)
+
+    # catching up, the deadlines fall behind the clock, so the jobs are run
+    # for a fixed time in a thread instead of with a duration
+    scheduler = Scheduler()
+    job = scheduler.add(analog_out, rate=1e7, policy=CATCH_UP)
+    start = time.monotonic()
+    scheduler.start()
+    time.sleep(duration)
+    scheduler.stop()
+    loop_rate = job.runs / (time.monotonic() - start)
+
+    channel_list = [AD_CHA_TYPE_ANALOG_OUT | i for i in OUTPUTS]
+    player = WaveformPlayer(handle, channel_list, waveform, rate=1e7,
+                            policy=CATCH_UP)
+    player.start()
+    time.sleep(duration)
+    player.stop()
+    return loop_rate, player.achieved_rate
+
+
+def run(duration=0.5):
+    """
+    Run the benchmark and return a tuple (list of tuples (backend, rows/s
+    of the ad_analog_out job, rows/s of the player), statistics of the
+    player at :data:`RATE` on the stub library).
+
+    """
+    waveform = sine()
+    results = []
+    backends = [('stub', build_stub_library()),
+                ('simulator {:g} us/call'.format(LATENCY * 1e6),
+                 SimulatedLibrary(latency=LATENCY))]
+    for name, backend in backends:
+        if isinstance(backend, str):
+            libad4.load_library(backend)
+        else:
+            libad4.set_backend(backend)
+        handle = ad_open('usbbase' if name == 'stub' else 'memaddausb')
+        results.append((name,) + highest_rates(handle, waveform, duration))
+        ad_close(handle)
+
+    libad4.load_library(build_stub_library())
+    handle = ad_open('usbbase')
+    player = WaveformPlayer(handle, [AD_CHA_TYPE_ANALOG_OUT | i
+                                     for i in OUTPUTS], waveform, rate=RATE)
+    player.play(repeat=max(1, int(duration * RATE * 4 / SAMPLES)))
+    stats = player.stats()
+
+    ad_close(handle)
+    libad4.set_backend(None)
+    return results, stats
+
+
+def main():
+    results, stats = run()
+    print('highest update rate of {} outputs [rows/s]'.format(len(OUTPUTS)))
+    print('{:<24} {:>14} {:>14}'.format('backend', 'ad_analog_out',
+                                        'WaveformPlayer'))
+    for name, loop_rate, player_rate in results:
+        print('{:<24} {:>14,.0f} {:>14,.0f} ({:.1f}x)'.format(
+            name, loop_rate, player_rate, player_rate / loop_rate))
+
+    lateness = stats['lateness']
+    print('\nWaveformPlayer at {:g} Hz: {:.2f} Hz achieved, {} rows '
+          'written, {} missed ({} skipped)'.format(
+              stats['rate'], stats['achieved_rate'], stats['written'],
+              stats['missed'], stats['skipped']))
+    print('lateness p50 {:.1f} us, p99 {:.1f} us, max {:.1f} us'.format(
+        *[lateness[k] * 1e6 for k in ('p50', 'p99', 'max')]))
+
+
+if __name__ == '__main__':
+    main()
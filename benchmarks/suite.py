@@ -0,0 +1,321 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Benchmark suite for all ``ad_*`` wrappers, the multi-channel functions and
+the array conversion against the stub library. Starting and stopping a scan
+and the scan loop are measured on the simulated scan of
+:class:`pylibad4.simulator.SimulatedLibrary`.
+
+Each case reports the calls per second and the memory allocated during
+1000 calls (see :func:`benchmarks.allocated_bytes`); the multi-channel and
+conversion cases also report the samples per second. The results can be
+written as JSON to compare them between releases::
+
+    python -m benchmarks.suite --json results.json
+    python -m benchmarks.suite --filter discrete_inv --duration 0.2
+
+"""
+from __future__ import print_function
+import argparse
+import datetime
+import json
+import platform
+import sys
+import numpy
+import pylibad4
+from pylibad4 import libad4
+from pylibad4.arrays import compile_channels, ad_discrete_inv_array
+from pylibad4.convert import samples_to_float, samples_to_float64, \
+    samples_to_float_lut, float_to_samples
+from pylibad4.libad4 import ad_open, ad_close, ad_get_range_count, \
+    ad_get_range_info, ad_discrete_in, ad_discrete_in64, ad_discrete_inv, \
+    ad_discrete_out, ad_discrete_out64, ad_discrete_outv, \
+    ad_sample_to_float, ad_sample_to_float64, ad_float_to_sample, \
+    ad_float_to_sample64, ad_analog_in, ad_analog_out, ad_digital_in, \
+    ad_digital_out, ad_set_digital_line, ad_get_digital_line, \
+    ad_get_line_direction, ad_set_line_direction, ad_get_version, \
+    ad_get_drv_version, ad_get_product_info, ad_start_scan, \
+    ad_poll_scan_state, ad_get_next_run, ad_stop_scan
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.scan import Scan
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    SADScanDesc, SADScanChaDesc, AD_STORE_DISCRETE, AD_TRG_NONE
+from tests.stub import build_stub_library
+from . import calls_per_second, allocated_bytes
+
+
+AI = AD_CHA_TYPE_ANALOG_IN | 1
+AO = AD_CHA_TYPE_ANALOG_OUT | 1
+
+#: channel counts of the multi-channel cases
+CHANNEL_COUNTS = (1, 4, 16, 64, 256)
+
+#: array sizes of the conversion cases
+SAMPLE_COUNTS = (1000, 100000)
+
+#: samples per run of the scan loop case
+SCAN_RUN = 100
+
+#: count of calls for the allocation measurement
+NUMBER = 1000
+
+
+def wrapper_cases(handle, scan):
+    """
+    Return a list of tuples (name, function) with one case per wrapper.
+
+    """
+    return [
+        ('ad_open+ad_close', lambda: ad_close(ad_open('usbbase'))),
+        ('ad_get_range_count', lambda: ad_get_range_count(handle, AI)),
+        ('ad_get_range_info', lambda: ad_get_range_info(handle, AI, 0)),
+        ('ad_discrete_in', lambda: ad_discrete_in(handle, AI, 0)),
+        ('ad_discrete_in64', lambda: ad_discrete_in64(handle, AI, 0)),
+        ('ad_discrete_inv', lambda: ad_discrete_inv(handle, [AI], [0])),
+        ('ad_discrete_out', lambda: ad_discrete_out(handle, AO, 0, 0x8000)),
+        ('ad_discrete_out64',
+         lambda: ad_discrete_out64(handle, AO, 0, 0x8000)),
+        ('ad_discrete_outv',
+         lambda: ad_discrete_outv(handle, [AO], [0], [0x8000])),
+        ('ad_sample_to_float',
+         lambda: ad_sample_to_float(handle, AI, 0, 0x8000)),
+        ('ad_sample_to_float64',
+         lambda: ad_sample_to_float64(handle, AI, 0, 0x8000)),
+        ('ad_float_to_sample',
+         lambda: ad_float_to_sample(handle, AO, 0, 1.0)),
+        ('ad_float_to_sample64',
+         lambda: ad_float_to_sample64(handle, AO, 0, 1.0)),
+        ('ad_analog_in', lambda: ad_analog_in(handle, 1, 0)),
+        ('ad_analog_out', lambda: ad_analog_out(handle, 1, 0, 1.0)),
+        ('ad_digital_in', lambda: ad_digital_in(handle, 1)),
+        ('ad_digital_out', lambda: ad_digital_out(handle, 1, 0xff)),
+        ('ad_set_digital_line',
+         lambda: ad_set_digital_line(handle, 1, 0, 1)),
+        ('ad_get_digital_line', lambda: ad_get_digital_line(handle, 1, 0)),
+        ('ad_get_line_direction', lambda: ad_get_line_direction(handle, 1)),
+        ('ad_set_line_direction',
+         lambda: ad_set_line_direction(handle, 1, 0)),
+        ('ad_get_version', ad_get_version),
+        ('ad_get_drv_version', lambda: ad_get_drv_version(handle)),
+        ('ad_get_product_info', lambda: ad_get_product_info(handle)),
+        ('ad_poll_scan_state', lambda: ad_poll_scan_state(scan.handle)),
+        ('ad_get_next_run',
+         lambda: ad_get_next_run(scan.handle, scan._state, scan._buffer)),
+    ]
+
+
+def channel_cases(handle, count):
+    """
+    Return a list of tuples (name, function) reading or writing *count*
+    channels with one call.
+
+    """
+    inputs = [AD_CHA_TYPE_ANALOG_IN | (i % 16 + 1) for i in range(count)]
+    outputs = [AD_CHA_TYPE_ANALOG_OUT | (i % 2 + 1) for i in range(count)]
+    ranges = [0] * count
+    data = [0x8000] * count
+
+    channels, compiled_ranges = compile_channels(inputs, ranges)
+    out = numpy.empty(count, dtype=numpy.uint64)
+    read_plan = AcquisitionPlan(handle, inputs)
+    write_plan = AcquisitionPlan(handle, outputs)
+    values = numpy.full(count, 0x8000, dtype=numpy.uint64)
+
+    return [
+        ('ad_discrete_inv', lambda: ad_discrete_inv(handle, inputs, ranges)),
+        ('ad_discrete_inv_array',
+         lambda: ad_discrete_inv_array(handle, channels, compiled_ranges,
+                                       out)),
+        ('AcquisitionPlan.read', lambda: read_plan.read(out)),
+        ('ad_discrete_outv',
+         lambda: ad_discrete_outv(handle, outputs, ranges, data)),
+        ('AcquisitionPlan.write', lambda: write_plan.write(values)),
+    ]
+
+
+def conversion_cases(handle, count):
+    """
+    Return a list of tuples (name, function) converting *count* samples.
+
+    """
+    codes = numpy.random.randint(0, 1 << 16, count).astype(numpy.uint16)
+    volts = numpy.random.uniform(-10.0, 10.0, count)
+    out32 = numpy.empty(count, dtype=numpy.float32)
+    out64 = numpy.empty(count, dtype=numpy.float64)
+    samples = numpy.empty(count, dtype=numpy.uint32)
+
+    return [
+        ('samples_to_float',
+         lambda: samples_to_float(handle, AI, 0, codes, out32)),
+        ('samples_to_float64',
+         lambda: samples_to_float64(handle, AI, 0, codes, out64)),
+        ('samples_to_float_lut',
+         lambda: samples_to_float_lut(handle, AI, 0, codes, out32)),
+        ('float_to_samples',
+         lambda: float_to_samples(handle, AO, 0, volts, samples)),
+    ]
+
+
+def scan_cases(handle, scan):
+    """
+    Return a list of tuples (name, function) starting and stopping a scan
+    of one channel on *handle* and reading the next run of the running
+    *scan*.
+
+    """
+    channel_descs = (SADScanChaDesc * 1)()
+    channel_descs[0].cha = AI
+    channel_descs[0].store = AD_STORE_DISCRETE
+    channel_descs[0].ratio = 1
+    channel_descs[0].trg_mode = AD_TRG_NONE
+    scan_desc = SADScanDesc()
+    scan_desc.sample_rate = 1e-6
+    scan_desc.ticks_per_run = SCAN_RUN
+
+    def start_stop():
+        ad_start_scan(handle, scan_desc, channel_descs)
+        ad_stop_scan(handle)
+
+    return [
+        ('ad_start_scan+ad_stop_scan', start_stop),
+        ('Scan.read_run', scan.read_run),
+    ]
+
+
+def _measure(group, name, func, duration, samples=None, **extra):
+    rate = calls_per_second(func, duration)
+    result = {
+        'group': group,
+        'name': name,
+        'calls_per_second': rate,
+        'allocated_bytes': allocated_bytes(func, NUMBER),
+    }
+    if samples is not None:
+        result['samples_per_second'] = rate * samples
+    result.update(extra)
+    return result
+
+
+def run(duration=0.5, pattern=None, progress=None):
+    """
+    Run the suite and return a dictionary with information about the
+    environment (key *meta*) and the list of results (key *results*).
+
+    :param float duration: approximate measurement time per case in seconds
+    :param str pattern: only run cases whose name contains *pattern*
+    :param progress: function called with each result
+
+    """
+    def selected(name):
+        return pattern is None or pattern in name
+
+    results = []
+
+    def measure(*args, **kwargs):
+        result = _measure(*args, **kwargs)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    libad4.load_library(build_stub_library())
+    handle = ad_open('usbbase')
+    scan_handle = ad_open('usbbase')
+    scan = Scan(scan_handle, [AI], sample_rate=1e6, samples_per_run=1)
+    scan.start()
+
+    try:
+        for name, func in wrapper_cases(handle, scan):
+            if selected(name):
+                measure('wrapper', name, func, duration)
+
+        for count in CHANNEL_COUNTS:
+            for name, func in channel_cases(handle, count):
+                if selected(name):
+                    measure('channels', name, func, duration, samples=count,
+                            channels=count)
+
+        for count in SAMPLE_COUNTS:
+            for name, func in conversion_cases(handle, count):
+                if selected(name):
+                    measure('conversion', name, func, duration,
+                            samples=count, size=count)
+    finally:
+        scan.stop()
+        ad_close(scan_handle)
+        ad_close(handle)
+        libad4.set_backend(None)
+
+    # the runs of the simulated scan are due at once at this sample rate
+    libad4.set_backend(SimulatedLibrary(noise=0.0))
+    handle = ad_open('usbbase')
+    scan_handle = ad_open('usbbase')
+    scan = Scan(scan_handle, [AI], sample_rate=1e9, samples_per_run=SCAN_RUN)
+    scan.start()
+
+    try:
+        for name, func in scan_cases(handle, scan):
+            if selected(name):
+                # only reading a run delivers samples
+                samples = SCAN_RUN if name == 'Scan.read_run' else None
+                measure('scan', name, func, duration, samples=samples,
+                        size=SCAN_RUN)
+    finally:
+        scan.stop()
+        ad_close(scan_handle)
+        ad_close(handle)
+        libad4.set_backend(None)
+
+    meta = {
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': numpy.__version__,
+        'pylibad4': pylibad4.__version__,
+        'duration': duration,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def _print_result(result):
+    samples = result.get('samples_per_second')
+    print('{:<12} {:<24} {:>8} {:>14,.0f} {:>16} {:>10,}'.format(
+        result['group'], result['name'],
+        result.get('channels', result.get('size', '')),
+        result['calls_per_second'],
+        '' if samples is None else '{:,.0f}'.format(samples),
+        result['allocated_bytes']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--duration', type=float, default=0.5,
+                        help='measurement time per case in seconds')
+    parser.add_argument('--filter', dest='pattern',
+                        help='only run cases containing this string')
+    parser.add_argument('--json', metavar='PATH',
+                        help="write the results as JSON, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    quiet = args.json == '-'
+    if not quiet:
+        print('{:<12} {:<24} {:>8} {:>14} {:>16} {:>10}'.format(
+            'group', 'name', 'size', 'calls [1/s]', 'samples [1/s]',
+            'alloc [B]'))
+    report = run(args.duration, args.pattern,
+                 None if quiet else _print_result)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
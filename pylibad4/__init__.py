@@ -5,6 +5,15 @@
 
 """
 
-from ._version import get_versions
-__version__ = get_versions()['version']
-del get_versions
+
+def __getattr__(name):
+    # The version is determined on first access: in a source checkout
+    # versioneer runs several git commands, which would slow down every
+    # import of the package.
+    if name == '__version__':
+        global __version__
+        from ._version import get_versions
+        __version__ = get_versions()['version']
+        return __version__
+    raise AttributeError('module {!r} has no attribute {!r}'
+                         .format(__name__, name))
@@ -0,0 +1,347 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Awaitable variants of the functions in :mod:`pylibad4.libad4`.
+
+All calls for a device-handle are executed in the order of their submission
+by a single worker thread dedicated to that handle, so the event loop is
+never blocked and coroutines sharing a device don't race for it::
+
+    >>> async def monitor(handle, channel):
+    ...     while True:
+    ...         print(await aio.ad_analog_in(handle, channel, 0))
+    ...         await asyncio.sleep(0.1)
+
+Reads of single values (:func:`ad_discrete_in`, :func:`ad_analog_in`) which
+are queued one after another while the worker is busy are executed together
+by one :func:`pylibad4.libad4.ad_discrete_inv` call. Voltage values are
+only read in a batch if the :func:`pylibad4.convert.conversion_table` of the
+channel and range has been built before; the table holds the results of the
+library, so a value doesn't depend on being batched or not. Build the tables
+up front to batch :func:`ad_analog_in`, other analog reads (also of ranges
+with more than 16 bits per sample) are executed one by one. If a batch fails
+its requests are executed one by one, so every caller gets its own result or
+error.
+
+A request can't be withdrawn after it has been queued: cancelling the
+awaiting coroutine doesn't stop the worker from executing it.
+
+"""
+import asyncio
+import collections
+import threading
+from . import libad4
+from .types import AD_CHA_TYPE_ANALOG_IN
+
+
+class _Request(object):
+
+    __slots__ = ('func', 'args', 'loop', 'future', 'channel', 'range_',
+                 'analog')
+
+    def __init__(self, func, args, loop, future, channel=None, range_=None,
+                 analog=False):
+        self.func = func
+        self.args = args
+        self.loop = loop
+        self.future = future
+        # channel id and range of a batchable single value read
+        self.channel = channel
+        self.range_ = range_
+        self.analog = analog
+
+    def resolve(self, result=None, exception=None):
+        self.loop.call_soon_threadsafe(_resolve, self.future, result,
+                                       exception)
+
+
+def _resolve(future, result, exception):
+    # called in the event loop thread
+    if future.done():
+        return
+    if exception is None:
+        future.set_result(result)
+    else:
+        future.set_exception(exception)
+
+
+class Worker(threading.Thread):
+    """
+    Thread executing the library calls of one device-handle.
+
+    :ivar int handle: device-handle
+    :ivar int calls: count of executed library calls
+    :ivar int batched: count of requests executed as part of a batch
+
+    """
+
+    def __init__(self, handle):
+        super(Worker, self).__init__(
+            name='pylibad4-aio-{}'.format(handle))
+        self.daemon = True
+        self.handle = handle
+        self.calls = 0
+        self.batched = 0
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._stopping = False
+
+    def submit(self, request):
+        """
+        Queue *request* for execution.
+
+        :raises RuntimeError: if the worker has been stopped
+
+        """
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError('worker of handle {} has been stopped'
+                                   .format(self.handle))
+            self._queue.append(request)
+            self._condition.notify()
+
+    def stop(self):
+        """
+        Stop the worker after all queued requests have been executed.
+
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                requests = list(self._queue)
+                self._queue.clear()
+
+            i = 0
+            try:
+                while i < len(requests):
+                    # consecutive reads can be combined without changing the
+                    # order of reads and writes
+                    j = i + 1
+                    if self._batchable(requests[i]):
+                        while j < len(requests) and \
+                                self._batchable(requests[j]):
+                            j += 1
+                    if j - i > 1:
+                        self._execute_batch(requests[i:j])
+                    else:
+                        self._execute(requests[i])
+                    i = j
+            except Exception as e:
+                # the worker keeps serving the handle, the requests which
+                # haven't been resolved get the error
+                for request in requests[i:]:
+                    request.resolve(exception=e)
+
+    def _execute(self, request):
+        self.calls += 1
+        try:
+            result = request.func(*request.args)
+        except Exception as e:
+            request.resolve(exception=e)
+        else:
+            request.resolve(result)
+
+    def _table(self, request):
+        # conversion table of an analog read, it is never built here as that
+        # takes 65536 library calls
+        tables = libad4.conversion_tables.get(self.handle, {})
+        return tables.get((request.channel, request.range_))
+
+    def _batchable(self, request):
+        if request.channel is None:
+            return False
+        return not request.analog or self._table(request) is not None
+
+    def _execute_batch(self, requests):
+        tables = [self._table(r) if r.analog else None for r in requests]
+        if any(r.analog and t is None for r, t in zip(requests, tables)):
+            # the device has been closed meanwhile
+            for request in requests:
+                self._execute(request)
+            return
+
+        self.calls += 1
+        try:
+            data = libad4.ad_discrete_inv(
+                self.handle, [r.channel for r in requests],
+                [r.range_ for r in requests])
+        except Exception:
+            for request in requests:
+                self._execute(request)
+            return
+
+        self.batched += len(requests)
+        for request, table, sample in zip(requests, tables, data):
+            if table is None:
+                request.resolve(sample)
+            else:
+                request.resolve(float(table[sample]))
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def worker(handle):
+    """
+    Return the worker thread of *handle*, it is started on first use.
+
+    :rtype: Worker
+
+    """
+    with _workers_lock:
+        w = _workers.get(handle)
+        if w is None:
+            w = _workers[handle] = Worker(handle)
+            w.start()
+        return w
+
+
+def _submit(handle, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    worker(handle).submit(_Request(func, (handle,) + args, loop, future,
+                                   **kwargs))
+    return future
+
+
+def shutdown():
+    """
+    Stop all worker threads after their queued requests have been executed
+    and wait for them to finish. New workers are started on demand.
+
+    """
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for w in workers:
+        w.stop()
+    for w in workers:
+        w.join()
+
+
+async def ad_open(name):
+    """
+    Open the measurement system *name*, see
+    :func:`pylibad4.libad4.ad_open`.
+
+    :rtype: int
+    :return: device-handle
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, libad4.ad_open, name)
+
+
+async def ad_close(handle):
+    """
+    Close the device-handle after all queued requests have been executed and
+    stop its worker thread, see :func:`pylibad4.libad4.ad_close`.
+
+    """
+    try:
+        return await _submit(handle, libad4.ad_close)
+    finally:
+        with _workers_lock:
+            w = _workers.pop(handle, None)
+        if w is not None:
+            w.stop()
+
+
+async def ad_discrete_in(handle, channel, range_):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_discrete_in`.
+
+    """
+    return await _submit(handle, libad4.ad_discrete_in, channel, range_,
+                         channel=channel, range_=range_)
+
+
+async def ad_discrete_inv(handle, channel_list, range_list):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_discrete_inv`.
+
+    """
+    return await _submit(handle, libad4.ad_discrete_inv, channel_list,
+                         range_list)
+
+
+async def ad_discrete_out(handle, channel, range_, data):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_discrete_out`.
+
+    """
+    return await _submit(handle, libad4.ad_discrete_out, channel, range_,
+                         data)
+
+
+async def ad_discrete_outv(handle, channel_list, range_list, data_list):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_discrete_outv`.
+
+    """
+    return await _submit(handle, libad4.ad_discrete_outv, channel_list,
+                         range_list, data_list)
+
+
+async def ad_analog_in(handle, channel, range_):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_analog_in`.
+
+    """
+    return await _submit(handle, libad4.ad_analog_in, channel, range_,
+                         channel=AD_CHA_TYPE_ANALOG_IN | channel,
+                         range_=range_, analog=True)
+
+
+async def ad_analog_out(handle, channel, range_, value):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_analog_out`.
+
+    """
+    return await _submit(handle, libad4.ad_analog_out, channel, range_,
+                         value)
+
+
+async def ad_digital_in(handle, channel):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_digital_in`.
+
+    """
+    return await _submit(handle, libad4.ad_digital_in, channel)
+
+
+async def ad_digital_out(handle, channel, data):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_digital_out`.
+
+    """
+    return await _submit(handle, libad4.ad_digital_out, channel, data)
+
+
+async def ad_set_digital_line(handle, channel, line, flag):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_set_digital_line`.
+
+    """
+    return await _submit(handle, libad4.ad_set_digital_line, channel, line,
+                         flag)
+
+
+async def ad_get_digital_line(handle, channel, line):
+    """
+    Awaitable :func:`pylibad4.libad4.ad_get_digital_line`.
+
+    """
+    return await _submit(handle, libad4.ad_get_digital_line, channel, line)
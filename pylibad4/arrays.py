@@ -0,0 +1,103 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+NumPy based variants of the multi-channel functions in
+:mod:`pylibad4.libad4`.
+
+Channel and range lists are compiled once into ctypes arrays with
+:func:`compile_channels` and the samples are written directly into a NumPy
+array, so repeated reads neither build argument arrays nor Python lists::
+
+    >>> channels, ranges = compile_channels(
+    ...     [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 65)], [0] * 64)
+    >>> out = numpy.empty(64, dtype=numpy.uint64)
+    >>> while True:
+    ...     ad_discrete_inv_array(handle, channels, ranges, out)
+
+"""
+from ctypes import c_int32, c_uint64, Array
+import numpy
+from . import libad4
+from .libad4 import LibAD4Error
+
+
+def compile_channels(channel_list, range_list):
+    """
+    Convert a channel list and a range list into ctypes arrays which can be
+    passed to :func:`ad_discrete_inv_array` on every call.
+
+    :param [int] channel_list: list of channels
+    :param [int] range_list: list of the used range numbers
+    :return: tuple of channel array and range array
+    :rtype: (ctypes.Array, ctypes.Array)
+
+    :raises ValueError: if the lists differ in length
+
+    """
+    if len(channel_list) != len(range_list):
+        raise ValueError('range_list and channel_list need to have the same '
+                         'length')
+
+    int32_array = c_int32 * len(channel_list)
+    return int32_array(*channel_list), int32_array(*range_list)
+
+
+def ad_discrete_inv_array(handle, channels, ranges, out=None):
+    """
+    Read multiple channels at once into a NumPy array.
+
+    In contrast to :func:`pylibad4.libad4.ad_discrete_inv` the samples are
+    written by libad4.dll directly into the memory of *out*, no data is
+    copied.
+
+    :param int handle: device-handle
+    :param channels: channel array returned by :func:`compile_channels`
+    :param ranges: range array returned by :func:`compile_channels`
+    :param numpy.ndarray out: contiguous uint64 array with one element per
+                              channel (NumPy or ctypes), a new array is
+                              created if None
+    :rtype: numpy.ndarray
+    :return: the array *out* holding the samples
+
+    :raises ValueError: if the arrays differ in length or *out* doesn't fit
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    count = len(channels)
+    if len(ranges) != count:
+        raise ValueError('ranges and channels need to have the same length')
+
+    if out is None:
+        out = numpy.empty(count, dtype=numpy.uint64)
+
+    if isinstance(out, Array):
+        # the library writes count uint64 values into the array
+        if out._type_ is not c_uint64 or len(out) != count:
+            raise ValueError('out needs to be a uint64 array of {} elements'
+                             .format(count))
+        data = out
+    else:
+        if out.dtype != numpy.uint64 or out.size != count:
+            raise ValueError('out needs to be a uint64 array of {} elements'
+                             .format(count))
+        # writable view on the array memory via the buffer protocol
+        data = (c_uint64 * count).from_buffer(out)
+
+    return_code = libad4.libad4_dll.ad_discrete_inv(
+        handle, count, channels, ranges, data)
+
+    if return_code:
+        raise LibAD4Error(
+            'Error calling function ad_discrete_inv('
+            '{handle}, {count}, {channel_list}, {range_list}), '
+            'returncode: {return_code}'.format(
+                handle=handle, count=count, channel_list=list(channels),
+                range_list=list(ranges), return_code=return_code
+            ), return_code
+        )
+
+    return out
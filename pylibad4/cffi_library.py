@@ -0,0 +1,326 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Loading the LIBAD4 library with cffi.
+
+cffi converts the arguments of a foreign function call in C, which makes the
+calls cheaper than with ctypes: on the stub library the wrappers of
+:mod:`pylibad4.libad4` run 1.1 to 1.7 times and the reads of a prepared
+:class:`pylibad4.plan.AcquisitionPlan` up to 1.8 times as fast (see
+``benchmarks/bench_ffi.py``). :func:`pylibad4.libad4.load_library`
+uses a :class:`CffiLibrary` if cffi is installed; set the environment
+variable ``PYLIBAD4_FFI`` to ``ctypes`` to use ctypes anyway.
+
+The declarations are generated from :data:`pylibad4.prototypes.PROTOTYPES`
+and the library is loaded in ABI mode, so no compiler is needed. The entry
+points of a :class:`CffiLibrary` keep the calling convention of the ctypes
+backend, pointer arguments are passed as ctypes objects. Pointer parameters
+are declared as ``uintptr_t`` and receive the address of the ctypes object,
+which is much cheaper than creating a cffi pointer on every call. The
+objects are checked against the pointer types of the prototypes like ctypes
+does, the types found valid are remembered per parameter type. Objects
+calling the library in a loop bind their arguments once with
+:meth:`CffiLibrary.bind`.
+
+cffi rejects integers which don't fit into the C type and non-integer
+values where ctypes wraps the integers around and raises
+:class:`ctypes.ArgumentError`. If cffi rejects the arguments of a call, they
+are converted by their ctypes types and the call is repeated, so both
+backends behave the same without slowing down valid calls.
+
+"""
+from ctypes import c_char_p, c_int32, c_uint32, c_float, c_uint64, \
+    c_double, c_int, c_void_p, addressof, cast, sizeof, _Pointer, \
+    _SimpleCData, Array, Structure, Union, ArgumentError
+from functools import partial
+from .prototypes import PROTOTYPES
+
+
+#: C types of the ctypes types used in the prototypes (c_int32 is an alias
+#: of c_int on most platforms and replaces it)
+C_TYPES = {
+    c_int: 'int',
+    c_char_p: 'const char *',
+    c_int32: 'int32_t',
+    c_uint32: 'uint32_t',
+    c_float: 'float',
+    c_uint64: 'uint64_t',
+    c_double: 'double',
+    c_void_p: 'void *',
+}
+
+
+def _is_pointer(ctype):
+    return ctype is c_void_p or issubclass(ctype, _Pointer)
+
+
+def _c_type(ctype):
+    # pointers are passed as addresses, the layout of the data is defined by
+    # the ctypes objects
+    return 'uintptr_t' if _is_pointer(ctype) else C_TYPES[ctype]
+
+
+def available():
+    """
+    Return True if cffi is installed. cffi isn't imported before a
+    :class:`CffiLibrary` is created, which keeps importing pylibad4 cheap.
+
+    :rtype: bool
+
+    """
+    from importlib.util import find_spec
+    return find_spec('cffi') is not None
+
+
+def convert_arguments(argtypes, pointers, args):
+    """
+    Return the values of *args* converted by the ctypes types in *argtypes*
+    like ctypes does for a foreign function call: integers wrap around, e.g.
+    -1 becomes 0xffffffff for ``c_uint32``. The arguments at the indices in
+    *pointers* are returned unchanged.
+
+    :rtype: list
+
+    :raises ctypes.ArgumentError: if a value can't be converted
+
+    """
+    values = list(args)
+    for i, (ctype, arg) in enumerate(zip(argtypes, args)):
+        if i in pointers:
+            continue
+        try:
+            values[i] = ctype(arg).value
+        except TypeError:
+            raise ArgumentError('argument {}: TypeError: wrong type'
+                                .format(i + 1))
+    return values
+
+
+def _check_pointer(arg, ctype, position):
+    # accept the arguments ctypes accepts for a POINTER(T) parameter: T
+    # instances and arrays, also passed by byref(), and POINTER(T) instances;
+    # other objects need to support the buffer protocol and to be large
+    # enough for a T
+    target = ctype._type_
+    obj = getattr(arg, '_obj', None)
+    value = arg if obj is None else obj
+    if isinstance(value, _Pointer):
+        valid = isinstance(value, ctype)
+    elif isinstance(value, Array):
+        valid = issubclass(value._type_, target)
+    elif isinstance(value, target):
+        valid = True
+    elif isinstance(value, (int, _SimpleCData, Structure, Union)):
+        valid = False
+    else:
+        try:
+            valid = memoryview(value).nbytes >= sizeof(target)
+        except TypeError:
+            valid = False
+    if not valid:
+        raise ArgumentError('argument {}: TypeError: expected {} instance '
+                            'instead of {}'.format(position + 1,
+                                                   ctype.__name__,
+                                                   type(arg).__name__))
+
+
+def declarations(prototypes=PROTOTYPES):
+    """
+    Return the C declarations of the entry points in *prototypes* for
+    :meth:`cffi.FFI.cdef`.
+
+    :rtype: str
+
+    """
+    lines = []
+    for name, (argtypes, restype) in sorted(prototypes.items()):
+        lines.append('{} {}({});'.format(
+            C_TYPES[restype], name,
+            ', '.join(_c_type(t) for t in argtypes) or 'void'))
+    return '\n'.join(lines)
+
+
+class CffiLibrary(object):
+    """
+    LIBAD4 library loaded with cffi, providing the entry points of
+    :data:`pylibad4.prototypes.PROTOTYPES` with the calling convention of
+    the ctypes backend.
+
+    Entry points missing in the library (e.g. older LIBAD4 versions) raise
+    an AttributeError when they are used.
+
+    :param str path: path or name of the library
+
+    :ivar ffi: the :class:`cffi.FFI` instance
+    :ivar lib: the library loaded by :meth:`cffi.FFI.dlopen`, its functions
+               take cffi arguments only
+
+    :raises OSError: if the library can't be loaded
+    :raises ImportError: if cffi isn't installed
+
+    """
+
+    def __init__(self, path, prototypes=PROTOTYPES):
+        import cffi
+
+        self.path = path
+        self.ffi = cffi.FFI()
+        self.ffi.cdef(declarations(prototypes))
+        self.lib = self.ffi.dlopen(path)
+        self._pointers = {}
+        self._argtypes = {}
+        # ctypes types whose address is passed without further checks, by
+        # pointer type of the parameter
+        self._direct = {}
+
+        for name, (argtypes, restype) in prototypes.items():
+            try:
+                func = getattr(self.lib, name)
+            except AttributeError:
+                continue
+            pointers = [i for i, t in enumerate(argtypes) if _is_pointer(t)]
+            self._pointers[name] = pointers
+            self._argtypes[name] = argtypes
+            setattr(self, name, self._adapt(func, argtypes, pointers))
+
+    def __repr__(self):
+        return '<CffiLibrary {!r}>'.format(self.path)
+
+    def __getattr__(self, name):
+        raise AttributeError('{} has no entry point {}'.format(self.path,
+                                                               name))
+
+    def address(self, arg, ctype=c_void_p, position=0):
+        """
+        Return the address passed for a pointer argument of the ctypes
+        calling convention: a ctypes instance, array or structure (also
+        passed by :func:`ctypes.byref`), a ctypes pointer, any object
+        supporting the buffer protocol or None. Addresses are accepted for
+        ``c_void_p`` parameters only.
+
+        :param arg: the argument
+        :param ctype: ctypes type of the parameter
+        :param int position: index of the parameter, used in error messages
+
+        :raises ctypes.ArgumentError: if *arg* doesn't match a pointer type
+                                      *ctype*, like ctypes does
+
+        """
+        if arg is None:
+            return 0
+        if ctype is not c_void_p:
+            _check_pointer(arg, ctype, position)
+        elif isinstance(arg, int):
+            return arg
+        obj = getattr(arg, '_obj', None)
+        if obj is not None:  # byref()
+            arg = obj
+        if isinstance(arg, (_Pointer, c_void_p)):
+            return cast(arg, c_void_p).value or 0
+        try:
+            result = addressof(arg)
+        except TypeError:
+            ffi = self.ffi
+            return int(ffi.cast('uintptr_t', ffi.from_buffer(arg)))
+        self._direct.setdefault(ctype, set()).add(type(arg))
+        return result
+
+    def _adapt(self, func, argtypes, pointers):
+        rejected = (OverflowError, TypeError)
+
+        def convert(*args):
+            return convert_arguments(argtypes, pointers, args)
+
+        if not pointers:
+            def call(*args):
+                try:
+                    return func(*args)
+                except rejected:
+                    return func(*convert(*args))
+            call.__name__ = func.__name__
+            return call
+
+        # Most entry points have a single out parameter at the end. Fixed
+        # signatures avoid packing and copying the arguments, which would
+        # cost more than the foreign function call.
+        count = len(argtypes)
+        if pointers == [count - 1] and count in (2, 3, 4, 5):
+            address = partial(self.address, ctype=argtypes[-1],
+                              position=count - 1)
+            direct = self._direct.setdefault(argtypes[-1], set())
+            if count == 2:
+                def call(a, out):
+                    out = addressof(out) if type(out) in direct \
+                        else address(out)
+                    try:
+                        return func(a, out)
+                    except rejected:
+                        return func(*convert(a, out))
+            elif count == 3:
+                def call(a, b, out):
+                    out = addressof(out) if type(out) in direct \
+                        else address(out)
+                    try:
+                        return func(a, b, out)
+                    except rejected:
+                        return func(*convert(a, b, out))
+            elif count == 4:
+                def call(a, b, c, out):
+                    out = addressof(out) if type(out) in direct \
+                        else address(out)
+                    try:
+                        return func(a, b, c, out)
+                    except rejected:
+                        return func(*convert(a, b, c, out))
+            else:
+                def call(a, b, c, d, out):
+                    out = addressof(out) if type(out) in direct \
+                        else address(out)
+                    try:
+                        return func(a, b, c, d, out)
+                    except rejected:
+                        return func(*convert(a, b, c, d, out))
+            call.__name__ = func.__name__
+            return call
+
+        address = self.address
+        directs = [(i, argtypes[i],
+                    self._direct.setdefault(argtypes[i], set()))
+                   for i in pointers]
+
+        def call(*args):
+            # args keeps the objects alive during the call
+            values = list(args)
+            for i, ctype, direct in directs:
+                arg = args[i]
+                values[i] = addressof(arg) if type(arg) in direct \
+                    else address(arg, ctype, i)
+            try:
+                return func(*values)
+            except rejected:
+                return func(*convert(*values))
+
+        call.__name__ = func.__name__
+        return call
+
+    def bind(self, name, *args):
+        """
+        Return a function calling the entry point *name* with *args*. The
+        addresses of the pointer arguments are determined once, so a call
+        costs no more than the foreign function call itself.
+
+        :rtype: functools.partial
+
+        """
+        func = getattr(self.lib, name)
+        pointers = self._pointers[name]
+        argtypes = self._argtypes[name]
+        values = [self.address(arg, argtypes[i], i) if i in pointers else arg
+                  for i, arg in enumerate(args)]
+        bound = partial(func, *convert_arguments(argtypes, pointers, values))
+        # the addresses are valid as long as the objects exist
+        bound.objects = args
+        return bound
@@ -0,0 +1,252 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Vectorized conversion between raw samples and voltage values.
+
+:func:`pylibad4.libad4.ad_sample_to_float` and
+:func:`pylibad4.libad4.ad_float_to_sample` need one library call per value.
+The functions in this module use the range information (:class:`SADRangeInfo`)
+of a channel, which is fetched once and kept in
+:data:`pylibad4.libad4.range_cache`, and convert whole NumPy arrays with the
+linear mapping it describes::
+
+    voltage = min + sample * res
+
+The results are the same as the ones of the single value functions:
+:func:`samples_to_float` rounds to 32 bit floats like
+:func:`ad_sample_to_float`, :func:`samples_to_float64` returns 64 bit floats
+like :func:`ad_sample_to_float64`.
+
+For channels with a resolution of up to 16 bits :func:`samples_to_float_lut`
+converts with a table of the results of :func:`ad_sample_to_float` for all
+65536 sample codes, which is built once per channel and range. The results
+are exactly the ones of the library, whatever rounding it applies.
+
+"""
+from ctypes import CDLL, c_int32, c_float
+from functools import partial
+import numpy
+from . import libad4
+from .cffi_library import CffiLibrary
+from .libad4 import ad_get_range_info, LibAD4Error
+
+#: count of entries of a conversion table
+TABLE_SIZE = 1 << 16
+
+
+def info_to_float(info, data, out=None, dtype=numpy.float32):
+    """
+    Convert an array of raw samples into voltage values using the range
+    information *info*.
+
+    :param SADRangeInfo info: range information of the channel
+    :param data: array-like of raw samples
+    :param numpy.ndarray out: array of *dtype* receiving the result
+    :param dtype: float32 for the results of :func:`ad_sample_to_float`,
+                  float64 for :func:`ad_sample_to_float64`
+    :rtype: numpy.ndarray
+
+    """
+    # calculate with double precision like libad4.dll and round the
+    # result to the requested type afterwards
+    values = numpy.multiply(data, info.res, dtype=numpy.float64)
+    values += info.min
+
+    if out is None:
+        return values if dtype == numpy.float64 else values.astype(dtype)
+
+    numpy.copyto(out, values, casting='same_kind')
+    return out
+
+
+def info_to_samples(info, values, out=None, dtype=numpy.uint32):
+    """
+    Convert an array of voltage values into raw samples using the range
+    information *info*. Values outside of the range are clipped to the
+    lowest or highest sample.
+
+    :param SADRangeInfo info: range information of the channel
+    :param values: array-like of voltage values
+    :param numpy.ndarray out: integer array receiving the result
+    :param dtype: uint32 for the results of :func:`ad_float_to_sample` which
+                  receives the values as 32 bit floats, uint64 for
+                  :func:`ad_float_to_sample64`
+    :rtype: numpy.ndarray
+
+    """
+    values = numpy.asarray(values)
+    if dtype == numpy.uint32:
+        values = values.astype(numpy.float32)
+
+    codes = numpy.subtract(values, info.min, dtype=numpy.float64)
+    codes /= info.res
+    codes += 0.5
+    numpy.clip(codes, 0, (1 << info.bps) - 1, out=codes)
+    numpy.floor(codes, out=codes)
+
+    if out is None:
+        return codes.astype(dtype)
+
+    numpy.copyto(out, codes, casting='unsafe')
+    return out
+
+
+def samples_to_float(handle, channel, range_, data, out=None):
+    """
+    Convert an array of raw samples into 32 bit voltage values.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :param data: array-like of raw samples
+    :param numpy.ndarray out: float32 array receiving the result
+    :rtype: numpy.ndarray
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+    return info_to_float(ad_get_range_info(handle, channel, range_), data,
+                         out)
+
+
+def samples_to_float64(handle, channel, range_, data, out=None):
+    """
+    Convert an array of raw samples into 64 bit voltage values.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :param data: array-like of raw samples
+    :param numpy.ndarray out: float64 array receiving the result
+    :rtype: numpy.ndarray
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+    return info_to_float(ad_get_range_info(handle, channel, range_), data,
+                         out, numpy.float64)
+
+
+def float_to_samples(handle, channel, range_, values, out=None):
+    """
+    Convert an array of voltage values into 32 bit raw samples.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :param values: array-like of voltage values
+    :param numpy.ndarray out: integer array receiving the result
+    :rtype: numpy.ndarray
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+    return info_to_samples(ad_get_range_info(handle, channel, range_), values,
+                           out)
+
+
+def float64_to_samples(handle, channel, range_, values, out=None):
+    """
+    Convert an array of voltage values into 64 bit raw samples.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :param values: array-like of voltage values
+    :param numpy.ndarray out: integer array receiving the result
+    :rtype: numpy.ndarray
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+    return info_to_samples(ad_get_range_info(handle, channel, range_), values,
+                           out, numpy.uint64)
+
+
+def conversion_table(handle, channel, range_):
+    """
+    Return the voltage values of all 16 bit sample codes as calculated by
+    :func:`ad_sample_to_float`.
+
+    The table is built on the first request, which calls the library
+    65536 times, and kept in :data:`pylibad4.libad4.conversion_tables` until
+    the device is closed, also if :data:`pylibad4.libad4.range_cache` is
+    disabled.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :rtype: numpy.ndarray
+    :return: float32 array of 65536 elements or None if the range has more
+             than 16 bits per sample
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    key = (channel, range_)
+    tables = libad4.conversion_tables.get(handle, {})
+    if key in tables:
+        return tables[key]
+
+    if ad_get_range_info(handle, channel, range_).bps > 16:
+        libad4.conversion_tables.setdefault(handle, {})[key] = None
+        return None
+
+    library = libad4.load_library()
+    value = out = c_float()
+    if isinstance(library, CffiLibrary):
+        convert = library.bind('ad_sample_to_float', handle, channel, range_)
+        out = library.address(value)
+    elif isinstance(library, CDLL):
+        convert = partial(library.ad_sample_to_float, c_int32(handle),
+                          c_int32(channel), c_int32(range_))
+    else:
+        convert = partial(library.ad_sample_to_float, handle, channel, range_)
+
+    table = numpy.empty(TABLE_SIZE, dtype=numpy.float32)
+    for code in range(TABLE_SIZE):
+        return_code = convert(code, out)
+        if return_code:
+            raise LibAD4Error(
+                'Error calling function ad_sample_to_float('
+                '{handle}, {channel}, {range_}), returncode: {return_code}'
+                .format(
+                    handle=handle, channel=channel, range_=range_,
+                    return_code=return_code
+                ), return_code
+            )
+        table[code] = value.value
+
+    libad4.conversion_tables.setdefault(handle, {})[key] = table
+    return table
+
+
+def samples_to_float_lut(handle, channel, range_, data, out=None):
+    """
+    Convert an array of raw samples into 32 bit voltage values by looking
+    them up in the :func:`conversion_table` of the channel. Falls back to
+    :func:`samples_to_float` for ranges with more than 16 bits per sample.
+
+    :param int handle: device-handle
+    :param int channel: channel number
+    :param int range_: range number
+    :param data: array-like of raw samples
+    :param numpy.ndarray out: float32 array receiving the result
+    :rtype: numpy.ndarray
+
+    :raises LibAD4Error: if the conversion table can't be built
+    :raises IndexError: if a sample exceeds 16 bits
+
+    """
+    table = conversion_table(handle, channel, range_)
+    if table is None:
+        return samples_to_float(handle, channel, range_, data, out)
+    data = numpy.asarray(data)
+    # codes of 16 bit types can't exceed the table, skip the bounds check
+    mode = 'clip' if data.dtype.kind == 'u' and data.itemsize <= 2 \
+        else 'raise'
+    return numpy.take(table, data, out=out, mode=mode)
@@ -0,0 +1,205 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Parallel acquisition from several measurement systems.
+
+Reading several devices one after another adds up the driver latencies of
+all devices. A :class:`Coordinator` reads every device from its own worker
+thread; ctypes releases the GIL during foreign function calls, so the reads
+overlap and a cycle takes about as long as the slowest device::
+
+    >>> names = ['usbbase:{}'.format(i) for i in range(8)]
+    >>> channels = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 17)]
+    >>> with Coordinator(names, channels) as coordinator:
+    ...     for snapshot in coordinator.snapshots(100):
+    ...         print(snapshot.cycle, snapshot.data.shape)
+    1 (8, 16)
+    ...
+
+"""
+import threading
+import time
+from collections import namedtuple
+import numpy
+from .libad4 import ad_open, ad_close
+from .plan import AcquisitionPlan
+
+
+class Snapshot(namedtuple('Snapshot', 'cycle timestamps data')):
+    """
+    Samples of all devices acquired in one cycle.
+
+    :ivar int cycle: number of the cycle, starting with 1
+    :ivar numpy.ndarray timestamps: :func:`time.monotonic` at the start of the
+                                    read of each device
+    :ivar numpy.ndarray data: uint64 array of shape (devices, channels)
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def skew(self):
+        """
+        Time in seconds between the first and the last device read start.
+
+        """
+        return float(self.timestamps.max() - self.timestamps.min())
+
+
+class Coordinator(object):
+    """
+    Read the same channels of several devices in parallel cycles.
+
+    The devices are opened on creation and closed by :meth:`close` or when
+    leaving a with-block.
+
+    :param [str] names: names of the devices, see :func:`ad_open`
+    :param [int] channel_list: list of channels read from each device
+    :param [int] range_list: list of the used range numbers, defaults to
+                             range 0 for all channels
+
+    :ivar [str] names: names of the devices
+    :ivar [int] handles: device-handles in the order of *names*
+    :ivar int cycle: number of the last cycle
+
+    :raises LibAD4Error: if a device couldn't be opened
+
+    """
+
+    def __init__(self, names, channel_list, range_list=None):
+        self.names = list(names)
+        self.handles = []
+        try:
+            for name in self.names:
+                self.handles.append(ad_open(name))
+            self._plans = [AcquisitionPlan(handle, channel_list, range_list)
+                           for handle in self.handles]
+        except Exception:
+            for handle in self.handles:
+                ad_close(handle)
+            raise
+
+        self.cycle = 0
+        self._data = numpy.zeros((len(self.handles), len(channel_list)),
+                                 dtype=numpy.uint64)
+        self._timestamps = numpy.zeros(len(self.handles))
+        self._errors = [None] * len(self.handles)
+
+        self._condition = threading.Condition()
+        self._requested = 0
+        self._pending = 0
+        self._closing = False
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,),
+                             name='pylibad4-coordinator-{}'.format(name))
+            for i, name in enumerate(self.names)
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.handles)
+
+    def _run(self, index):
+        plan = self._plans[index]
+        row = self._data[index]
+        done = 0
+        while True:
+            with self._condition:
+                while self._requested == done and not self._closing:
+                    self._condition.wait()
+                if self._closing:
+                    return
+                done = self._requested
+
+            timestamp = time.monotonic()
+            try:
+                plan.read(row)
+                error = None
+            except Exception as e:
+                # raised in acquire, the thread keeps serving the cycles
+                error = e
+
+            with self._condition:
+                self._timestamps[index] = timestamp
+                self._errors[index] = error
+                self._pending -= 1
+                if not self._pending:
+                    self._condition.notify_all()
+
+    def acquire(self, out=None):
+        """
+        Read all devices in parallel and wait for the results.
+
+        :param numpy.ndarray out: uint64 array of shape (devices, channels)
+                                  receiving the samples, a new array is
+                                  created if None
+        :rtype: Snapshot
+
+        :raises LibAD4Error: if the read of a device failed, the reads of
+                             the other devices are finished anyway; other
+                             exceptions of the read are raised the same way
+        :raises RuntimeError: if the coordinator has been closed, also while
+                              waiting for the results
+
+        """
+        with self._condition:
+            if self._closing:
+                raise RuntimeError('coordinator has been closed')
+            self._requested += 1
+            self._pending = len(self._threads)
+            self._condition.notify_all()
+            while self._pending and not self._closing:
+                self._condition.wait()
+            if self._pending:
+                raise RuntimeError('coordinator has been closed')
+
+        self.cycle += 1
+        for error in self._errors:
+            if error is not None:
+                raise error
+
+        if out is None:
+            out = self._data.copy()
+        else:
+            numpy.copyto(out, self._data)
+        return Snapshot(self.cycle, self._timestamps.copy(), out)
+
+    def snapshots(self, count=None):
+        """
+        Yield snapshots of *count* cycles, or forever if count is None.
+
+        """
+        while count is None or count > 0:
+            yield self.acquire()
+            if count is not None:
+                count -= 1
+
+    def close(self):
+        """
+        Stop the worker threads and close all devices, calling it multiple
+        times has no effect.
+
+        :raises LibAD4Error: if an error occured during disconnecting a device
+
+        """
+        with self._condition:
+            if self._closing:
+                return
+            self._closing = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        for handle in self.handles:
+            ad_close(handle)
@@ -0,0 +1,330 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Object oriented interface on top of :mod:`pylibad4.libad4`.
+
+A :class:`Device` owns the handle returned by :func:`ad_open` and creates
+:class:`Channel` objects. A channel prepares the library call for its channel
+id and range once, so reading or writing a value is a single prebuilt
+foreign function call::
+
+    >>> with Device('usbbase') as device:
+    ...     ch = device.analog_input(1)
+    ...     value = ch.read()
+
+"""
+import weakref
+from ctypes import CDLL, c_int32, c_uint32, c_float
+from functools import partial
+from . import libad4
+from .cffi_library import CffiLibrary
+from .digital import DigitalPort
+from .libad4 import ad_open, ad_close, ad_get_range_info, \
+    ad_get_product_info, ad_get_drv_version, LibAD4Error
+from .plan import AcquisitionPlan
+from .types import AD_CHA_TYPE_MASK, AD_CHA_TYPE_ANALOG_IN, \
+    AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO
+
+
+def _close(handle):
+    # called by the finalizer, errors can't be reported anymore
+    try:
+        ad_close(handle)
+    except LibAD4Error:  # pragma: no cover
+        pass
+
+
+class Device(object):
+    """
+    Connection to a measurement system.
+
+    The connection is closed by :meth:`close`, when leaving a with-block or
+    when the object is garbage collected.
+
+    :param str name: name of the device, see :func:`ad_open`
+
+    :ivar str name: name of the device
+    :ivar int handle: device-handle
+
+    :raises LibAD4Error: if the connection couldn't be established
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.handle = ad_open(name)
+        self._finalizer = weakref.finalize(self, _close, self.handle)
+
+    def __repr__(self):
+        return '<Device {!r} handle={}{}>'.format(
+            self.name, self.handle, ' closed' if self.closed else '')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self):
+        """
+        True if the connection has been closed.
+
+        """
+        return not self._finalizer.alive
+
+    def close(self):
+        """
+        Close the connection, calling it multiple times has no effect.
+
+        :raises LibAD4Error: if an error occured during disconnecting device
+
+        """
+        if self._finalizer.detach() is not None:
+            ad_close(self.handle)
+
+    @property
+    def product_info(self):
+        """
+        Product information of the measurement system, see
+        :func:`ad_get_product_info`.
+
+        """
+        return ad_get_product_info(self.handle)
+
+    @property
+    def driver_version(self):
+        """
+        Version of the measurement driver, see :func:`ad_get_drv_version`.
+
+        """
+        return ad_get_drv_version(self.handle)
+
+    def channel(self, channel, range_=0):
+        """
+        Return a channel object for the channel id *channel*
+        (e.g. ``AD_CHA_TYPE_ANALOG_IN | 1``).
+
+        :param int channel: channel id including the channel type
+        :param int range_: range number
+        :rtype: Channel
+
+        :raises LibAD4Error: if the range of the channel doesn't exist
+
+        """
+        cls = _CHANNEL_CLASSES.get(channel & AD_CHA_TYPE_MASK, Channel)
+        return cls(self, channel, range_)
+
+    def analog_input(self, number, range_=0):
+        """
+        Return the analog input *number*.
+
+        :rtype: AnalogInput
+
+        """
+        return AnalogInput(self, AD_CHA_TYPE_ANALOG_IN | number, range_)
+
+    def analog_output(self, number, range_=0):
+        """
+        Return the analog output *number*.
+
+        :rtype: AnalogOutput
+
+        """
+        return AnalogOutput(self, AD_CHA_TYPE_ANALOG_OUT | number, range_)
+
+    def digital_io(self, number, range_=0):
+        """
+        Return the digital channel *number*.
+
+        :rtype: DigitalIO
+
+        """
+        return DigitalIO(self, AD_CHA_TYPE_DIGITAL_IO | number, range_)
+
+    def digital_port(self, number):
+        """
+        Return the shadow register of the digital port *number*.
+
+        :rtype: pylibad4.digital.DigitalPort
+
+        """
+        return DigitalPort(self.handle, number)
+
+    def acquisition_plan(self, channel_list, range_list=None):
+        """
+        Return a plan reading or writing the channels of *channel_list*
+        with one library call.
+
+        :param [int] channel_list: list of channel ids
+        :param [int] range_list: list of range numbers, defaults to range 0
+        :rtype: pylibad4.plan.AcquisitionPlan
+
+        """
+        return AcquisitionPlan(self.handle, channel_list, range_list)
+
+
+class Channel(object):
+    """
+    Channel of a measurement system with a fixed range.
+
+    The range information and the arguments of the library calls are
+    prepared on creation. The library functions are bound from the backend
+    active at that time (see :func:`pylibad4.libad4.set_backend`).
+
+    :param Device device: measurement system
+    :param int channel: channel id including the channel type
+    :param int range_: range number
+
+    :ivar int id: channel id including the channel type
+    :ivar int number: channel number without the channel type
+    :ivar int range: range number
+    :ivar SADRangeInfo range_info: information about the range
+
+    :raises LibAD4Error: if the range of the channel doesn't exist
+
+    """
+
+    def __init__(self, device, channel, range_=0):
+        self.device = device
+        self.id = channel
+        self.type = channel & AD_CHA_TYPE_MASK
+        self.number = channel & ~AD_CHA_TYPE_MASK
+        self.range = range_
+        self.range_info = ad_get_range_info(device.handle, channel, range_)
+
+        self._library = libad4.load_library()
+        self._data = c_uint32()
+        self._read_raw = self._bind('ad_discrete_in', device.handle, channel,
+                                    range_, self._data)
+        self._write_raw = self._bind('ad_discrete_out', device.handle,
+                                     channel, range_)
+
+    def __repr__(self):
+        return '<{} 0x{:08x} range={}>'.format(
+            type(self).__name__, self.id, self.range)
+
+    def _bind(self, name, handle, channel, range_, *args):
+        # Foreign functions accept ctypes instances without converting
+        # them on every call, other backends get plain integers.
+        if isinstance(self._library, CffiLibrary):
+            return self._library.bind(name, handle, channel, range_, *args)
+        if isinstance(self._library, CDLL):
+            handle, channel, range_ = \
+                c_int32(handle), c_int32(channel), c_int32(range_)
+        return partial(getattr(self._library, name), handle, channel,
+                       range_, *args)
+
+    def _error(self, name, return_code, *args):
+        return LibAD4Error(
+            'Error calling function {name}({args}), returncode: '
+            '{return_code}'.format(
+                name=name, return_code=return_code,
+                args=', '.join(str(x) for x in (self.device.handle, self.id,
+                                                self.range) + args)
+            ), return_code
+        )
+
+    def read_raw(self):
+        """
+        Read a single raw value, see :func:`ad_discrete_in`.
+
+        :rtype: int
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return_code = self._read_raw()
+        if return_code:
+            raise self._error('ad_discrete_in', return_code)
+        return self._data.value
+
+    def write_raw(self, data):
+        """
+        Write a single raw value, see :func:`ad_discrete_out`.
+
+        :param int data: data value
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return_code = self._write_raw(data)
+        if return_code:
+            raise self._error('ad_discrete_out', return_code, data)
+
+
+class AnalogInput(Channel):
+    """
+    Analog input channel (``AD_CHA_TYPE_ANALOG_IN``).
+
+    """
+
+    def __init__(self, device, channel, range_=0):
+        super(AnalogInput, self).__init__(device, channel, range_)
+        self._value = c_float()
+        self._read = self._bind('ad_analog_in', device.handle, self.number,
+                                range_, self._value)
+
+    def read(self):
+        """
+        Read the voltage value of the input, see :func:`ad_analog_in`.
+
+        :rtype: float
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return_code = self._read()
+        if return_code:
+            raise self._error('ad_analog_in', return_code)
+        return self._value.value
+
+
+class AnalogOutput(Channel):
+    """
+    Analog output channel (``AD_CHA_TYPE_ANALOG_OUT``).
+
+    """
+
+    def __init__(self, device, channel, range_=0):
+        super(AnalogOutput, self).__init__(device, channel, range_)
+        self._write = self._bind('ad_analog_out', device.handle, self.number,
+                                 range_)
+
+    def write(self, value):
+        """
+        Set the output to the voltage *value*, see :func:`ad_analog_out`.
+
+        :param float value: voltage value
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return_code = self._write(value)
+        if return_code:
+            raise self._error('ad_analog_out', return_code, value)
+
+
+class DigitalIO(Channel):
+    """
+    Digital channel (``AD_CHA_TYPE_DIGITAL_IO``), the value of a digital
+    channel is the data word of all lines.
+
+    """
+
+    read = Channel.read_raw
+    write = Channel.write_raw
+
+
+_CHANNEL_CLASSES = {
+    AD_CHA_TYPE_ANALOG_IN: AnalogInput,
+    AD_CHA_TYPE_ANALOG_OUT: AnalogOutput,
+    AD_CHA_TYPE_DIGITAL_IO: DigitalIO,
+}
@@ -0,0 +1,379 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Shadow registers of the digital ports.
+
+Setting lines with :func:`ad_set_digital_line` costs a library call per
+line. A :class:`DigitalPort` keeps the last written data word and the line
+directions of a port in Python. Line changes are staged in the shadow
+register and written with a single :func:`ad_digital_out` call by
+:meth:`DigitalPort.commit`; a :class:`PortGroup` commits several ports with
+one :func:`ad_discrete_outv` call::
+
+    >>> port = DigitalPort(handle, 1)
+    >>> port.set_direction(0x0000)
+    >>> port.set_line(0, True)
+    >>> port.set_line(3, True)
+    >>> port.toggle_line(7)
+    >>> port.commit()  # one library call for three lines
+    True
+
+The shadow register assumes that the port is only written through it. Call
+:meth:`DigitalPort.sync` after the port has been written otherwise.
+
+:func:`unpack_lines` and :func:`pack_lines` convert between data words and
+boolean arrays with one column per line, for single words as well as for
+whole blocks of recorded samples::
+
+    >>> flags = unpack_lines(block, 16)  # samples x lines
+    >>> flags[:, 3].sum()  # samples with line 3 set
+
+"""
+import numpy
+from .libad4 import ad_get_range_info, ad_digital_in, ad_digital_out, \
+    ad_get_line_direction, ad_set_line_direction
+from .plan import AcquisitionPlan
+from .types import AD_CHA_TYPE_DIGITAL_IO
+
+
+#: unsigned integer types of the data words by maximum count of lines
+_WORD_TYPES = ((8, numpy.uint8), (16, numpy.uint16), (32, numpy.uint32),
+               (64, numpy.uint64))
+
+
+def _word_type(lines):
+    for bits, dtype in _WORD_TYPES:
+        if lines <= bits:
+            return numpy.dtype(dtype).newbyteorder('<')
+    raise ValueError('data words have at most 64 lines')
+
+
+def unpack_lines(words, lines=16):
+    """
+    Unpack data words into a boolean array with one column per line, column
+    0 being line 0. Bits above *lines* are ignored.
+
+    :param words: data word or array-like of data words of any shape, e.g.
+                  the samples of a digital channel recorded by a scan
+    :param int lines: count of lines
+    :return: boolean array of the shape ``words.shape + (lines,)``
+    :rtype: numpy.ndarray
+
+    :raises ValueError: if *lines* exceeds 64
+
+    """
+    words = numpy.asarray(words)
+    dtype = _word_type(lines)
+    data = numpy.ascontiguousarray(words, dtype=dtype).view(numpy.uint8)
+    bits = numpy.unpackbits(data.reshape(words.shape + (dtype.itemsize,)),
+                            axis=-1, bitorder='little')
+    return bits[..., :lines].view(bool)
+
+
+def pack_lines(flags, dtype=numpy.uint32):
+    """
+    Pack a boolean array with one column per line into data words, the
+    inverse of :func:`unpack_lines`.
+
+    :param flags: array-like of line states, the last axis are the lines
+    :param dtype: unsigned integer type of the result
+    :return: array of the shape ``flags.shape[:-1]``
+    :rtype: numpy.ndarray
+
+    :raises ValueError: if *dtype* has less bits than there are lines
+
+    """
+    flags = numpy.asarray(flags, dtype=bool)
+    dtype = numpy.dtype(dtype)
+    lines = flags.shape[-1]
+    if lines > dtype.itemsize * 8:
+        raise ValueError('{} lines don\'t fit into {}'.format(lines, dtype))
+
+    packed = numpy.packbits(flags, axis=-1, bitorder='little')
+    data = numpy.zeros(flags.shape[:-1] + (dtype.itemsize,),
+                       dtype=numpy.uint8)
+    data[..., :packed.shape[-1]] = packed
+    words = data.view(dtype.newbyteorder('<')).reshape(flags.shape[:-1])
+    return words.astype(dtype, copy=False)
+
+
+class DigitalPort(object):
+    """
+    Shadow register of a digital port.
+
+    The current data word and line directions are read when the port is
+    created.
+
+    :param int handle: device-handle
+    :param int number: number of the digital port
+
+    :ivar int channel: channel id (``AD_CHA_TYPE_DIGITAL_IO | number``)
+    :ivar int lines: count of lines
+    :ivar int word: data word last written to the port
+    :ivar int staged: data word written by the next :meth:`commit`
+    :ivar int direction: line direction mask, a set bit is an input
+    :ivar int changes: count of line changes committed
+    :ivar int writes: count of library calls writing the port
+
+    :raises LibAD4Error: if the port can't be read
+
+    """
+
+    def __init__(self, handle, number):
+        self.handle = handle
+        self.number = number
+        self.channel = AD_CHA_TYPE_DIGITAL_IO | number
+        self.lines = ad_get_range_info(handle, self.channel, 0).bps
+        self.changes = 0
+        self.writes = 0
+        self.sync()
+
+    def __repr__(self):
+        return '<DigitalPort handle={} number={} word=0x{:x}{}>'.format(
+            self.handle, self.number, self.word,
+            ' staged=0x{:x}'.format(self.staged) if self.dirty else '')
+
+    @property
+    def outputs(self):
+        """
+        Bitmask of the output lines.
+
+        """
+        return ~self.direction & ((1 << self.lines) - 1)
+
+    @property
+    def dirty(self):
+        """
+        True if changes are staged.
+
+        """
+        return self.staged != self.word
+
+    def sync(self):
+        """
+        Read the data word and the line directions from the device and
+        discard the staged changes.
+
+        :raises LibAD4Error: if the port can't be read
+
+        """
+        self.direction = ad_get_line_direction(self.handle, self.number)
+        self.word = self.staged = ad_digital_in(self.handle, self.number)
+
+    def set_direction(self, mask):
+        """
+        Set the line directions, see :func:`ad_set_line_direction`. The
+        directions are written immediately.
+
+        :param int mask: bitmask of the input lines
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        ad_set_line_direction(self.handle, self.number, mask)
+        self.direction = mask
+
+    def _check(self, mask):
+        if mask & ~((1 << self.lines) - 1):
+            raise ValueError('port {} has {} lines'.format(self.number,
+                                                           self.lines))
+        if mask & self.direction:
+            raise ValueError('lines 0x{:x} of port {} are inputs'.format(
+                mask & self.direction, self.number))
+
+    def stage(self, mask, value):
+        """
+        Stage the bits of *value* for the lines in *mask*.
+
+        :param int mask: bitmask of the lines to change
+        :param int value: data word with the new line states
+
+        :raises ValueError: if *mask* contains input lines or lines the port
+                            doesn't have
+
+        """
+        self._check(mask)
+        self.staged = (self.staged & ~mask) | (value & mask)
+
+    def set_line(self, line, flag):
+        """
+        Stage the state *flag* of *line*.
+
+        :raises ValueError: if the line is an input or doesn't exist
+
+        """
+        self.stage(1 << line, -1 if flag else 0)
+
+    def toggle_line(self, line):
+        """
+        Stage the inverted state of *line*.
+
+        :raises ValueError: if the line is an input or doesn't exist
+
+        """
+        self.stage(1 << line, ~self.staged)
+
+    def get_line(self, line):
+        """
+        Return the state of *line* including the staged changes. Input lines
+        are returned as read by :meth:`sync`.
+
+        :rtype: bool
+
+        """
+        return bool((self.staged >> line) & 1)
+
+    def stage_lines(self, flags, mask=None):
+        """
+        Stage the line states *flags*.
+
+        :param flags: array-like of :attr:`lines` booleans, index 0 is line 0
+        :param int mask: bitmask of the lines to change, defaults to the
+                         output lines
+
+        :raises ValueError: if *mask* contains input lines or lines the port
+                            doesn't have
+
+        """
+        if len(flags) != self.lines:
+            raise ValueError('port {} has {} lines'.format(self.number,
+                                                           self.lines))
+        self.stage(self.outputs if mask is None else mask,
+                   int(pack_lines(flags, numpy.uint64)))
+
+    def read_lines(self):
+        """
+        Read the states of all lines with one :func:`ad_digital_in` call.
+        The shadow register isn't changed.
+
+        :return: boolean array with one element per line
+        :rtype: numpy.ndarray
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return unpack_lines(ad_digital_in(self.handle, self.number),
+                            self.lines)
+
+    def discard(self):
+        """
+        Discard the staged changes.
+
+        """
+        self.staged = self.word
+
+    def _committed(self):
+        self.changes += bin(self.staged ^ self.word).count('1')
+        self.word = self.staged
+
+    def commit(self):
+        """
+        Write the staged changes with one :func:`ad_digital_out` call. Nothing
+        is written if no line has changed.
+
+        :return: True if the port has been written
+        :rtype: bool
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        if not self.dirty:
+            return False
+        ad_digital_out(self.handle, self.number, self.staged)
+        self.writes += 1
+        self._committed()
+        return True
+
+
+class PortGroup(object):
+    """
+    Digital ports of a device committed together with one
+    :func:`ad_discrete_outv` call.
+
+    :param int handle: device-handle
+    :param [int] numbers: numbers of the digital ports
+
+    :ivar [DigitalPort] ports: the ports in the order of *numbers*
+    :ivar int writes: count of library calls writing the ports
+
+    :raises LibAD4Error: if a port can't be read
+
+    """
+
+    def __init__(self, handle, numbers):
+        self.handle = handle
+        self.ports = [DigitalPort(handle, number) for number in numbers]
+        self._plan = AcquisitionPlan(handle,
+                                     [port.channel for port in self.ports])
+        self.writes = 0
+
+    def __getitem__(self, number):
+        for port in self.ports:
+            if port.number == number:
+                return port
+        raise KeyError(number)
+
+    def __len__(self):
+        return len(self.ports)
+
+    def __repr__(self):
+        return '<PortGroup handle={} ports={}>'.format(
+            self.handle, [port.number for port in self.ports])
+
+    @property
+    def dirty(self):
+        """
+        True if changes are staged on any port.
+
+        """
+        return any(port.dirty for port in self.ports)
+
+    @property
+    def changes(self):
+        """
+        Count of line changes committed on all ports.
+
+        """
+        return sum(port.changes for port in self.ports)
+
+    def read_lines(self):
+        """
+        Read the states of the lines of all ports with one
+        :func:`ad_discrete_inv` call.
+
+        :return: boolean array with one row per port and one column per
+                 line of the port with the most lines
+        :rtype: numpy.ndarray
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return unpack_lines(self._plan.read(),
+                            max(port.lines for port in self.ports))
+
+    def commit(self):
+        """
+        Write the data words of all ports with one :func:`ad_discrete_outv`
+        call if changes are staged on any port.
+
+        :return: True if the ports have been written
+        :rtype: bool
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        if not self.dirty:
+            return False
+        self._plan.write([port.staged for port in self.ports])
+        self.writes += 1
+        for port in self.ports:
+            port._committed()
+        return True
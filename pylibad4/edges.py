@@ -0,0 +1,152 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Edge detection on streamed data words of digital ports.
+
+Polling lines with :func:`ad_get_digital_line` misses edges between two
+polls. An :class:`EdgeDetector` processes the recorded data words of a
+digital channel block by block instead, e.g. the runs of a
+:class:`pylibad4.scan.Scan`. The changed samples are found with vectorized
+operations over the whole block, only these are unpacked into lines. The
+last word of a block is kept, so edges between two blocks are found as
+well::
+
+    >>> detector = EdgeDetector(rising=0x0001, falling=0x0000)
+    >>> for block in blocks:
+    ...     events = detector.process(block)
+    ...     for index, line, direction in events:
+    ...         print(index, line, direction)
+    >>> detector.rising_count[0]  # count of pulses on line 0
+
+"""
+import numpy
+from .digital import unpack_lines, _word_type
+
+
+#: direction of a rising edge in the events
+RISING = 1
+
+#: direction of a falling edge in the events
+FALLING = -1
+
+#: data type of the events: index of the sample with the new line state
+#: counted from the first sample processed, line number and direction
+EVENT_DTYPE = numpy.dtype([('index', numpy.int64), ('line', numpy.uint8),
+                           ('direction', numpy.int8)])
+
+
+class EdgeDetector(object):
+    """
+    Streaming edge detection on the data words of one digital port.
+
+    :param int rising: bitmask of the lines whose rising edges are detected,
+                       defaults to all lines
+    :param int falling: bitmask of the lines whose falling edges are
+                        detected, defaults to all lines
+    :param int lines: count of lines of the port
+    :param int initial: line states before the first sample; if None the
+                        first sample only sets the state
+
+    :ivar int position: count of samples processed
+    :ivar numpy.ndarray rising_count: count of rising edges per line
+    :ivar numpy.ndarray falling_count: count of falling edges per line
+
+    :raises ValueError: if *lines* exceeds 64
+
+    """
+
+    def __init__(self, rising=None, falling=None, lines=16, initial=None):
+        self.lines = lines
+        self._dtype = _word_type(lines)
+        all_lines = (1 << lines) - 1
+        self.rising = all_lines if rising is None else rising & all_lines
+        self.falling = all_lines if falling is None else falling & all_lines
+        self._initial = initial
+        self._changes = numpy.empty(0, dtype=self._dtype)
+        self.reset()
+
+    def __repr__(self):
+        return '<EdgeDetector rising=0x{:x} falling=0x{:x} position={}>' \
+            .format(self.rising, self.falling, self.position)
+
+    def reset(self):
+        """
+        Reset the line states, the sample position and the counters.
+
+        """
+        self.state = self._initial
+        self.position = 0
+        self.rising_count = numpy.zeros(self.lines, dtype=numpy.int64)
+        self.falling_count = numpy.zeros(self.lines, dtype=numpy.int64)
+
+    def process(self, words):
+        """
+        Detect the edges in the next block of data words.
+
+        :param words: one-dimensional array-like of data words
+        :return: array of :data:`EVENT_DTYPE` ordered by sample index and line
+        :rtype: numpy.ndarray
+
+        :raises ValueError: if *words* isn't one-dimensional
+
+        """
+        # bits above the lines are dropped by the cast
+        words = numpy.ascontiguousarray(numpy.asarray(words),
+                                        dtype=self._dtype)
+        if words.ndim != 1:
+            raise ValueError('words needs to be one-dimensional')
+        count = len(words)
+        if not count:
+            return numpy.empty(0, dtype=EVENT_DTYPE)
+
+        # changed lines of every sample, in a buffer reused by the next block
+        if len(self._changes) < count:
+            self._changes = numpy.empty(count, dtype=self._dtype)
+        changes = self._changes[:count]
+        numpy.bitwise_xor(words[:-1], words[1:], out=changes[1:])
+        changes[0] = 0 if self.state is None else \
+            (int(words[0]) ^ self.state) & ((1 << self.lines) - 1)
+
+        # samples with at least one detected edge
+        changes &= self.rising | self.falling
+        samples = numpy.flatnonzero(changes)
+
+        self.state = int(words[-1])
+        position = self.position
+        self.position += count
+        if not len(samples):
+            return numpy.empty(0, dtype=EVENT_DTYPE)
+
+        # lines with a detected edge, the new level gives the direction
+        levels = words[samples]
+        changed = changes[samples]
+        changed &= (levels & self.rising) | (~levels & self.falling)
+        rows, lines = numpy.nonzero(unpack_lines(changed, self.lines))
+        high = ((levels[rows] >> lines.astype(self._dtype)) & 1) \
+            .astype(numpy.intp)
+
+        events = numpy.empty(len(rows), dtype=EVENT_DTYPE)
+        events['index'] = samples[rows] + position
+        events['line'] = lines
+        numpy.subtract(high << 1, 1, out=events['direction'],
+                       casting='unsafe')
+
+        counts = numpy.bincount(lines * 2 + high, minlength=2 * self.lines)
+        self.falling_count += counts[0::2]
+        self.rising_count += counts[1::2]
+        return events
+
+
+def detect_edges(words, rising=None, falling=None, lines=16):
+    """
+    Return the edges in a recorded block of data words, see
+    :meth:`EdgeDetector.process`. The first sample only sets the line
+    states.
+
+    :rtype: numpy.ndarray
+
+    """
+    return EdgeDetector(rising, falling, lines).process(words)
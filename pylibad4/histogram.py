@@ -0,0 +1,137 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Histograms with logarithmic buckets for timing statistics.
+
+Adding a value costs one :func:`math.frexp` call and a list increment, so
+the histograms can record every cycle of a fast loop or every library call.
+
+"""
+import math
+
+
+class Histogram(object):
+    """
+    Histogram of durations in seconds with buckets growing by a factor of 2.
+
+    Bucket 0 counts values below *base* (including negative values), bucket
+    *i* counts values in [base * 2 ** (i - 1), base * 2 ** i). The last
+    bucket counts all larger values as well.
+
+    :param float base: upper bound of the first bucket
+    :param int buckets: count of buckets
+
+    :ivar [int] counts: count of values per bucket
+    :ivar int count: count of all values
+    :ivar float total: sum of all values
+
+    """
+
+    def __init__(self, base=1e-6, buckets=32):
+        self.base = base
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '<Histogram count={} mean={} max={}>'.format(
+            self.count, self.mean, self.max)
+
+    def add(self, value):
+        """
+        Count *value*.
+
+        """
+        if value < self.base:
+            index = 0
+        else:
+            index = min(math.frexp(value / self.base)[1],
+                        len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def reset(self):
+        """
+        Remove all values.
+
+        """
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def bounds(self, index):
+        """
+        Return the lower and upper bound of bucket *index*.
+
+        """
+        lower = 0.0 if index == 0 else self.base * 2 ** (index - 1)
+        upper = float('inf') if index == len(self.counts) - 1 \
+            else self.base * 2 ** index
+        return lower, upper
+
+    @property
+    def mean(self):
+        """
+        Mean of all values, None if the histogram is empty.
+
+        """
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q):
+        """
+        Return an upper bound of the *q* percentile, i.e. the upper bound of
+        the bucket holding it, but not more than the largest value.
+
+        :param float q: percentile between 0 and 100
+        :return: upper bound or None if the histogram is empty
+
+        """
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        cumulated = 0
+        for index, count in enumerate(self.counts):
+            cumulated += count
+            if count and cumulated >= rank:
+                return min(self.bounds(index)[1], self.max)
+        return self.max
+
+    def buckets(self):
+        """
+        Return a list of tuples (lower bound, upper bound, count) of all
+        non-empty buckets.
+
+        """
+        return [self.bounds(i) + (count,)
+                for i, count in enumerate(self.counts) if count]
+
+    def summary(self):
+        """
+        Return a dictionary with count, mean, min, max and the 50, 99 and
+        99.9 percentiles.
+
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
@@ -0,0 +1,216 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Timing statistics of the LIBAD4 entry points.
+
+:func:`enable` replaces the backend used by the ``ad_*`` functions of
+:mod:`pylibad4.libad4` with an :class:`InstrumentedLibrary`, which measures
+every call with :func:`time.perf_counter` and counts the calls, the errors
+by error code and the call durations in a :class:`Histogram`::
+
+    >>> instrument.enable()
+    >>> run_test_bench()
+    >>> for name, stats in instrument.snapshot().items():
+    ...     print(name, stats['calls'], stats['mean'], stats['errors'])
+    >>> instrument.disable()
+
+While the instrumentation is disabled the backend isn't wrapped at all, so
+there is no overhead. Objects which bound library functions before
+:func:`enable` was called, like :class:`pylibad4.device.Channel` or
+:class:`pylibad4.plan.AcquisitionPlan`, keep calling the library directly
+and aren't counted; create them after enabling the instrumentation to
+include their calls. :func:`pylibad4.libad4.set_backend` and
+:func:`pylibad4.libad4.load_library` with a path replace the instrumented
+backend and so end the instrumentation as well.
+
+"""
+import threading
+import time
+from . import libad4
+from .histogram import Histogram
+
+
+def _error_code(name, return_code):
+    # error code of a call like the one raised with LibAD4Error, None if
+    # the call succeeded
+    if name == 'ad_open':
+        return -1 if return_code == -1 else None
+    if name == 'ad_get_version':
+        return None
+    return return_code or None
+
+
+class CallStats(object):
+    """
+    Statistics of one entry point.
+
+    :ivar str name: name of the entry point
+    :ivar int calls: count of calls
+    :ivar dict errors: count of failed calls by error code
+    :ivar Histogram durations: durations of the calls in seconds
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = {}
+        self.durations = Histogram(base=1e-7)
+
+    def reset(self):
+        """
+        Reset the counters and the histogram.
+
+        """
+        self.calls = 0
+        self.errors.clear()
+        self.durations.reset()
+
+    def snapshot(self):
+        """
+        Return the statistics as dictionary.
+
+        """
+        summary = self.durations.summary()
+        summary.update({
+            'calls': self.calls,
+            'errors': dict(self.errors),
+            'total': self.durations.total,
+            'buckets': self.durations.buckets(),
+        })
+        return summary
+
+
+class InstrumentedLibrary(object):
+    """
+    Proxy of a backend measuring the calls of its ``ad_*`` entry points.
+
+    :param library: the backend, e.g. the loaded LIBAD4 library
+
+    :ivar dict stats: :class:`CallStats` by entry point name
+
+    """
+
+    def __init__(self, library):
+        self.library = library
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        func = getattr(self.library, name)
+        if not name.startswith('ad_'):
+            return func
+
+        stats = self.stats.setdefault(name, CallStats(name))
+        lock = self._lock
+        clock = time.perf_counter
+
+        def call(*args):
+            start = clock()
+            return_code = func(*args)
+            duration = clock() - start
+            error_code = _error_code(name, return_code)
+            with lock:
+                stats.calls += 1
+                stats.durations.add(duration)
+                if error_code is not None:
+                    stats.errors[error_code] = \
+                        stats.errors.get(error_code, 0) + 1
+            return return_code
+
+        call.__name__ = name
+        # later lookups find the wrapper without calling __getattr__
+        setattr(self, name, call)
+        return call
+
+    def snapshot(self):
+        """
+        Return a dictionary with the statistics of all called entry points,
+        see :meth:`CallStats.snapshot`.
+
+        """
+        with self._lock:
+            return {name: stats.snapshot()
+                    for name, stats in self.stats.items() if stats.calls}
+
+    def reset(self):
+        """
+        Reset the statistics of all entry points.
+
+        """
+        with self._lock:
+            for stats in self.stats.values():
+                stats.reset()
+
+
+def instrumented_library():
+    """
+    Return the active :class:`InstrumentedLibrary` or None if the
+    instrumentation is disabled.
+
+    """
+    library = libad4.libad4_dll
+    return library if isinstance(library, InstrumentedLibrary) else None
+
+
+def enable():
+    """
+    Measure all calls of the ``ad_*`` functions from now on. The backend is
+    loaded if necessary. Calling it again keeps the collected statistics.
+
+    :rtype: InstrumentedLibrary
+
+    :raises OSError: if the library can't be loaded
+
+    """
+    backend = libad4.load_library()
+    with libad4._load_lock:
+        if isinstance(backend, InstrumentedLibrary):
+            return backend
+        library = libad4.libad4_dll = InstrumentedLibrary(backend)
+        return library
+
+
+def disable():
+    """
+    Stop measuring and restore the backend.
+
+    :return: the statistics collected, see :func:`snapshot`
+
+    """
+    with libad4._load_lock:
+        library = instrumented_library()
+        if library is None:
+            return {}
+        libad4.libad4_dll = library.library
+    return library.snapshot()
+
+
+def snapshot():
+    """
+    Return a dictionary with the statistics of all called entry points by
+    name, empty if the instrumentation is disabled. The statistics of an
+    entry point are a dictionary with the keys
+
+    * calls: count of calls
+    * errors: dictionary with the count of failed calls by error code
+    * total, mean, min, max: durations in seconds
+    * p50, p99, p999: upper bounds of the percentiles of the durations
+    * buckets: list of tuples (lower bound, upper bound, count)
+
+    """
+    library = instrumented_library()
+    return {} if library is None else library.snapshot()
+
+
+def reset():
+    """
+    Reset the statistics if the instrumentation is enabled.
+
+    """
+    library = instrumented_library()
+    if library is not None:
+        library.reset()
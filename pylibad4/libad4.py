@@ -7,12 +7,27 @@
 """
 import os
 import sys
+import threading
 from builtins import bytes
-from ctypes import CDLL, c_char_p, c_int32, c_uint32, byref, c_float, \
-    c_uint64, c_double, c_int, POINTER, sizeof
-from .types import SADRangeInfo, SADProductInfo
-
-LIB_NAME = 'libad4.dll'
+from ctypes import CDLL, c_int32, c_uint32, c_float, c_uint64, c_double, \
+    sizeof
+from .types import SADRangeInfo, SADProductInfo, SADScanState
+from .prototypes import bind_prototypes
+from . import cffi_library
+
+if sys.platform == 'win32':
+    LIB_NAME = 'libad4.dll'
+elif sys.platform == 'darwin':  # pragma: no cover
+    LIB_NAME = 'libad4.dylib'
+else:
+    LIB_NAME = 'libad4.so'
+
+#: environment variable holding the path of the library to load
+LIB_PATH_ENV = 'PYLIBAD4_LIBRARY'
+
+#: environment variable selecting the foreign function interface, 'cffi' or
+#: 'ctypes'
+LIB_FFI_ENV = 'PYLIBAD4_FFI'
 
 encoding = sys.getdefaultencoding()
 
@@ -20,12 +35,131 @@ encoding = sys.getdefaultencoding()
 basedir = os.path.dirname(os.path.abspath(__file__))
 local_lib = os.path.join(basedir, LIB_NAME)
 
-# Load libad4.dll
-# prefer local dll before system wide dll
-if os.path.isfile(local_lib):
-    libad4_dll = CDLL(local_lib)
-else:  # pragma: no cover
-    libad4_dll = CDLL(LIB_NAME)
+_load_lock = threading.Lock()
+
+
+class _LazyLibrary(object):
+    """
+    Placeholder for the library until the first device call.
+
+    Accessing an entry point loads the library, so importing this module
+    doesn't touch the shared object at all.
+
+    """
+
+    def __getattr__(self, name):
+        return getattr(load_library(), name)
+
+
+libad4_dll = _LazyLibrary()
+
+
+def find_library():
+    """
+    Return the path or name of the LIBAD4 library to load.
+
+    The library is looked up in the following order:
+
+    1. the path in the environment variable ``PYLIBAD4_LIBRARY``
+    2. a library placed in the package directory
+    3. the platform specific name (*libad4.dll*, *libad4.so* or
+       *libad4.dylib*) resolved by the system loader
+
+    :rtype: str
+
+    """
+    path = os.environ.get(LIB_PATH_ENV)
+    if path:
+        return path
+
+    # prefer local dll before system wide dll
+    if os.path.isfile(local_lib):
+        return local_lib
+
+    return LIB_NAME  # pragma: no cover
+
+
+def open_library(path, ffi=None):
+    """
+    Load the library at *path* and bind the prototypes of its entry points.
+
+    :param str path: path or name of the library
+    :param str ffi: 'cffi' to load it with cffi (see
+                    :class:`pylibad4.cffi_library.CffiLibrary`), 'ctypes'
+                    to load it as :class:`ctypes.CDLL`; if None the value of
+                    the environment variable ``PYLIBAD4_FFI`` is used,
+                    defaulting to cffi if it is installed
+    :return: the loaded library
+
+    :raises OSError: if the library can't be loaded
+
+    """
+    if ffi is None:
+        ffi = os.environ.get(LIB_FFI_ENV) or \
+            ('cffi' if cffi_library.available() else 'ctypes')
+
+    if ffi == 'cffi':
+        return cffi_library.CffiLibrary(path)
+    if ffi == 'ctypes':
+        return bind_prototypes(CDLL(path))
+    raise ValueError('unknown foreign function interface {!r}'.format(ffi))
+
+
+def load_library(path=None, ffi=None):
+    """
+    Load the LIBAD4 library and bind the prototypes of its entry points, see
+    :func:`open_library`.
+
+    Without *path* the library returned by :func:`find_library` is loaded on
+    the first call and cached for all further calls. With *path* the given
+    library is loaded and replaces a previously loaded one.
+
+    All ``ad_*`` functions load the library on demand, so this only needs to
+    be called to use a library from a custom location.
+
+    :param str path: path of the library to load
+    :param str ffi: foreign function interface used for loading a library,
+                    see :func:`open_library`
+    :return: the loaded library
+
+    :raises OSError: if the library can't be loaded
+
+    """
+    global libad4_dll
+
+    with _load_lock:
+        if path is None:
+            if not isinstance(libad4_dll, _LazyLibrary):
+                return libad4_dll
+            path = find_library()
+
+        libad4_dll = open_library(path, ffi)
+        range_cache.invalidate()
+        conversion_tables.clear()
+        return libad4_dll
+
+
+def set_backend(backend):
+    """
+    Use *backend* instead of the LIBAD4 library for all ``ad_*`` functions.
+
+    A backend provides the entry points listed in
+    :data:`pylibad4.prototypes.PROTOTYPES` with the calling convention of the
+    foreign functions: out parameters are passed as ctypes objects and every
+    function returns the LIBAD4 return code. See
+    :class:`pylibad4.simulator.SimulatedLibrary` for a backend running
+    without hardware.
+
+    :param backend: backend object, None restores the default behaviour of
+                    loading the LIBAD4 library on the first call
+
+    """
+    global libad4_dll
+
+    with _load_lock:
+        libad4_dll = _LazyLibrary() if backend is None else backend
+        range_cache.invalidate()
+        conversion_tables.clear()
 
 
 class LibAD4Error(Exception):
@@ -35,6 +169,109 @@ class LibAD4Error(Exception):
         self.error_code = error_code
 
 
+class RangeCache(object):
+    """
+    Cache for the results of :func:`ad_get_range_count` and
+    :func:`ad_get_range_info`.
+
+    Entries are stored per device handle and removed when the device is
+    closed by :func:`ad_close`. The module level instance :data:`range_cache`
+    is used by the ``ad_*`` functions.
+
+    :ivar bool enabled: if False every call is passed to libad4.dll
+    :ivar int hits: count of requests answered from the cache
+    :ivar int misses: count of requests passed to libad4.dll
+
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the cached value for *key* or None and count the hit or miss.
+
+        :param tuple key: (handle, channel) for range counts,
+                          (handle, channel, range) for range information
+
+        """
+        if not self.enabled:
+            return None
+
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store *value* for *key* if the cache is enabled.
+
+        """
+        if self.enabled:
+            self._entries[key] = value
+
+    def invalidate(self, handle=None):
+        """
+        Remove all entries of *handle* or all entries if *handle* is None.
+
+        """
+        if handle is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == handle]:
+                del self._entries[key]
+
+    def preload(self, handle, channels):
+        """
+        Fill the cache with the range counts and the information about all
+        ranges of *channels*.
+
+        :param int handle: device-handle
+        :param [int] channels: list of channel numbers
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        for channel in channels:
+            for range_ in range(ad_get_range_count(handle, channel)):
+                ad_get_range_info(handle, channel, range_)
+
+    def stats(self):
+        """
+        Return a dictionary with the hit and miss counters and the count of
+        cached entries.
+
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries)}
+
+    def reset_stats(self):
+        """
+        Reset the hit and miss counters.
+
+        """
+        self.hits = 0
+        self.misses = 0
+
+
+#: cache used by ad_get_range_count and ad_get_range_info
+range_cache = RangeCache()
+
+#: conversion tables of :func:`pylibad4.convert.conversion_table` by device
+#: handle, independent of :data:`range_cache` and dropped by ad_close
+conversion_tables = {}
+
+
 def ad_open(name):
     """
     Open connection to a measurement system.
@@ -66,11 +303,7 @@ def ad_open(name):
     You can also use the serial number for addressing ('usbbase:@157').
 
     """
-    ad_open = libad4_dll.ad_open
-    ad_open.argtypes = [c_char_p]
-    ad_open.restype = c_int32
-
-    handle = ad_open(bytes(name, encoding))
+    handle = libad4_dll.ad_open(bytes(name, encoding))
 
     if handle == -1:
         raise LibAD4Error('Could not connect to device {}'.format(name), -1)
@@ -87,11 +320,9 @@ def ad_close(handle):
     :raises LibAD4Error: if an error occured during disconnecting device,
                          contains the error number
     """
-    ad_close = libad4_dll.ad_close
-    ad_close.argtypes = [c_int32]
-    ad_close.restype = c_int32
-
-    return_code = ad_close(handle)
+    return_code = libad4_dll.ad_close(handle)
+    range_cache.invalidate(handle)
+    conversion_tables.pop(handle, None)
 
     if return_code:
         raise LibAD4Error(
@@ -112,13 +343,17 @@ def ad_get_range_count(handle, channel):
     :raises LibAD4Error: if an error occured, error_code contains the error number
                          return by libad4.dll
 
+    The result is cached in :data:`range_cache` until the device is closed.
+
     """
-    ad_get_range_count = libad4_dll.ad_get_range_count
-    ad_get_range_count.argtypes = [c_int32, c_int32]
-    ad_get_range_count.restype = c_int32
+    key = (handle, channel)
+    cached = range_cache.get(key)
+    if cached is not None:
+        return cached
+
     count = c_int32()
 
-    return_code = ad_get_range_count(handle, channel, byref(count))
+    return_code = libad4_dll.ad_get_range_count(handle, channel, count)
 
     if return_code:
         raise LibAD4Error(
@@ -128,6 +363,7 @@ def ad_get_range_count(handle, channel):
             return_code
         )
 
+    range_cache.put(key, count.value)
     return count.value
 
 
@@ -143,14 +379,19 @@ def ad_get_range_info(handle, channel, range_):
     :raises LibAD4Error: if an error occured, error_code contains the error
                          number return by libad4.dll
 
+    The result is cached in :data:`range_cache` until the device is closed,
+    the returned object must not be modified.
+
     """
-    ad_get_range_info = libad4_dll.ad_get_range_info
-    ad_get_range_info.argtypes = [c_int32, c_int32, c_int32]
-    ad_get_range_info.restype = c_int32
+    key = (handle, channel, range_)
+    cached = range_cache.get(key)
+    if cached is not None:
+        return cached
+
     st_ad_range_info = SADRangeInfo()
 
-    return_code = ad_get_range_info(handle, channel, range_,
-                                    byref(st_ad_range_info))
+    return_code = libad4_dll.ad_get_range_info(handle, channel, range_,
+                                               st_ad_range_info)
 
     if return_code:
         raise LibAD4Error(
@@ -162,6 +403,7 @@ def ad_get_range_info(handle, channel, range_):
             ), return_code
         )
 
+    range_cache.put(key, st_ad_range_info)
     return st_ad_range_info
 
 
@@ -178,12 +420,9 @@ def ad_discrete_in(handle, channel, range_):
                          number returned by libad4.dll
 
     """
-    ad_discrete_in = libad4_dll.ad_discrete_in
-    ad_discrete_in.argtypes = [c_int32, c_int32, c_int32]
-    ad_discrete_in.restype = c_int32
     data = c_uint32()
 
-    return_code = ad_discrete_in(handle, channel, range_, byref(data))
+    return_code = libad4_dll.ad_discrete_in(handle, channel, range_, data)
 
     if return_code:
         raise LibAD4Error(
@@ -210,12 +449,9 @@ def ad_discrete_in64(handle, channel, range_):
                          number returned by libad4.dll
 
     """
-    ad_discrete_in64 = libad4_dll.ad_discrete_in64
-    ad_discrete_in64.argtypes = [c_int32, c_int32, c_uint64]
-    ad_discrete_in64.restype = c_int32
     data = c_uint64()
 
-    return_code = ad_discrete_in64(handle, channel, range_, byref(data))
+    return_code = libad4_dll.ad_discrete_in64(handle, channel, range_, data)
 
     if return_code:
         raise LibAD4Error(
@@ -235,8 +471,6 @@ def ad_discrete_inv(handle, channel_list, range_list):
                          number returned by libad4.dll
 
     """
-    ad_discrete_inv = libad4_dll.ad_discrete_inv
-
     # Check for same length of channel_list and range_list
     if len(channel_list) != len(range_list):
         raise ValueError('range_list and channel_list need to have the same '
@@ -245,13 +479,10 @@ def ad_discrete_inv(handle, channel_list, range_list):
     # Prepare function parameters
     count = len(channel_list)
     int32_array = (c_int32 * count)
-
-    ad_discrete_inv.argtypes = [c_int32, c_int32, int32_array, int32_array]
-    ad_discrete_inv.restype = c_int32
     data = (c_uint64 * count)()
 
     # call c-function
-    return_code = ad_discrete_inv(
+    return_code = libad4_dll.ad_discrete_inv(
         handle, count, int32_array(*channel_list),
         int32_array(*range_list), data
     )
@@ -290,11 +521,7 @@ def ad_discrete_out(handle, channel, range_, data):
     for direct usage with voltage values.
 
     """
-    ad_discrete_out = libad4_dll.ad_discrete_out
-    ad_discrete_out.argtypes = [c_int32, c_int32, c_int32, c_uint32]
-    ad_discrete_out.restype = c_int32
-
-    return_code = ad_discrete_out(handle, channel, range_, data)
+    return_code = libad4_dll.ad_discrete_out(handle, channel, range_, data)
 
     if return_code:
         raise LibAD4Error(
@@ -330,11 +557,7 @@ def ad_discrete_out64(handle, channel, range_, data):
     for direct usage with voltage values.
 
     """
-    ad_discrete_out = libad4_dll.ad_discrete_out
-    ad_discrete_out.argtypes = [c_int32, c_int32, c_uint64, c_uint64]
-    ad_discrete_out.restype = c_int32
-
-    return_code = ad_discrete_out(handle, channel, range_, data)
+    return_code = libad4_dll.ad_discrete_out64(handle, channel, range_, data)
 
     if return_code:
         raise LibAD4Error(
@@ -366,8 +589,6 @@ def ad_discrete_outv(handle, channel_list, range_list, data_list):
                          number returned by libad4.dll
 
     """
-    ad_discrete_outv = libad4_dll.ad_discrete_outv
-
     # Check for same length of channel_list and range_list
     if len(channel_list) != len(range_list):
         raise ValueError('range_list and channel_list need to have the same '
@@ -378,12 +599,8 @@ def ad_discrete_outv(handle, channel_list, range_list, data_list):
     int32_array = (c_int32 * count)
     uint64_array = (c_uint64 * count)
 
-    ad_discrete_outv.argtypes = [c_int32, c_int32, int32_array, uint64_array,
-                                 uint64_array]
-    ad_discrete_outv.restype = c_int32
-
-    return_code = ad_discrete_outv(
-        handle, count, int32_array(*channel_list), uint64_array(*range_list),
+    return_code = libad4_dll.ad_discrete_outv(
+        handle, count, int32_array(*channel_list), int32_array(*range_list),
         uint64_array(*data_list)
     )
 
@@ -413,13 +630,10 @@ def ad_sample_to_float(handle, channel, range_, data):
                          number returned by libad4.dll
 
     """
-    ad_sample_to_float = libad4_dll.ad_sample_to_float
-    ad_sample_to_float.argtypes = [c_int32, c_int32, c_int32, c_uint32]
-    ad_sample_to_float.restype = c_int32
     float_data = c_float()
 
-    return_code = ad_sample_to_float(
-        handle, channel, range_, data, byref(float_data))
+    return_code = libad4_dll.ad_sample_to_float(
+        handle, channel, range_, data, float_data)
 
     if return_code:
         raise LibAD4Error(
@@ -448,13 +662,10 @@ def ad_sample_to_float64(handle, channel, range_, data):
                          number returned by libad4.dll
 
     """
-    ad_sample_to_float64 = libad4_dll.ad_sample_to_float64
-    ad_sample_to_float64.argtypes = [c_int32, c_int32, c_uint64, c_uint64]
-    ad_sample_to_float64.restype = c_int32
     double_data = c_double()
 
-    return_code = ad_sample_to_float64(
-        handle, channel, range_, data, byref(double_data))
+    return_code = libad4_dll.ad_sample_to_float64(
+        handle, channel, range_, data, double_data)
 
     if return_code:
         raise LibAD4Error(
@@ -482,13 +693,10 @@ def ad_float_to_sample(handle, channel, range_, value):
                          number returned by libad4.dll
 
     """
-    ad_float_to_sample = libad4_dll.ad_float_to_sample
-    ad_float_to_sample.argtypes = [c_int32, c_int32, c_int32, c_float]
-    ad_float_to_sample.restype = c_int32
     data = c_uint32()
 
-    return_code = ad_float_to_sample(
-        handle, channel, range_, value, byref(data))
+    return_code = libad4_dll.ad_float_to_sample(
+        handle, channel, range_, value, data)
 
     if return_code:
         raise LibAD4Error(
@@ -516,13 +724,10 @@ def ad_float_to_sample64(handle, channel, range_, value):
                          number returned by libad4.dll
 
     """
-    ad_float_to_sample64 = libad4_dll.ad_float_to_sample64
-    ad_float_to_sample64.argtypes = [c_int32, c_int32, c_uint64, c_double]
-    ad_float_to_sample64.restype = c_int32
     data = c_uint64()
 
-    return_code = ad_float_to_sample64(
-        handle, channel, range_, value, byref(data))
+    return_code = libad4_dll.ad_float_to_sample64(
+        handle, channel, range_, value, data)
 
     if return_code:
         raise LibAD4Error(
@@ -551,13 +756,10 @@ def ad_analog_in(handle, channel, range_):
                          number returned by libad4.dll
 
     """
-    ad_analog_in = libad4_dll.ad_analog_in
-    ad_analog_in.argtypes = [c_int32, c_int32, c_int32]
-    ad_analog_in.restype = c_int32
     float_value = c_float()
 
-    return_code = ad_analog_in(
-        handle, channel, range_, byref(float_value))
+    return_code = libad4_dll.ad_analog_in(
+        handle, channel, range_, float_value)
 
     if return_code:
         raise LibAD4Error(
@@ -588,11 +790,7 @@ def ad_analog_out(handle, channel, range_, value):
                          number returned by libad4.dll
 
     """
-    ad_analog_out = libad4_dll.ad_analog_out
-    ad_analog_out.argtypes = [c_int32, c_int32, c_int32, c_float]
-    ad_analog_out.restype = c_int32
-
-    return_code = ad_analog_out(handle, channel, range_, value)
+    return_code = libad4_dll.ad_analog_out(handle, channel, range_, value)
 
     if return_code:
         raise LibAD4Error(
@@ -619,12 +817,9 @@ def ad_digital_in(handle, channel):
                          number returned by libad4.dll
 
     """
-    ad_digital_in = libad4_dll.ad_digital_in
-    ad_digital_in.argtypes = [c_int32, c_int32]
-    ad_digital_in.restype = c_int32
     data = c_uint32()
 
-    return_code = ad_digital_in(handle, channel, byref(data))
+    return_code = libad4_dll.ad_digital_in(handle, channel, data)
 
     if return_code:
         raise LibAD4Error(
@@ -650,11 +845,7 @@ def ad_digital_out(handle, channel, data):
     :raises LibAD4Error: if an error occured, error_code contains the error
                          number returned by libad4.dll
     """
-    ad_digital_out = libad4_dll.ad_digital_out
-    ad_digital_out.argtypes = [c_int32, c_int32, c_uint32]
-    ad_digital_out.restype = c_int32
-
-    return_code = ad_digital_out(handle, channel, data)
+    return_code = libad4_dll.ad_digital_out(handle, channel, data)
 
     if return_code:
         raise LibAD4Error(
@@ -681,11 +872,8 @@ def ad_set_digital_line(handle, channel, line, flag):
                          number returned by libad4.dll
 
     """
-    ad_set_digital_line = libad4_dll.ad_set_digital_line
-    ad_set_digital_line.argtypes = [c_int32, c_int32, c_int32, c_uint32]
-    ad_set_digital_line.restype = c_int32
-
-    return_code = ad_set_digital_line(handle, channel, line, 1 if flag else 0)
+    return_code = libad4_dll.ad_set_digital_line(handle, channel, line,
+                                                 1 if flag else 0)
 
     if return_code:
         raise LibAD4Error(
@@ -713,12 +901,9 @@ def ad_get_digital_line(handle, channel, line):
                          number returned by libad4.dll
 
     """
-    ad_get_digital_line = libad4_dll.ad_get_digital_line
-    ad_get_digital_line.argtypes = [c_int32, c_int32, c_int32]
-    ad_get_digital_line.restype = c_int32
     flag = c_uint32()
 
-    return_code = ad_get_digital_line(handle, channel, line, byref(flag))
+    return_code = libad4_dll.ad_get_digital_line(handle, channel, line, flag)
 
     if return_code:
         raise LibAD4Error(
@@ -749,12 +934,9 @@ def ad_get_line_direction(handle, channel):
                         number returned by libad4.dll
 
     """
-    ad_get_line_direction = libad4_dll.ad_get_line_direction
-    ad_get_line_direction.argtypes = [c_int32, c_int32]
-    ad_get_line_direction.restype = c_int32
     mask = c_uint32()
 
-    return_code = ad_get_line_direction(handle, channel, byref(mask))
+    return_code = libad4_dll.ad_get_line_direction(handle, channel, mask)
 
     if return_code:
         raise LibAD4Error(
@@ -788,11 +970,7 @@ def ad_set_line_direction(handle, channel, mask):
     output.
 
     """
-    ad_set_line_direction = libad4_dll.ad_set_line_direction
-    ad_set_line_direction.argtypes = [c_int32, c_int32, c_int32]
-    ad_set_line_direction.restype = c_int32
-
-    return_code = ad_set_line_direction(handle, channel, mask)
+    return_code = libad4_dll.ad_set_line_direction(handle, channel, mask)
 
     if return_code:
         raise LibAD4Error(
@@ -810,10 +988,7 @@ def ad_get_version():
     Return version of *LIBAD4.dll*.
 
     """
-    ad_get_version = libad4_dll.ad_get_version
-    ad_get_version.restype = c_uint32
-
-    res = ad_get_version()
+    res = libad4_dll.ad_get_version()
 
     return res
 
@@ -827,12 +1002,9 @@ def ad_get_drv_version(handle):
                         number returned by libad4.dll
 
     """
-    ad_get_drv_version = libad4_dll.ad_get_drv_version
-    ad_get_drv_version.argtypes = [c_int32]
-    ad_get_drv_version.restype = c_int32
     vers = c_uint32()
 
-    return_code = ad_get_drv_version(handle, byref(vers))
+    return_code = libad4_dll.ad_get_drv_version(handle, vers)
 
     if return_code:
         raise LibAD4Error(
@@ -867,14 +1039,10 @@ def ad_get_product_info(handle, id_=0):
                         number returned by libad4.dll
 
     """
-    ad_get_product_info = libad4_dll.ad_get_product_info
-    ad_get_product_info.argtypes = [c_int32, c_int, POINTER(SADProductInfo),
-                                    c_int32]
-    ad_get_product_info.restype = c_int32
     product_info = SADProductInfo()
 
-    return_code = ad_get_product_info(handle, id_, product_info,
-                                      sizeof(product_info))
+    return_code = libad4_dll.ad_get_product_info(handle, id_, product_info,
+                                                 sizeof(product_info))
 
     if return_code:
         raise LibAD4Error(
@@ -888,6 +1056,124 @@ def ad_get_product_info(handle, id_=0):
     return product_info
 
 
+def ad_start_scan(handle, scan_desc, channel_descs):
+    """
+    Start a hardware timed scan of the channels described by
+    *channel_descs*. The samples are fetched run by run with
+    :func:`ad_get_next_run`, the scan is ended by :func:`ad_stop_scan`.
+
+    :param int handle: device-handle
+    :param SADScanDesc scan_desc: scan description, *sample_rate* is given
+                                  as interval in seconds; the library fills
+                                  in *ticks_per_run*, *bytes_per_run* and
+                                  *samples_per_run*
+    :param channel_descs: ctypes array of :class:`SADScanChaDesc`, one
+                          element per scanned channel
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    return_code = libad4_dll.ad_start_scan(handle, scan_desc,
+                                           len(channel_descs), channel_descs)
+
+    if return_code:
+        raise LibAD4Error(
+            'Error calling function ad_start_scan('
+            '{handle}, {count}), returncode: {return_code}'
+            .format(
+                handle=handle, count=len(channel_descs),
+                return_code=return_code
+            ), return_code
+        )
+
+
+def ad_get_next_run(handle, state, buffer):
+    """
+    Wait for the next run of a scan and copy its samples into *buffer*.
+
+    :param int handle: device-handle
+    :param SADScanState state: scan state, filled by the library
+    :param buffer: ctypes array or pointer with room for *bytes_per_run*
+                   bytes as returned by :func:`ad_start_scan`
+    :rtype: int
+    :return: number of the run
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    run = c_uint32()
+
+    return_code = libad4_dll.ad_get_next_run(handle, state, run, buffer)
+
+    if return_code:
+        raise LibAD4Error(
+            'Error calling function ad_get_next_run('
+            '{handle}), returncode: {return_code}'
+            .format(
+                handle=handle, return_code=return_code
+            ), return_code
+        )
+
+    return run.value
+
+
+def ad_poll_scan_state(handle):
+    """
+    Return the state of a running scan without waiting.
+
+    :param int handle: device-handle
+    :rtype: SADScanState
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    state = SADScanState()
+
+    return_code = libad4_dll.ad_poll_scan_state(handle, state)
+
+    if return_code:
+        raise LibAD4Error(
+            'Error calling function ad_poll_scan_state('
+            '{handle}), returncode: {return_code}'
+            .format(
+                handle=handle, return_code=return_code
+            ), return_code
+        )
+
+    return state
+
+
+def ad_stop_scan(handle):
+    """
+    Stop a scan started by :func:`ad_start_scan`.
+
+    :param int handle: device-handle
+    :rtype: int
+    :return: result code of the scan
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    result = c_int32()
+
+    return_code = libad4_dll.ad_stop_scan(handle, result)
+
+    if return_code:
+        raise LibAD4Error(
+            'Error calling function ad_stop_scan('
+            '{handle}), returncode: {return_code}'
+            .format(
+                handle=handle, return_code=return_code
+            ), return_code
+        )
+
+    return result.value
+
+
 if __name__ == '__main__':  # pragma: no cover
     handle = ad_open('memadfpusb')
     data = ad_get_product_info(handle)
@@ -0,0 +1,155 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Coalesced writes of the outputs of a device.
+
+A sequencer writing every output in every cycle issues one library call per
+output, even if nothing has changed. The :class:`OutputManager` caches the
+raw value last written per channel and range, drops writes which wouldn't
+change an output and writes the remaining outputs of a cycle with one
+:func:`ad_discrete_outv` call::
+
+    >>> outputs = OutputManager(handle)
+    >>> while True:
+    ...     outputs.set_voltage(AD_CHA_TYPE_ANALOG_OUT | 1, setpoint)
+    ...     outputs.set(AD_CHA_TYPE_DIGITAL_IO | 1, word)
+    ...     outputs.flush()
+    >>> outputs.stats()
+    {'requested': 2000, 'written': 310, 'saved': 1690, 'calls': 180}
+
+The cache assumes that the outputs are only written through the manager.
+Call :meth:`OutputManager.invalidate` after writing them otherwise.
+
+"""
+from .convert import info_to_samples
+from .libad4 import ad_get_range_info, ad_discrete_outv
+
+
+class OutputManager(object):
+    """
+    Coalesces the writes to the outputs of a device.
+
+    :param int handle: device-handle
+
+    :ivar dict committed: raw value last written by (channel, range)
+    :ivar dict pending: raw value to be written by the next :meth:`flush`
+                        by (channel, range)
+    :ivar int requested: count of values set
+    :ivar int written: count of values written to the device
+    :ivar int calls: count of library calls
+
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.committed = {}
+        self.pending = {}
+        self.reset_stats()
+
+    def __repr__(self):
+        return '<OutputManager handle={} outputs={} pending={}>'.format(
+            self.handle, len(self.committed), len(self.pending))
+
+    def reset_stats(self):
+        """
+        Reset the counters.
+
+        """
+        self.requested = 0
+        self.written = 0
+        self.calls = 0
+
+    @property
+    def saved(self):
+        """
+        Count of values which didn't need to be written.
+
+        """
+        return self.requested - self.written - len(self.pending)
+
+    def set(self, channel, data, range_=0):
+        """
+        Set the raw value *data* of the output *channel*, see
+        :func:`ad_discrete_out64`. The value is written by the next
+        :meth:`flush` if it differs from the value last written.
+
+        :param int channel: channel id including the channel type
+        :param int data: raw value
+        :param int range_: range number
+
+        """
+        self.requested += 1
+        key = (channel, range_)
+        if self.committed.get(key) == data:
+            self.pending.pop(key, None)
+        else:
+            self.pending[key] = data
+
+    def set_voltage(self, channel, value, range_=0):
+        """
+        Set the voltage *value* of the analog output *channel*. The value is
+        converted with the cached range information like
+        :func:`ad_float_to_sample` does.
+
+        :raises LibAD4Error: if the range information can't be fetched
+
+        """
+        info = ad_get_range_info(self.handle, channel, range_)
+        self.set(channel, int(info_to_samples(info, [value])[0]), range_)
+
+    def invalidate(self, channel=None, range_=0):
+        """
+        Forget the value last written to *channel*, or to all outputs if
+        *channel* is None, so the next value is written in any case.
+
+        """
+        if channel is None:
+            self.committed.clear()
+        else:
+            self.committed.pop((channel, range_), None)
+
+    def discard(self):
+        """
+        Discard the values set since the last :meth:`flush`.
+
+        """
+        self.pending.clear()
+
+    def flush(self):
+        """
+        Write the changed outputs with one :func:`ad_discrete_outv` call.
+        Nothing is written if no output has changed. If the call fails the
+        values are kept for the next flush.
+
+        :return: count of outputs written
+        :rtype: int
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        pending = self.pending
+        if not pending:
+            return 0
+
+        keys = list(pending)
+        data_list = [pending[key] for key in keys]
+        ad_discrete_outv(self.handle, [key[0] for key in keys],
+                         [key[1] for key in keys], data_list)
+        self.calls += 1
+        self.written += len(keys)
+        self.committed.update(pending)
+        pending.clear()
+        return len(keys)
+
+    def stats(self):
+        """
+        Return a dictionary with the counts of values requested, written and
+        saved and of the library calls.
+
+        """
+        return {'requested': self.requested, 'written': self.written,
+                'saved': self.saved, 'calls': self.calls}
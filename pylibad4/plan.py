@@ -0,0 +1,148 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Prepared multi-channel reads and writes.
+
+An :class:`AcquisitionPlan` compiles a channel list and a range list once into
+ctypes arrays, allocates the data buffer and binds :func:`ad_discrete_inv`
+and :func:`ad_discrete_outv` to these arguments. Executing the plan is a
+single foreign function call which doesn't create any Python objects, so
+control loops can read and write many channels without putting load on the
+memory allocator or the garbage collector::
+
+    >>> plan = AcquisitionPlan(handle, [AD_CHA_TYPE_ANALOG_IN | i
+    ...                                 for i in range(1, 17)])
+    >>> out = numpy.empty(16, dtype=numpy.uint64)
+    >>> while True:
+    ...     plan.read(out)
+
+"""
+from ctypes import CDLL, c_int32, c_uint64
+from functools import partial
+import numpy
+from . import libad4
+from .arrays import compile_channels
+from .cffi_library import CffiLibrary
+from .libad4 import LibAD4Error
+
+
+class AcquisitionPlan(object):
+    """
+    Fixed set of channels which is read or written with one library call.
+
+    The library functions are bound from the backend active when the plan is
+    created (see :func:`pylibad4.libad4.set_backend`).
+
+    :param int handle: device-handle
+    :param [int] channel_list: list of channels
+    :param [int] range_list: list of the used range numbers, defaults to
+                             range 0 for all channels
+
+    :ivar int handle: device-handle
+    :ivar int count: count of channels
+    :ivar numpy.ndarray data: uint64 array with one sample per channel, the
+                              library reads into and writes from its memory
+
+    :raises ValueError: if the lists differ in length
+
+    """
+
+    def __init__(self, handle, channel_list, range_list=None):
+        if range_list is None:
+            range_list = [0] * len(channel_list)
+        self.handle = handle
+        self.count = len(channel_list)
+        self._channels, self._ranges = compile_channels(channel_list,
+                                                        range_list)
+        self.data = numpy.zeros(self.count, dtype=numpy.uint64)
+        self._data = (c_uint64 * self.count).from_buffer(self.data)
+
+        library = libad4.load_library()
+        args = (handle, self.count, self._channels, self._ranges, self._data)
+        if isinstance(library, CffiLibrary):
+            self._read = library.bind('ad_discrete_inv', *args)
+            self._write = library.bind('ad_discrete_outv', *args)
+            return
+        if isinstance(library, CDLL):
+            # converted once instead of on every call
+            args = (c_int32(handle), c_int32(self.count)) + args[2:]
+        self._read = partial(library.ad_discrete_inv, *args)
+        self._write = partial(library.ad_discrete_outv, *args)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '<AcquisitionPlan handle={} channels={}>'.format(
+            self.handle, self.count)
+
+    @property
+    def channels(self):
+        """
+        List of the channels of the plan.
+
+        """
+        return list(self._channels)
+
+    @property
+    def ranges(self):
+        """
+        List of the range numbers of the plan.
+
+        """
+        return list(self._ranges)
+
+    def _error(self, name, return_code):
+        return LibAD4Error(
+            'Error calling function {name}({handle}, {count}, {channel_list}, '
+            '{range_list}), returncode: {return_code}'.format(
+                name=name, handle=self.handle, count=self.count,
+                channel_list=self.channels, range_list=self.ranges,
+                return_code=return_code
+            ), return_code
+        )
+
+    def read(self, out=None):
+        """
+        Read all channels of the plan, see :func:`ad_discrete_inv`.
+
+        :param numpy.ndarray out: array of :attr:`count` elements receiving
+                                  the samples; if None :attr:`data` is
+                                  returned, which is overwritten by the next
+                                  call
+        :rtype: numpy.ndarray
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        return_code = self._read()
+        if return_code:
+            raise self._error('ad_discrete_inv', return_code)
+
+        if out is None:
+            return self.data
+        numpy.copyto(out, self.data, casting='unsafe')
+        return out
+
+    def write(self, values=None):
+        """
+        Write all channels of the plan, see :func:`ad_discrete_outv`.
+
+        :param values: array-like of :attr:`count` raw values; if None the
+                       current content of :attr:`data` is written. Passing a
+                       NumPy array avoids the conversion of a Python sequence.
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        if values is not None:
+            numpy.copyto(self.data, values, casting='unsafe')
+
+        return_code = self._write()
+        if return_code:
+            raise self._error('ad_discrete_outv', return_code)
@@ -0,0 +1,106 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-10
+
+Function prototypes of the LIBAD4 entry points.
+
+The prototypes are applied once to the foreign functions of a loaded library
+by :func:`bind_prototypes`, so the wrappers in :mod:`pylibad4.libad4` don't
+need to assign *argtypes* and *restype* on every call.
+
+"""
+from ctypes import c_char_p, c_int32, c_uint32, c_float, c_uint64, \
+    c_double, c_int, c_void_p, POINTER
+from .types import SADRangeInfo, SADProductInfo, SADScanDesc, \
+    SADScanChaDesc, SADScanState
+
+
+#: mapping of entry point name to a tuple (argtypes, restype)
+PROTOTYPES = {
+    'ad_open': ([c_char_p], c_int32),
+    'ad_close': ([c_int32], c_int32),
+    'ad_get_range_count': (
+        [c_int32, c_int32, POINTER(c_int32)], c_int32),
+    'ad_get_range_info': (
+        [c_int32, c_int32, c_int32, POINTER(SADRangeInfo)], c_int32),
+    'ad_discrete_in': (
+        [c_int32, c_int32, c_int32, POINTER(c_uint32)], c_int32),
+    'ad_discrete_in64': (
+        [c_int32, c_int32, c_uint64, POINTER(c_uint64)], c_int32),
+    'ad_discrete_inv': (
+        [c_int32, c_int32, POINTER(c_int32), POINTER(c_int32),
+         POINTER(c_uint64)], c_int32),
+    'ad_discrete_out': (
+        [c_int32, c_int32, c_int32, c_uint32], c_int32),
+    'ad_discrete_out64': (
+        [c_int32, c_int32, c_uint64, c_uint64], c_int32),
+    'ad_discrete_outv': (
+        [c_int32, c_int32, POINTER(c_int32), POINTER(c_int32),
+         POINTER(c_uint64)], c_int32),
+    'ad_sample_to_float': (
+        [c_int32, c_int32, c_int32, c_uint32, POINTER(c_float)], c_int32),
+    'ad_sample_to_float64': (
+        [c_int32, c_int32, c_uint64, c_uint64, POINTER(c_double)], c_int32),
+    'ad_float_to_sample': (
+        [c_int32, c_int32, c_int32, c_float, POINTER(c_uint32)], c_int32),
+    'ad_float_to_sample64': (
+        [c_int32, c_int32, c_uint64, c_double, POINTER(c_uint64)], c_int32),
+    'ad_analog_in': (
+        [c_int32, c_int32, c_int32, POINTER(c_float)], c_int32),
+    'ad_analog_out': (
+        [c_int32, c_int32, c_int32, c_float], c_int32),
+    'ad_digital_in': (
+        [c_int32, c_int32, POINTER(c_uint32)], c_int32),
+    'ad_digital_out': (
+        [c_int32, c_int32, c_uint32], c_int32),
+    'ad_set_digital_line': (
+        [c_int32, c_int32, c_int32, c_uint32], c_int32),
+    'ad_get_digital_line': (
+        [c_int32, c_int32, c_int32, POINTER(c_uint32)], c_int32),
+    'ad_get_line_direction': (
+        [c_int32, c_int32, POINTER(c_uint32)], c_int32),
+    'ad_set_line_direction': (
+        [c_int32, c_int32, c_uint32], c_int32),
+    'ad_get_version': ([], c_uint32),
+    'ad_get_drv_version': (
+        [c_int32, POINTER(c_uint32)], c_int32),
+    'ad_get_product_info': (
+        [c_int32, c_int, POINTER(SADProductInfo), c_int32], c_int32),
+    'ad_start_scan': (
+        [c_int32, POINTER(SADScanDesc), c_uint32, POINTER(SADScanChaDesc)],
+        c_int32),
+    'ad_get_next_run': (
+        [c_int32, POINTER(SADScanState), POINTER(c_uint32), c_void_p],
+        c_int32),
+    'ad_poll_scan_state': (
+        [c_int32, POINTER(SADScanState)], c_int32),
+    'ad_stop_scan': (
+        [c_int32, POINTER(c_int32)], c_int32),
+}
+
+
+def bind_prototypes(dll, prototypes=PROTOTYPES):
+    """
+    Resolve the LIBAD4 entry points of *dll* and set their prototypes.
+
+    The foreign function objects are cached by the library object, so all
+    later attribute accesses return the already typed functions. Entry points
+    missing in the library (e.g. older LIBAD4 versions) are skipped and
+    raise an AttributeError when they are used.
+
+    :param ctypes.CDLL dll: loaded library
+    :param dict prototypes: mapping of entry point name to argtypes, restype
+    :return: the library passed as *dll*
+
+    """
+    for name, (argtypes, restype) in prototypes.items():
+        try:
+            func = getattr(dll, name)
+        except AttributeError:
+            continue
+        func.argtypes = argtypes
+        func.restype = restype
+
+    return dll
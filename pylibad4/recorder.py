@@ -0,0 +1,376 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Recording of raw samples into memory-mapped files.
+
+A :class:`Recorder` appends blocks of raw samples to a file which is mapped
+into memory, so storing a block is a copy into the mapping. The file is
+preallocated and grows by doubling its size when it is full. Recordings are
+opened with :func:`open_recording` without reading or parsing the data, so
+even recordings of many gigabytes are available instantly::
+
+    >>> with Recorder('run.ad4', handle, channels) as recorder:
+    ...     for block in scan(handle, channels, samples_per_run=1000):
+    ...         recorder.append(block)
+    >>> rec = open_recording('run.ad4')
+    >>> volts = rec.voltages()
+
+File layout, all values little endian:
+
+* header (:data:`HEADER_DTYPE`)
+* one entry of :data:`CHANNEL_DTYPE` per channel with the channel id, range
+  number and the :class:`SADRangeInfo` of the range
+* padding up to the next multiple of :data:`ALIGNMENT`
+* block records: timestamp (float64, :func:`time.time`), count of valid
+  samples (uint64) and the samples, an array of shape
+  (block_size, channels)
+
+"""
+import time
+import numpy
+from .libad4 import ad_get_range_info
+
+
+MAGIC = b'PYLIBAD4'
+VERSION = 1
+ALIGNMENT = 4096
+
+#: file header
+HEADER_DTYPE = numpy.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('channels', '<u4'),
+    ('block_size', '<u4'),
+    ('sample_type', 'S8'),
+    ('blocks', '<u8'),
+    ('data_offset', '<u8'),
+])
+
+#: channel information following the header
+CHANNEL_DTYPE = numpy.dtype([
+    ('channel', '<i4'),
+    ('range', '<i4'),
+    ('min', '<f8'),
+    ('max', '<f8'),
+    ('res', '<f8'),
+    ('bps', '<i4'),
+    ('unit', 'S24'),
+])
+
+
+def channel_table(handle, channel_list, range_list):
+    """
+    Return an array of :data:`CHANNEL_DTYPE` with the channel ids, range
+    numbers and the range information fetched from the device.
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+    table = numpy.zeros(len(channel_list), dtype=CHANNEL_DTYPE)
+    for entry, channel, range_ in zip(table, channel_list, range_list):
+        info = ad_get_range_info(handle, channel, range_)
+        entry['channel'] = channel
+        entry['range'] = range_
+        entry['min'] = info.min
+        entry['max'] = info.max
+        entry['res'] = info.res
+        entry['bps'] = info.bps
+        entry['unit'] = info.unit
+    return table
+
+
+def record_dtype(sample_type, block_size, channels):
+    """
+    Return the type of a block record.
+
+    """
+    return numpy.dtype([
+        ('timestamp', '<f8'),
+        ('count', '<u8'),
+        ('data', numpy.dtype(sample_type).newbyteorder('<'),
+         (block_size, channels)),
+    ])
+
+
+class Recorder(object):
+    """
+    Append blocks of raw samples to the file *path*, an existing file is
+    overwritten.
+
+    The range information of the channels is fetched once on creation and
+    stored in the file. The file is closed by :meth:`close` or when leaving a
+    with-block.
+
+    :param str path: file name
+    :param int handle: device-handle
+    :param [int] channel_list: list of channels
+    :param [int] range_list: list of the used range numbers, defaults to
+                             range 0 for all channels
+    :param dtype: type of the raw samples, e.g. uint64 for
+                  :func:`ad_discrete_inv` or the type of a scan
+    :param int block_size: maximum count of samples per block
+    :param int capacity: count of blocks to preallocate
+
+    :ivar int blocks: count of blocks written
+
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+
+    def __init__(self, path, handle, channel_list, range_list=None,
+                 dtype=numpy.uint64, block_size=1, capacity=1024):
+        if range_list is None:
+            range_list = [0] * len(channel_list)
+        if len(channel_list) != len(range_list):
+            raise ValueError('range_list and channel_list need to have the '
+                             'same length')
+
+        self.path = path
+        self.block_size = block_size
+        self.channels = len(channel_list)
+        self.blocks = 0
+
+        channels = channel_table(handle, channel_list, range_list)
+        size = HEADER_DTYPE.itemsize + channels.nbytes
+        self._offset = -(-size // ALIGNMENT) * ALIGNMENT
+        self._dtype = record_dtype(dtype, block_size, self.channels)
+
+        header = numpy.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['channels'] = self.channels
+        header['block_size'] = block_size
+        header['sample_type'] = self._dtype['data'].base.str
+        header['data_offset'] = self._offset
+
+        with open(path, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(channels.tobytes())
+
+        self._header = numpy.memmap(path, dtype=HEADER_DTYPE, mode='r+',
+                                    shape=(1,))
+        self._map(capacity)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def capacity(self):
+        """
+        Count of blocks the file can hold before it has to grow.
+
+        """
+        return len(self._records)
+
+    @property
+    def closed(self):
+        """
+        True if the file has been closed.
+
+        """
+        return self._records is None
+
+    def _map(self, capacity):
+        with open(self.path, 'r+b') as f:
+            f.truncate(self._offset + capacity * self._dtype.itemsize)
+        self._records = numpy.memmap(self.path, dtype=self._dtype, mode='r+',
+                                     offset=self._offset, shape=(capacity,))
+
+    def _grow(self):
+        capacity = 2 * self.capacity
+        self._records.flush()
+        self._records = None
+        self._map(capacity)
+
+    def reserve(self):
+        """
+        Return the sample array of the next block, which can be filled in
+        place and is stored by :meth:`commit`. The array is only valid until
+        the next call of :meth:`commit` or :meth:`append`.
+
+        :rtype: numpy.ndarray
+        :return: array of shape (block_size, channels)
+
+        """
+        if self.blocks == self.capacity:
+            self._grow()
+        return self._records[self.blocks]['data']
+
+    def commit(self, count=None, timestamp=None):
+        """
+        Store the block filled after :meth:`reserve`.
+
+        :param int count: count of valid samples, defaults to block_size
+        :param float timestamp: time of the block, defaults to the current
+                                time (:func:`time.time`)
+
+        """
+        record = self._records[self.blocks]
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['count'] = self.block_size if count is None else count
+        self.blocks += 1
+        self._header['blocks'] = self.blocks
+
+    def append(self, block, timestamp=None):
+        """
+        Append a block of samples.
+
+        :param numpy.ndarray block: array of shape (samples, channels) with
+                                    at most block_size samples, or a single
+                                    sample with one value per channel
+        :param float timestamp: time of the block, defaults to the current
+                                time (:func:`time.time`)
+
+        :raises ValueError: if the block has more than block_size samples
+
+        """
+        block = numpy.asarray(block)
+        if block.ndim == 1:
+            block = block[None, :]
+        count = len(block)
+        if count > self.block_size:
+            raise ValueError('block exceeds the block size of {}'
+                             .format(self.block_size))
+        self.reserve()[:count] = block
+        self.commit(count, timestamp)
+
+    def flush(self):
+        """
+        Write the mapped data to the file.
+
+        """
+        self._records.flush()
+        self._header.flush()
+
+    def close(self, trim=True):
+        """
+        Flush and close the file, calling it multiple times has no effect.
+
+        :param bool trim: cut off the preallocated space behind the last
+                          block
+
+        """
+        if self.closed:
+            return
+        self.flush()
+        self._records = None
+        self._header = None
+        if trim:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._offset + self.blocks * self._dtype.itemsize)
+
+
+class Recording(object):
+    """
+    Recording opened by :func:`open_recording`.
+
+    :ivar numpy.ndarray channels: array of :data:`CHANNEL_DTYPE` with the
+                                  channel ids and range information
+    :ivar numpy.memmap records: the block records
+    :ivar int block_size: maximum count of samples per block
+
+    """
+
+    def __init__(self, header, channels, records):
+        self.block_size = int(header['block_size'])
+        self.channels = channels
+        self.records = records
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    @property
+    def timestamps(self):
+        """
+        Timestamps of the blocks.
+
+        """
+        return self.records['timestamp']
+
+    @property
+    def counts(self):
+        """
+        Count of valid samples of each block.
+
+        """
+        return self.records['count']
+
+    def block(self, index):
+        """
+        Return the valid samples of block *index* without copying them.
+
+        :rtype: numpy.ndarray
+
+        """
+        record = self.records[index]
+        return record['data'][:int(record['count'])]
+
+    def samples(self):
+        """
+        Return the valid samples of all blocks as one array of shape
+        (samples, channels).
+
+        :rtype: numpy.ndarray
+
+        """
+        data = self.records['data']
+        if (self.counts == self.block_size).all():
+            return data.reshape(-1, len(self.channels))
+        return numpy.concatenate(
+            [self.block(i) for i in range(len(self.records))])
+
+    def voltages(self, dtype=numpy.float32):
+        """
+        Return the samples of all blocks converted into voltage values with
+        the stored range information, see
+        :func:`pylibad4.convert.info_to_float`.
+
+        :rtype: numpy.ndarray
+
+        """
+        values = numpy.multiply(self.samples(), self.channels['res'],
+                                dtype=numpy.float64)
+        values += self.channels['min']
+        return values if dtype == numpy.float64 else values.astype(dtype)
+
+
+def open_recording(path, mode='r'):
+    """
+    Open a file written by :class:`Recorder`. The blocks are mapped into
+    memory, no data is read until it is accessed.
+
+    :param str path: file name
+    :param str mode: mode of :class:`numpy.memmap`, 'r' for read-only access
+    :rtype: Recording
+
+    :raises ValueError: if the file isn't a recording
+
+    """
+    header = numpy.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header['magic'][0] != MAGIC:
+        raise ValueError('{} is no recording'.format(path))
+    header = header[0]
+    if header['version'] > VERSION:
+        raise ValueError('unsupported recording version {}'
+                         .format(header['version']))
+
+    channels = numpy.fromfile(path, dtype=CHANNEL_DTYPE,
+                              count=int(header['channels']),
+                              offset=HEADER_DTYPE.itemsize)
+    dtype = record_dtype(header['sample_type'].decode(),
+                         int(header['block_size']), int(header['channels']))
+    blocks = int(header['blocks'])
+
+    if blocks:
+        records = numpy.memmap(path, dtype=dtype, mode=mode,
+                               offset=int(header['data_offset']),
+                               shape=(blocks,))
+    else:
+        records = numpy.zeros(0, dtype=dtype)
+    return Recording(header, channels, records)
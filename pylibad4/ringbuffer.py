@@ -0,0 +1,323 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+Fixed capacity ring buffer for acquired samples.
+
+The buffer is a NumPy array with one row per sample and one column per
+channel, the same layout as the blocks of :mod:`pylibad4.scan` and the data
+of :class:`pylibad4.plan.AcquisitionPlan`. One thread writes, any number of
+threads read. The library can fill the buffer directly::
+
+    >>> ring = RingBuffer(len(plan), 100000)
+    >>> while True:
+    ...     plan.read(ring.reserve(1))
+    ...     ring.commit(1)
+
+Consumers either look at the newest samples with :meth:`RingBuffer.
+read_latest` or get every sample exactly once through their own
+:class:`Reader`::
+
+    >>> reader = ring.reader()
+    >>> block = reader.read()
+
+The writer works like a seqlock: before copying it publishes the count of
+samples it is writing, after copying it increments the count of samples
+written. Readers copy the samples and check afterwards whether the writer
+has started to overwrite any of them. So neither side takes a lock, unless
+the buffer uses the :data:`BLOCK` policy, where the writer waits for the
+slowest reader.
+
+"""
+import threading
+import weakref
+import numpy
+
+
+#: the writer overwrites the oldest samples, slow readers lose samples
+OVERWRITE = 'overwrite'
+
+#: the writer waits until all readers have read the samples to overwrite
+BLOCK = 'block'
+
+
+class BufferFull(Exception):
+    """
+    Raised if a :data:`BLOCK` buffer didn't get free in time.
+
+    """
+
+
+class RingBuffer(object):
+    """
+    Ring buffer of *capacity* samples of *channels* channels.
+
+    :param int channels: count of channels (columns)
+    :param int capacity: count of samples (rows) the buffer holds
+    :param dtype: type of the samples, e.g. uint64 for raw samples of
+                  :func:`ad_discrete_inv` or float32 for voltage values
+    :param str policy: :data:`OVERWRITE` or :data:`BLOCK`
+
+    :ivar int channels: count of channels
+    :ivar int capacity: count of samples the buffer holds
+    :ivar str policy: behaviour of a full buffer
+
+    """
+
+    def __init__(self, channels, capacity, dtype=numpy.uint64,
+                 policy=OVERWRITE):
+        if policy not in (OVERWRITE, BLOCK):
+            raise ValueError('unknown policy {!r}'.format(policy))
+        self.channels = channels
+        self.capacity = capacity
+        self.policy = policy
+        self._data = numpy.zeros((capacity, channels), dtype=dtype)
+        self._written = 0
+        # written + the rows the writer is filling, published before the
+        # rows are touched, readers validate their copies against it
+        self._writing = 0
+        self._readers = weakref.WeakSet()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def __repr__(self):
+        return '<RingBuffer {}x{} {} {}/{}>'.format(
+            self.capacity, self.channels, self.dtype, len(self),
+            self.capacity)
+
+    @property
+    def dtype(self):
+        """
+        Type of the samples.
+
+        """
+        return self._data.dtype
+
+    @property
+    def written(self):
+        """
+        Total count of samples written to the buffer.
+
+        """
+        return self._written
+
+    def reader(self):
+        """
+        Return a new reader starting at the next sample written.
+
+        :rtype: Reader
+
+        """
+        reader = Reader(self, self._written)
+        self._readers.add(reader)
+        return reader
+
+    def _free(self):
+        # count of rows the writer can fill without losing unread samples
+        positions = [r.position for r in list(self._readers)]
+        if self.policy == OVERWRITE or not positions:
+            return self.capacity
+        return self.capacity - (self._written - min(positions))
+
+    def _wait_free(self, count, timeout):
+        if self.policy == OVERWRITE or self._free() >= count:
+            return
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._free() >= count,
+                                            timeout):
+                raise BufferFull('no space for {} samples within {} s'
+                                 .format(count, timeout))
+
+    def reserve(self, count=1, timeout=None):
+        """
+        Return a view on the next rows of the buffer, which can be filled in
+        place (e.g. by :meth:`AcquisitionPlan.read`) and are made visible to
+        the readers by :meth:`commit`.
+
+        The view ends at the end of the buffer, so it may have less than
+        *count* rows. For a single row a 1d array is returned.
+
+        :param int count: count of rows to fill
+        :param float timeout: maximum time to wait for free rows with the
+                              :data:`BLOCK` policy, None waits forever
+        :rtype: numpy.ndarray
+
+        :raises BufferFull: if the rows didn't get free within *timeout*
+
+        """
+        if count > self.capacity:
+            raise ValueError('count exceeds the capacity of {}'
+                             .format(self.capacity))
+        self._wait_free(count, timeout)
+        start = self._written % self.capacity
+        stop = min(start + count, self.capacity)
+        # the readers must not use the rows from now on
+        self._writing = self._written + stop - start
+        if count == 1:
+            return self._data[start]
+        return self._data[start:stop]
+
+    def commit(self, count=1):
+        """
+        Make *count* rows filled after :meth:`reserve` visible to the
+        readers.
+
+        """
+        self._written += count
+        self._writing = max(self._writing, self._written)
+
+    def push(self, sample, timeout=None):
+        """
+        Append a single sample.
+
+        :param sample: array-like of :attr:`channels` values
+        :param float timeout: see :meth:`reserve`
+
+        :raises BufferFull: if the buffer didn't get free within *timeout*
+
+        """
+        self._wait_free(1, timeout)
+        self._writing = self._written + 1
+        self._data[self._written % self.capacity] = sample
+        self._written += 1
+
+    def push_block(self, block, timeout=None):
+        """
+        Append a block of samples with one row per sample. With the
+        :data:`OVERWRITE` policy only the last :attr:`capacity` rows of a
+        larger block are kept.
+
+        :param numpy.ndarray block: array of shape (samples, channels)
+        :param float timeout: see :meth:`reserve`
+
+        :raises BufferFull: if the buffer didn't get free within *timeout*
+        :raises ValueError: if the block exceeds the capacity of a
+                            :data:`BLOCK` buffer
+
+        """
+        count = len(block)
+        skip = max(0, count - self.capacity)
+        if skip:
+            if self.policy == BLOCK:
+                raise ValueError('block exceeds the capacity of {}'
+                                 .format(self.capacity))
+            block = block[skip:]
+
+        size = count - skip
+        self._wait_free(size, timeout)
+        self._writing = self._written + count
+        start = (self._written + skip) % self.capacity
+        first = min(size, self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        self._data[:size - first] = block[first:]
+        self._written += count
+
+    def _copy(self, start, count, out):
+        # copy the samples [start, start + count) in at most two slices
+        begin = start % self.capacity
+        first = min(count, self.capacity - begin)
+        out[:first] = self._data[begin:begin + first]
+        out[first:count] = self._data[:count - first]
+
+    def read_latest(self, count, out=None):
+        """
+        Return a copy of the newest *count* samples, oldest first. If the
+        buffer holds less samples, all of them are returned. Rows reserved
+        by the writer but not committed yet aren't valid samples any more.
+
+        :param int count: count of samples
+        :param numpy.ndarray out: array of at least *count* rows receiving
+                                  the samples
+        :rtype: numpy.ndarray
+        :return: array of the samples, a view on *out* if given
+
+        """
+        while True:
+            written = self._written
+            # rows being filled by the writer don't hold valid samples
+            oldest = max(0, self._writing - self.capacity)
+            size = max(0, min(count, written - oldest))
+            rows = out if out is not None else \
+                numpy.empty((size, self.channels), dtype=self.dtype)
+            self._copy(written - size, size, rows)
+            # the writer may have started overwriting rows while copying
+            if self._writing - self.capacity <= written - size:
+                return rows[:size]
+
+    def _notify(self):
+        # wake up a writer waiting for free rows
+        if self.policy == BLOCK:
+            with self._condition:
+                self._condition.notify_all()
+
+
+class Reader(object):
+    """
+    Cursor returning each sample of a :class:`RingBuffer` once.
+
+    Create readers with :meth:`RingBuffer.reader`.
+
+    :ivar int position: count of samples written before the next sample of
+                        this reader
+    :ivar int lost: count of samples overwritten before they were read
+
+    """
+
+    def __init__(self, buffer, position):
+        self.buffer = buffer
+        self.position = position
+        self.lost = 0
+
+    @property
+    def available(self):
+        """
+        Count of samples which can be read.
+
+        """
+        return min(self.buffer.written - self.position,
+                   self.buffer.capacity)
+
+    def read(self, count=None, out=None):
+        """
+        Return the samples written since the last call, oldest first.
+
+        :param int count: maximum count of samples, all available samples if
+                          None
+        :param numpy.ndarray out: array receiving the samples, its length
+                                  limits the count as well
+        :rtype: numpy.ndarray
+        :return: array of the samples, a view on *out* if given
+
+        """
+        buffer = self.buffer
+        written = buffer.written
+        start = max(self.position, buffer._writing - buffer.capacity)
+        self.lost += start - self.position
+
+        count = max(0, written - start) if count is None \
+            else max(0, min(count, written - start))
+        if out is None:
+            out = numpy.empty((count, buffer.channels), dtype=buffer.dtype)
+        else:
+            count = min(count, len(out))
+        buffer._copy(start, count, out)
+
+        # drop rows the writer started to overwrite while copying
+        valid = buffer._writing - buffer.capacity
+        skip = min(max(0, valid - start), count)
+        self.lost += skip
+        self.position = start + count
+        buffer._notify()
+        return out[skip:count]
+
+    def close(self):
+        """
+        Detach the reader, so a :data:`BLOCK` buffer doesn't wait for it.
+
+        """
+        self.buffer._readers.discard(self)
+        self.buffer._notify()
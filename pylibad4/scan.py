@@ -0,0 +1,233 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Hardware timed acquisition with the LIBAD4 scan functions.
+
+In contrast to single reads with :func:`ad_discrete_inv` the sample timing of
+a scan is given by the clock of the measurement system. The samples are
+delivered in runs of a fixed size, each run is returned as NumPy array with
+one row per sample and one column per channel::
+
+    >>> channels = [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 2]
+    >>> for block in scan(handle, channels, sample_rate=10000.0,
+    ...                   samples_per_run=1000, runs=10):
+    ...     print(block.shape)
+    (1000, 2)
+
+"""
+from ctypes import c_uint16, c_uint32, c_uint64
+import numpy
+from .libad4 import ad_start_scan, ad_get_next_run, ad_poll_scan_state, \
+    ad_stop_scan
+from .types import SADScanDesc, SADScanChaDesc, SADScanState, \
+    AD_STORE_DISCRETE, AD_TRG_NONE
+
+
+# sample types by the size of a sample in bytes
+_SAMPLE_TYPES = {
+    2: (numpy.uint16, c_uint16),
+    4: (numpy.uint32, c_uint32),
+    8: (numpy.uint64, c_uint64),
+}
+
+
+class Scan(object):
+    """
+    Hardware timed scan of one or more channels.
+
+    The scan is started by :meth:`start` or when entering a with-block and
+    stopped by :meth:`stop` or when leaving the with-block.
+
+    :param int handle: device-handle
+    :param [int] channels: list of channel ids
+    :param [int] ranges: list of range numbers, defaults to range 0
+    :param float sample_rate: sample rate in Hz
+    :param int samples_per_run: count of samples per channel and run
+    :param int runs: count of runs to acquire, None for a continuous scan
+
+    :ivar numpy.dtype dtype: type of the raw samples, available after start
+    :ivar int run: number of the last run read, -1 before the first run
+
+    """
+
+    def __init__(self, handle, channels, ranges=None, sample_rate=1000.0,
+                 samples_per_run=1000, runs=None):
+        self.handle = handle
+        self.channels = list(channels)
+        self.ranges = [0] * len(self.channels) if ranges is None \
+            else list(ranges)
+        if len(self.channels) != len(self.ranges):
+            raise ValueError('ranges and channels need to have the same '
+                             'length')
+        self.sample_rate = sample_rate
+        self.samples_per_run = samples_per_run
+        self.runs = runs
+        self.scan_desc = None
+        self.dtype = None
+        self.run = -1
+        self.running = False
+        self._runs_read = 0
+        self._state = SADScanState()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __iter__(self):
+        return self.blocks()
+
+    def start(self):
+        """
+        Start the scan.
+
+        :raises LibAD4Error: if the scan couldn't be started
+        :raises ValueError: if the library reports a sample size other than
+                            2, 4 or 8 bytes, the scan is stopped again
+
+        """
+        channel_descs = (SADScanChaDesc * len(self.channels))()
+        for desc, channel, range_ in zip(channel_descs, self.channels,
+                                         self.ranges):
+            desc.cha = channel
+            desc.store = AD_STORE_DISCRETE
+            desc.ratio = 1
+            desc.trg_mode = AD_TRG_NONE
+            desc.range = range_
+
+        scan_desc = SADScanDesc()
+        scan_desc.sample_rate = 1.0 / self.sample_rate
+        scan_desc.ticks_per_run = self.samples_per_run
+        scan_desc.posthist = (self.runs or 0) * self.samples_per_run
+
+        ad_start_scan(self.handle, scan_desc, channel_descs)
+        try:
+            self._allocate(scan_desc)
+        except Exception:
+            # don't leave the scan running on the device
+            ad_stop_scan(self.handle)
+            raise
+        self.running = True
+        self.run = -1
+        self._runs_read = 0
+        self.scan_desc = scan_desc
+
+    def _allocate(self, scan_desc):
+        # the library tells the size of a run, allocate the buffer once
+        samples_per_run = scan_desc.samples_per_run
+        count = samples_per_run * len(self.channels)
+        size = scan_desc.bytes_per_run // count if count else 0
+        if size not in _SAMPLE_TYPES or size * count != \
+                scan_desc.bytes_per_run:
+            raise ValueError(
+                'unsupported sample size: {} bytes per run of {} samples'
+                .format(scan_desc.bytes_per_run, count))
+
+        self.samples_per_run = samples_per_run
+        self.dtype, ctype = _SAMPLE_TYPES[size]
+        self._ctype = ctype
+        self._block = numpy.empty((samples_per_run, len(self.channels)),
+                                  dtype=self.dtype)
+        self._buffer = (ctype * count).from_buffer(self._block)
+
+    def stop(self):
+        """
+        Stop the scan, calling it on a stopped scan has no effect.
+
+        :rtype: int
+        :return: result code of the scan or None if it wasn't running
+
+        """
+        if not self.running:
+            return None
+        self.running = False
+        return ad_stop_scan(self.handle)
+
+    @property
+    def finished(self):
+        """
+        True if all runs of a scan with limited run count have been read.
+
+        """
+        return self.runs is not None and self._runs_read >= self.runs
+
+    @property
+    def runs_pending(self):
+        """
+        Count of completed runs which haven't been read yet.
+
+        """
+        return ad_poll_scan_state(self.handle).runs_pending
+
+    def read_run(self, out=None):
+        """
+        Wait for the next run and return its samples.
+
+        :param numpy.ndarray out: contiguous array of shape
+                                  (samples_per_run, channels) and type
+                                  :attr:`dtype` receiving the samples; if
+                                  None an internal buffer is returned, which
+                                  is overwritten by the next run
+        :rtype: numpy.ndarray
+
+        :raises LibAD4Error: if an error occured, error_code contains the
+                             error number returned by libad4.dll
+
+        """
+        if out is None:
+            out, buffer = self._block, self._buffer
+        else:
+            if out.shape != self._block.shape or out.dtype != self.dtype:
+                raise ValueError('out needs to be an array of shape {} and '
+                                 'type {}'.format(self._block.shape,
+                                                  self.dtype))
+            buffer = (self._ctype * out.size).from_buffer(out)
+
+        self.run = ad_get_next_run(self.handle, self._state, buffer)
+        self._runs_read += 1
+        return out
+
+    def blocks(self, copy=True):
+        """
+        Yield the runs of the scan until all runs have been read (or forever
+        for a continuous scan).
+
+        :param bool copy: yield a new array per run if True, otherwise the
+                          internal buffer is yielded, which is overwritten by
+                          the next run
+
+        """
+        while not self.finished:
+            block = self.read_run()
+            yield block.copy() if copy else block
+
+
+def scan(handle, channels, ranges=None, sample_rate=1000.0,
+         samples_per_run=1000, runs=None, copy=True):
+    """
+    Run a scan and yield its runs as NumPy arrays of shape
+    (samples_per_run, len(channels)) holding the raw samples.
+
+    The scan is stopped when the generator is exhausted or closed.
+
+    :param int handle: device-handle
+    :param [int] channels: list of channel ids
+    :param [int] ranges: list of range numbers, defaults to range 0
+    :param float sample_rate: sample rate in Hz
+    :param int samples_per_run: count of samples per channel and run
+    :param int runs: count of runs to acquire, None for a continuous scan
+    :param bool copy: see :meth:`Scan.blocks`
+
+    :raises LibAD4Error: if an error occured, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+    with Scan(handle, channels, ranges, sample_rate, samples_per_run,
+              runs) as s:
+        for block in s.blocks(copy):
+            yield block
@@ -0,0 +1,250 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Fixed-rate execution of read and write jobs.
+
+A loop like ``while True: read(); time.sleep(dt)`` drifts, because the
+duration of the read and the oversleeping of :func:`time.sleep` add up. The
+:class:`Scheduler` runs each job at absolute deadlines on the monotonic
+clock: it sleeps until shortly before a deadline and spins for the rest of
+the time. The lateness of every run is recorded in a :class:`Histogram`, so
+the achieved timing can be checked::
+
+    >>> scheduler = Scheduler()
+    >>> job = scheduler.add(channel.read, rate=1000.0)
+    >>> scheduler.run(duration=10.0)
+    >>> job.lateness.summary()
+    {'count': 10000, 'p99': 6.4e-05, ...}
+
+"""
+import heapq
+import threading
+import time
+from .histogram import Histogram
+
+
+#: skip missed deadlines and continue with the next deadline in the future
+SKIP = 'skip'
+
+#: run the job for every missed deadline until it is back on schedule
+CATCH_UP = 'catch-up'
+
+
+class Job(object):
+    """
+    Function called periodically by a :class:`Scheduler`.
+
+    Create jobs with :meth:`Scheduler.add`.
+
+    :ivar str name: name of the job
+    :ivar float period: period in seconds
+    :ivar str policy: :data:`SKIP` or :data:`CATCH_UP`
+    :ivar int runs: count of runs
+    :ivar int skipped: count of deadlines skipped
+    :ivar Histogram lateness: time between deadline and start of the runs
+    :ivar Histogram durations: execution time of the runs
+
+    """
+
+    def __init__(self, func, period, policy=SKIP, name=None, args=()):
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError('unknown policy {!r}'.format(policy))
+        if period <= 0:
+            raise ValueError('period needs to be positive')
+        self.func = func
+        self.args = tuple(args)
+        self.period = period
+        self.policy = policy
+        self.name = name or getattr(func, '__name__', repr(func))
+        self.deadline = None
+        self.runs = 0
+        # deadlines are origin + n * period, so rounding errors don't add up
+        self._origin = None
+        self._index = 0
+        self.skipped = 0
+        self.lateness = Histogram()
+        self.durations = Histogram()
+
+    def __repr__(self):
+        return '<Job {!r} {:g} Hz>'.format(self.name, self.rate)
+
+    @property
+    def rate(self):
+        """
+        Rate of the job in Hz.
+
+        """
+        return 1.0 / self.period
+
+    def reset_stats(self):
+        """
+        Reset the run counters and histograms.
+
+        """
+        self.runs = 0
+        self.skipped = 0
+        self.lateness.reset()
+        self.durations.reset()
+
+    def stats(self):
+        """
+        Return a dictionary with the counters and summaries of the
+        histograms.
+
+        """
+        return {'name': self.name, 'rate': self.rate, 'runs': self.runs,
+                'skipped': self.skipped,
+                'lateness': self.lateness.summary(),
+                'durations': self.durations.summary()}
+
+
+class Scheduler(object):
+    """
+    Run jobs at fixed rates in one thread.
+
+    :param float spin: time in seconds before a deadline from which on the
+                       scheduler spins instead of sleeping, this covers the
+                       wake up latency of the operating system
+
+    :ivar [Job] jobs: the scheduled jobs
+
+    """
+
+    def __init__(self, spin=0.0005):
+        self.spin = spin
+        self.jobs = []
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, func, rate=None, period=None, policy=SKIP, name=None,
+            args=()):
+        """
+        Add a job calling *func* with *args* at *rate* Hz (or every *period*
+        seconds). Jobs added while the scheduler is running start with the
+        next run.
+
+        :rtype: Job
+
+        """
+        if period is None:
+            if rate is None:
+                raise ValueError('rate or period needs to be given')
+            period = 1.0 / rate
+        job = Job(func, period, policy, name, args)
+        self.jobs.append(job)
+        return job
+
+    def _wait(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining > self.spin:
+            if self._stop.wait(remaining - self.spin):
+                return False
+        while time.monotonic() < deadline:
+            pass
+        return not self._stop.is_set()
+
+    def run(self, duration=None):
+        """
+        Run the jobs in the calling thread until :meth:`stop` is called or
+        *duration* seconds have passed. Exceptions of a job stop the
+        scheduler and are propagated.
+
+        """
+        self._stop.clear()
+        self._loop(duration)
+
+    def _loop(self, duration):
+        start = time.monotonic()
+        end = None if duration is None else start + duration
+        queue = []
+        scheduled = 0
+
+        while True:
+            # schedule new jobs, including the ones added while running
+            while scheduled < len(self.jobs):
+                job = self.jobs[scheduled]
+                job._origin = job.deadline = \
+                    start if not scheduled else time.monotonic()
+                job._index = 0
+                heapq.heappush(queue, (job.deadline, scheduled, job))
+                scheduled += 1
+            if not queue:
+                break
+
+            deadline, i, job = queue[0]
+            if end is not None and deadline >= end:
+                break
+            if not self._wait(deadline):
+                break
+
+            started = time.monotonic()
+            job.func(*job.args)
+            finished = time.monotonic()
+            job.runs += 1
+            job.lateness.add(started - deadline)
+            job.durations.add(finished - started)
+
+            job._index += 1
+            deadline = job._origin + job._index * job.period
+            if job.policy == SKIP and deadline <= finished:
+                missed = int((finished - deadline) / job.period) + 1
+                job.skipped += missed
+                job._index += missed
+                deadline = job._origin + job._index * job.period
+            job.deadline = deadline
+            heapq.heapreplace(queue, (deadline, i, job))
+
+    def _run(self, duration):
+        try:
+            self._loop(duration)
+        except Exception as e:
+            self.error = e
+
+    def start(self, duration=None):
+        """
+        Run the jobs in a background thread, see :meth:`run`. An exception of
+        a job is stored in :attr:`error` and raised by :meth:`stop`.
+
+        """
+        if self.running:
+            raise RuntimeError('scheduler is already running')
+        self.error = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration,),
+                                        name='pylibad4-scheduler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def running(self):
+        """
+        True if the background thread is running.
+
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """
+        Stop the scheduler and wait for the background thread.
+
+        :raises Exception: the exception which stopped the background thread
+
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def stats(self):
+        """
+        Return the statistics of all jobs, see :meth:`Job.stats`.
+
+        """
+        return [job.stats() for job in self.jobs]
@@ -0,0 +1,540 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Sharing live samples of one device with several processes.
+
+A device-handle belongs to the process which opened the device. An
+:class:`AcquisitionProcess` opens the device in a worker process, reads the
+channels continuously and publishes blocks of samples into a ring in shared
+memory (:mod:`multiprocessing.shared_memory`). Any number of processes attach
+to the ring by its name with a :class:`SharedMemoryClient` and get the blocks
+as NumPy views on the shared memory, so more consumers cause neither more
+device calls nor copies::
+
+    >>> with AcquisitionProcess('usbbase', channels, block_size=100,
+    ...                         rate=1000.0) as process:
+    ...     print(process.name)
+    psm_3f2a9c1e
+
+    >>> # in another process (logger, GUI, controller)
+    >>> client = SharedMemoryClient('psm_3f2a9c1e')
+    >>> while client.wait():
+    ...     sequence, timestamps, data = client.fetch()
+    ...     process_data(data)
+    ...     if not client.intact(sequence):
+    ...         pass  # the worker overwrote the blocks while processing
+
+Layout of the shared memory, all values in native byte order:
+
+* header (:data:`HEADER_DTYPE`)
+* one entry of :data:`pylibad4.recorder.CHANNEL_DTYPE` per channel with the
+  channel id, range number and the :class:`SADRangeInfo` of the range, so
+  consumers can convert the samples without a device-handle
+* padding up to the next multiple of :data:`ALIGNMENT`
+* *capacity* slots (:func:`slot_dtype`): sequence counter, timestamp
+  (float64, :func:`time.time` at the start of the block) and the uint64
+  samples of shape (block_size, channels)
+
+The worker sets the sequence counter of a slot to 0 before overwriting it and
+to the block number plus one afterwards, then it increments the count of
+written blocks in the header. Clients never write to the shared memory; they
+compare the sequence counters with the block numbers to detect blocks which
+were overwritten while they were reading them.
+
+"""
+import multiprocessing
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy
+from . import libad4
+from .libad4 import ad_open, ad_close, LibAD4Error
+from .plan import AcquisitionPlan
+from .recorder import CHANNEL_DTYPE, channel_table
+
+
+MAGIC = b'PYLIBAD4'
+VERSION = 1
+ALIGNMENT = 64
+
+#: the worker process opens the device
+STARTING = 0
+
+#: the worker process publishes blocks
+RUNNING = 1
+
+#: the worker process has finished
+STOPPED = 2
+
+#: the worker process stopped because of an error
+FAILED = 3
+
+_attach_lock = threading.Lock()
+
+#: header of the shared memory
+HEADER_DTYPE = numpy.dtype([
+    ('magic', 'S8'),
+    ('version', 'u4'),
+    ('state', 'u4'),
+    ('stop', 'u4'),
+    ('channels', 'u4'),
+    ('block_size', 'u4'),
+    ('capacity', 'u4'),
+    ('written', 'u8'),
+    ('error_code', 'i8'),
+])
+
+
+def slot_dtype(block_size, channels):
+    """
+    Return the type of a slot of the ring.
+
+    """
+    return numpy.dtype([
+        ('sequence', 'u8'),
+        ('timestamp', 'f8'),
+        ('data', 'u8', (block_size, channels)),
+    ])
+
+
+def _data_offset(channels):
+    size = HEADER_DTYPE.itemsize + channels * CHANNEL_DTYPE.itemsize
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _attach(name):
+    # Before Python 3.13 every process attaching to a segment registers it
+    # with its resource tracker, which unlinks the segment when the process
+    # exits. The segment belongs to the AcquisitionProcess which created it.
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:
+        pass
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Views(object):
+    # NumPy views on the segment, which need to be released before the
+    # segment can be closed
+
+    def __init__(self, buffer):
+        self.header = numpy.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+        channels = int(self.header['channels'])
+        block_size = int(self.header['block_size'])
+        capacity = int(self.header['capacity'])
+
+        self.channels = numpy.ndarray(
+            channels, dtype=CHANNEL_DTYPE, buffer=buffer,
+            offset=HEADER_DTYPE.itemsize)
+        slots = numpy.ndarray(
+            capacity, dtype=slot_dtype(block_size, channels), buffer=buffer,
+            offset=_data_offset(channels))
+        self.sequences = slots['sequence']
+        self.timestamps = slots['timestamp']
+        self.data = slots['data']
+
+    def readonly(self):
+        for array in (self.header, self.channels, self.sequences,
+                      self.timestamps, self.data):
+            array.flags.writeable = False
+
+
+def _serve(name, device, channel_list, range_list, rate, backend):
+    # main function of the worker process
+    if backend is not None:
+        libad4.set_backend(backend())
+    shm = _attach(name)
+    views = _Views(shm.buf)
+    header = views.header
+    try:
+        handle = ad_open(device)
+        try:
+            plan = AcquisitionPlan(handle, channel_list, range_list)
+            views.channels[:] = channel_table(handle, channel_list,
+                                              range_list)
+            header['state'] = RUNNING
+            _publish(views, plan, rate)
+        finally:
+            ad_close(handle)
+        header['state'] = STOPPED
+    except LibAD4Error as e:
+        header['error_code'] = e.error_code
+        header['state'] = FAILED
+    except BaseException:
+        header['error_code'] = -1
+        header['state'] = FAILED
+        raise
+    finally:
+        del header, views
+        try:
+            shm.close()
+        except BufferError:
+            # a traceback still references views, the process exits anyway
+            pass
+
+
+def _publish(views, plan, rate):
+    header = views.header
+    sequences = views.sequences
+    timestamps = views.timestamps
+    data = views.data
+    capacity = len(data)
+    read = plan.read
+    clock = time.monotonic
+    period = None if rate is None else 1.0 / rate
+    start = clock()
+    samples = 0
+    written = 0
+
+    while not header['stop']:
+        slot = written % capacity
+        sequences[slot] = 0
+        timestamps[slot] = time.time()
+        for row in data[slot]:
+            if period is not None:
+                samples += 1
+                remaining = start + samples * period - clock()
+                if remaining > 0:
+                    time.sleep(remaining)
+            read(row)
+        written += 1
+        sequences[slot] = written
+        header['written'] = written
+
+
+class AcquisitionProcess(object):
+    """
+    Worker process reading *channel_list* of the device *device* and
+    publishing the samples in blocks of *block_size* samples into shared
+    memory.
+
+    The shared memory is created on construction and removed by
+    :meth:`close` or when leaving a with-block. The worker is started right
+    away and the constructor waits until it has opened the device.
+
+    :param str device: name of the device, see :func:`ad_open`
+    :param [int] channel_list: list of channels
+    :param [int] range_list: list of the used range numbers, defaults to
+                             range 0 for all channels
+    :param int block_size: count of samples per block
+    :param int capacity: count of blocks the ring holds
+    :param float rate: sample rate in Hz, the samples are read as fast as
+                       possible if None. The reads are timed by
+                       :func:`time.sleep`, use a :class:`pylibad4.scan.Scan`
+                       for exact sample rates.
+    :param backend: callable returning the backend of the worker process
+                    (see :func:`pylibad4.libad4.set_backend`), e.g.
+                    :class:`pylibad4.simulator.SimulatedLibrary`; the library
+                    is loaded if None. It needs to be picklable if the
+                    processes are spawned.
+    :param float timeout: maximum time in seconds to wait for the worker
+
+    :ivar str device: name of the device
+    :ivar str name: name of the shared memory, which clients attach to
+    :ivar multiprocessing.Process process: the worker process
+
+    :raises LibAD4Error: if the worker couldn't open the device or fetch the
+                         range information, error_code contains the error
+                         number returned by libad4.dll
+
+    """
+
+    def __init__(self, device, channel_list, range_list=None, block_size=1,
+                 capacity=1024, rate=None, backend=None, timeout=10.0):
+        if range_list is None:
+            range_list = [0] * len(channel_list)
+        if len(channel_list) != len(range_list):
+            raise ValueError('range_list and channel_list need to have the '
+                             'same length')
+
+        self.device = device
+        channels = len(channel_list)
+        size = _data_offset(channels) + \
+            capacity * slot_dtype(block_size, channels).itemsize
+        self._shm = SharedMemory(create=True, size=size)
+        self.name = self._shm.name
+
+        header = numpy.ndarray((), dtype=HEADER_DTYPE, buffer=self._shm.buf)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['state'] = STARTING
+        header['channels'] = channels
+        header['block_size'] = block_size
+        header['capacity'] = capacity
+        del header
+        self._views = _Views(self._shm.buf)
+
+        self.process = multiprocessing.Process(
+            target=_serve, name='pylibad4-acquisition-{}'.format(device),
+            args=(self._shm.name, device, list(channel_list),
+                  list(range_list), rate, backend))
+        self.process.daemon = True
+        self.process.start()
+
+        try:
+            self._wait_started(timeout)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<AcquisitionProcess {!r} {}>'.format(self.device, self.name)
+
+    def _wait_started(self, timeout):
+        header = self._views.header
+        deadline = time.monotonic() + timeout
+        while header['state'] == STARTING:
+            if not self.process.is_alive():
+                raise RuntimeError('acquisition process exited with code {}'
+                                   .format(self.process.exitcode))
+            if time.monotonic() > deadline:
+                raise RuntimeError('acquisition process didn\'t start within '
+                                   '{} s'.format(timeout))
+            time.sleep(0.001)
+        if header['state'] == FAILED:
+            error_code = int(header['error_code'])
+            raise LibAD4Error(
+                'Error starting the acquisition of device {}, returncode: {}'
+                .format(self.device, error_code), error_code)
+
+    @property
+    def written(self):
+        """
+        Count of blocks published.
+
+        """
+        return int(self._views.header['written'])
+
+    def client(self):
+        """
+        Return a client attached to the shared memory.
+
+        :rtype: SharedMemoryClient
+
+        """
+        return SharedMemoryClient(self.name)
+
+    def close(self, timeout=10.0):
+        """
+        Stop the worker process and remove the shared memory, calling it
+        multiple times has no effect. Clients keep their mapping until they
+        are closed, but don't receive further blocks.
+
+        """
+        if self._shm is None:
+            return
+        self._views.header['stop'] = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._views = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+class SharedMemoryClient(object):
+    """
+    Read-only access to the blocks published by an
+    :class:`AcquisitionProcess`.
+
+    A new client starts with the next block published. The arrays returned
+    are views on the shared memory and can't be written.
+
+    :param str name: name of the shared memory, see
+                     :attr:`AcquisitionProcess.name`
+
+    :ivar numpy.ndarray channels: array of
+                                  :data:`pylibad4.recorder.CHANNEL_DTYPE`
+                                  with the channel ids and range information
+    :ivar int block_size: count of samples per block
+    :ivar int capacity: count of blocks the ring holds
+    :ivar int position: number of the next block to fetch
+    :ivar int lost: count of blocks overwritten before they were fetched
+
+    :raises ValueError: if the shared memory isn't an acquisition ring
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._shm = _attach(name)
+        header = numpy.ndarray((), dtype=HEADER_DTYPE, buffer=self._shm.buf)
+        valid = header['magic'] == MAGIC and header['version'] <= VERSION
+        del header
+        if not valid:
+            self._shm.close()
+            raise ValueError('{} is no acquisition ring'.format(name))
+
+        self._views = _Views(self._shm.buf)
+        self._views.readonly()
+        self.channels = self._views.channels
+        self.block_size = int(self._views.header['block_size'])
+        self.capacity = len(self._views.data)
+        self.position = self.written
+        self.lost = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<SharedMemoryClient {} position={}>'.format(
+            self.name, self.position)
+
+    @property
+    def written(self):
+        """
+        Count of blocks published.
+
+        """
+        return int(self._views.header['written'])
+
+    @property
+    def available(self):
+        """
+        Count of blocks which can be fetched.
+
+        """
+        return min(self.written - self.position, self.capacity)
+
+    @property
+    def running(self):
+        """
+        True while the worker process publishes blocks.
+
+        """
+        return self._views.header['state'] == RUNNING
+
+    @property
+    def error_code(self):
+        """
+        Error number which stopped the worker process, None if it didn't
+        fail.
+
+        """
+        header = self._views.header
+        return int(header['error_code']) if header['state'] == FAILED \
+            else None
+
+    def intact(self, sequence, count=1):
+        """
+        Return True if the blocks *sequence* to *sequence* + *count* - 1
+        haven't been overwritten yet. Checking the oldest block is enough,
+        the worker overwrites the blocks in order.
+
+        """
+        if not count:
+            return True
+        slot = sequence % self.capacity
+        return self._views.sequences[slot] == sequence + 1
+
+    def wait(self, timeout=None, interval=0.0005):
+        """
+        Wait until a block is available.
+
+        :param float timeout: maximum time to wait in seconds, None waits
+                              until the worker process stops
+        :param float interval: polling interval in seconds
+        :return: True if a block is available
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.available:
+            if not self.running and not self.available:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def fetch(self, max_blocks=None):
+        """
+        Return the blocks published since the last call without copying
+        them. Blocks which were overwritten before are skipped and counted in
+        :attr:`lost`.
+
+        The views end at the end of the ring, so the call may return less
+        blocks than available. They stay valid until the worker overwrites
+        them, check with :meth:`intact` after processing them.
+
+        :param int max_blocks: maximum count of blocks
+        :rtype: tuple
+        :return: number of the first block, array of the timestamps and
+                 array of the samples of shape (blocks, block_size, channels)
+
+        """
+        written = self.written
+        start = max(self.position, written - self.capacity)
+        # the oldest block may be overwritten right now
+        while start < written and not self.intact(start):
+            start += 1
+        self.lost += start - self.position
+
+        slot = start % self.capacity
+        count = min(written - start, self.capacity - slot)
+        if max_blocks is not None:
+            count = min(count, max_blocks)
+        self.position = start + count
+
+        views = self._views
+        return (start, views.timestamps[slot:slot + count],
+                views.data[slot:slot + count])
+
+    def read(self, max_blocks=None):
+        """
+        Return a copy of the blocks published since the last call. Blocks
+        which were overwritten while copying are dropped and counted in
+        :attr:`lost`.
+
+        :param int max_blocks: maximum count of blocks
+        :rtype: tuple
+        :return: number of the first block, array of the timestamps and
+                 array of the samples of shape (blocks, block_size, channels)
+
+        """
+        sequence, timestamps, data = self.fetch(max_blocks)
+        timestamps = timestamps.copy()
+        data = data.copy()
+        count = len(data)
+        skip = 0
+        while skip < count and not self.intact(sequence + skip):
+            skip += 1
+        self.lost += skip
+        return sequence + skip, timestamps[skip:], data[skip:]
+
+    def close(self):
+        """
+        Detach from the shared memory, calling it multiple times has no
+        effect. Views returned by :meth:`fetch` mustn't be used afterwards.
+
+        """
+        if self._shm is None:
+            return
+        self._views = self.channels = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # views returned by fetch still exist, the mapping is released
+            # with the last of them
+            pass
+        self._shm = None
@@ -0,0 +1,597 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Pure Python simulation of the LIBAD4 library.
+
+:class:`SimulatedLibrary` provides the LIBAD4 entry points listed in
+:data:`pylibad4.prototypes.PROTOTYPES` with the same calling convention as
+the foreign functions: arguments are passed by value, results are written to
+the ctypes out parameters and a LIBAD4 return code is returned. It can be
+installed behind the ``ad_*`` functions with
+:func:`pylibad4.libad4.set_backend`::
+
+    >>> from pylibad4 import libad4
+    >>> from pylibad4.simulator import SimulatedLibrary
+    >>> libad4.set_backend(SimulatedLibrary(latency=0.0005))
+    >>> handle = libad4.ad_open('usbbase')
+
+"""
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+from ctypes import c_float, c_uint32, cast, POINTER
+from .types import AD_CHA_TYPE_MASK, AD_CHA_TYPE_ANALOG_IN, \
+    AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO, AD_RETURN_CODE_OK, \
+    AD_RETURN_CODE_6, AD_RETURN_CODE_87, AD_SF_SCANNING
+
+
+#: range of a simulated channel, min and max are given in *unit*
+SimulatedRange = namedtuple('SimulatedRange', 'min max bps unit')
+
+#: channel layout of a simulated measurement system
+DeviceModel = namedtuple(
+    'DeviceModel',
+    'model analog_inputs analog_in_ranges analog_outputs analog_out_ranges '
+    'digital_ports digital_lines'
+)
+
+
+def _bipolar(limits, bps):
+    return [SimulatedRange(-x, x, bps, b'V') for x in limits]
+
+
+#: device models by the name used with ad_open (without address suffix)
+DEVICE_MODELS = {
+    'memadusb': DeviceModel(
+        b'meM-AD', 16, _bipolar([5.12], 16), 0, [], 1, 4),
+    'memaddausb': DeviceModel(
+        b'meM-ADDA', 16, _bipolar([5.12], 16), 2, _bipolar([5.0], 16), 1, 4),
+    'memadfusb': DeviceModel(
+        b'meM-ADf', 16, _bipolar([5.12], 16), 0, [], 1, 4),
+    'memadfpusb': DeviceModel(
+        b'meM-ADfo', 16, _bipolar([5.12], 16), 2, _bipolar([5.0], 16), 1, 4),
+    'usbbase': DeviceModel(
+        b'USB-AD16f', 16, _bipolar([10.24, 5.12, 2.048, 1.024], 16),
+        1, _bipolar([10.0], 16), 1, 16),
+    'usbad14f': DeviceModel(
+        b'USB-AD14f', 16, _bipolar([10.0, 5.0, 2.0, 1.0], 14),
+        1, _bipolar([10.0], 12), 1, 16),
+    'usbad12f': DeviceModel(
+        b'USB-AD12f', 16, _bipolar([10.0, 5.0, 2.0, 1.0], 12),
+        1, _bipolar([10.0], 12), 1, 16),
+    'lanbase': DeviceModel(
+        b'LAN-AD16f', 16, _bipolar([10.24, 5.12, 2.048, 1.024], 16),
+        1, _bipolar([10.0], 16), 1, 16),
+}
+
+
+def default_waveform(channel, t):
+    """
+    Default signal of the analog inputs: a sine with an amplitude of 1 V and
+    a frequency of *channel* Hz.
+
+    :param int channel: channel number (without channel type)
+    :param float t: seconds since the device has been opened
+    :rtype: float
+
+    """
+    return math.sin(2.0 * math.pi * channel * t)
+
+
+def _deref(arg):
+    # out parameters can be passed as ctypes instance, byref() or pointer()
+    obj = getattr(arg, '_obj', None)
+    if obj is not None:
+        return obj
+    if hasattr(arg, 'contents'):
+        return arg.contents
+    return arg
+
+
+class SimulatedDevice(object):
+    """
+    State of an opened simulated measurement system.
+
+    :ivar DeviceModel model: channel layout of the device
+    :ivar float opened: time the device has been opened
+    :ivar dict outputs: last raw value per (channel, range) of the outputs
+    :ivar list digital: data word of each digital port, port 1 first
+    :ivar list direction: line direction mask of each digital port, port 1
+                          first
+    :ivar SimulatedScan scan: running scan or None
+    :ivar float scan_started: time the last scan has been started, the
+                              sample times of the scan are counted from it;
+                              None if no scan has been started
+
+    """
+
+    def __init__(self, name, model, serial):
+        self.name = name
+        self.model = model
+        self.serial = serial
+        self.opened = time.time()
+        self.outputs = {}
+        self.digital = [0] * model.digital_ports
+        self.direction = [(1 << model.digital_lines) - 1] * \
+            model.digital_ports
+        self.scan_started = None
+        self._digital_ranges = [SimulatedRange(
+            0.0, float(1 << model.digital_lines), model.digital_lines, b'')]
+        self.scan = None
+
+    def ranges(self, channel):
+        """
+        Return the list of ranges of *channel* or None for an invalid
+        channel.
+
+        """
+        type_ = channel & AD_CHA_TYPE_MASK
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        model = self.model
+
+        if type_ == AD_CHA_TYPE_ANALOG_IN:
+            if 1 <= id_ <= model.analog_inputs:
+                return model.analog_in_ranges
+        elif type_ == AD_CHA_TYPE_ANALOG_OUT:
+            if 1 <= id_ <= model.analog_outputs:
+                return model.analog_out_ranges
+        elif type_ == AD_CHA_TYPE_DIGITAL_IO:
+            if 1 <= id_ <= model.digital_ports:
+                return self._digital_ranges
+        return None
+
+    def range(self, channel, range_):
+        """
+        Return the range *range_* of *channel* or None if it doesn't exist.
+
+        """
+        ranges = self.ranges(channel)
+        if ranges is None or not 0 <= range_ < len(ranges):
+            return None
+        return ranges[range_]
+
+
+class SimulatedScan(object):
+    """
+    State of a scan started by :meth:`SimulatedLibrary.ad_start_scan`.
+
+    The runs become available at the times given by the sample interval,
+    counted from the start of the scan.
+
+    """
+
+    def __init__(self, channels, ranges, interval, samples_per_run, runs):
+        self.channels = channels
+        self.ranges = ranges
+        self.interval = interval
+        self.samples_per_run = samples_per_run
+        self.runs = runs
+        self.next_run = 0
+        self.start = time.time()
+
+    def due(self, run):
+        """
+        Return the time the run *run* is completed.
+
+        """
+        return self.start + (run + 1) * self.samples_per_run * self.interval
+
+    def finished(self):
+        """
+        True if all runs of a scan with a limited run count have been read.
+
+        """
+        return bool(self.runs) and self.next_run >= self.runs
+
+    def pending(self, now):
+        """
+        Return the count of completed runs which haven't been read yet.
+
+        """
+        done = int((now - self.start) /
+                   (self.samples_per_run * self.interval))
+        if self.runs:
+            done = min(done, self.runs)
+        return max(0, done - self.next_run)
+
+
+class SimulatedLibrary(object):
+    """
+    Simulated LIBAD4 library.
+
+    Analog inputs sample *waveform* plus gaussian noise, analog outputs and
+    digital ports return the last written value.
+
+    :param float latency: time in seconds every device call blocks, calls
+                          of different threads block concurrently like the
+                          foreign calls which release the GIL
+    :param float noise: standard deviation of the noise added to the analog
+                        inputs in volts
+    :param waveform: callable(channel, t) returning the voltage of an analog
+                     input, defaults to :func:`default_waveform`
+    :param int seed: seed of the noise generator
+
+    """
+
+    version = 0x04000000
+    driver_version = 0x01000000
+
+    def __init__(self, latency=0.0, noise=0.001, waveform=None, seed=None):
+        self.latency = latency
+        self.noise = noise
+        self.waveform = waveform or default_waveform
+        self.devices = {}
+        self._next_handle = 1
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # helpers
+
+    def _wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _device(self, handle):
+        return self.devices.get(handle)
+
+    def _read(self, device, channel, range_, t=None):
+        # return (return code, raw value), analog inputs are sampled at
+        # t seconds after opening the device, default is now
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87, 0
+
+        type_ = channel & AD_CHA_TYPE_MASK
+        id_ = channel & ~AD_CHA_TYPE_MASK
+
+        if type_ == AD_CHA_TYPE_ANALOG_IN:
+            if t is None:
+                t = time.time() - device.opened
+            value = self.waveform(id_, t)
+            if self.noise:
+                value += self._random.gauss(0.0, self.noise)
+            return AD_RETURN_CODE_OK, self._to_sample(rng, value)
+
+        if type_ == AD_CHA_TYPE_DIGITAL_IO:
+            return AD_RETURN_CODE_OK, device.digital[id_ - 1]
+
+        return AD_RETURN_CODE_OK, device.outputs.get((channel, range_), 0)
+
+    def _write(self, device, channel, range_, data):
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87
+
+        type_ = channel & AD_CHA_TYPE_MASK
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        data &= (1 << rng.bps) - 1
+
+        if type_ == AD_CHA_TYPE_ANALOG_OUT:
+            device.outputs[(channel, range_)] = data
+        elif type_ == AD_CHA_TYPE_DIGITAL_IO:
+            device.digital[id_ - 1] = data
+        else:
+            return AD_RETURN_CODE_87
+        return AD_RETURN_CODE_OK
+
+    @staticmethod
+    def _resolution(rng):
+        return (rng.max - rng.min) / float(1 << rng.bps)
+
+    @classmethod
+    def _to_float(cls, rng, data):
+        return rng.min + data * cls._resolution(rng)
+
+    @classmethod
+    def _to_sample(cls, rng, value):
+        top = (1 << rng.bps) - 1
+        code = int((value - rng.min) / cls._resolution(rng) + 0.5)
+        return min(max(code, 0), top)
+
+    # LIBAD4 entry points
+
+    def ad_open(self, name):
+        self._wait()
+        name = name.decode() if isinstance(name, bytes) else name
+        model = DEVICE_MODELS.get(name.split(':')[0])
+        if model is None:
+            return -1
+
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self.devices[handle] = SimulatedDevice(name, model, 100 + handle)
+        return handle
+
+    def ad_close(self, handle):
+        self._wait()
+        with self._lock:
+            if self.devices.pop(handle, None) is None:
+                return AD_RETURN_CODE_6
+        return AD_RETURN_CODE_OK
+
+    def ad_get_range_count(self, handle, channel, count):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        ranges = device.ranges(channel)
+        if ranges is None:
+            return AD_RETURN_CODE_87
+        _deref(count).value = len(ranges)
+        return AD_RETURN_CODE_OK
+
+    def ad_get_range_info(self, handle, channel, range_, info):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87
+        info = _deref(info)
+        info.min = rng.min
+        info.max = rng.max
+        info.res = self._resolution(rng)
+        info.bps = rng.bps
+        info.unit = rng.unit
+        return AD_RETURN_CODE_OK
+
+    def ad_discrete_in(self, handle, channel, range_, data):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        return_code, value = self._read(device, channel, range_)
+        if not return_code:
+            _deref(data).value = value
+        return return_code
+
+    ad_discrete_in64 = ad_discrete_in
+
+    def ad_discrete_inv(self, handle, count, channels, ranges, data):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        for i in range(count):
+            return_code, data[i] = self._read(device, channels[i], ranges[i])
+            if return_code:
+                return return_code
+        return AD_RETURN_CODE_OK
+
+    def ad_discrete_out(self, handle, channel, range_, data):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        return self._write(device, channel, range_, data)
+
+    ad_discrete_out64 = ad_discrete_out
+
+    def ad_discrete_outv(self, handle, count, channels, ranges, data):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        for i in range(count):
+            return_code = self._write(device, channels[i], ranges[i], data[i])
+            if return_code:
+                return return_code
+        return AD_RETURN_CODE_OK
+
+    def ad_sample_to_float(self, handle, channel, range_, data, value):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87
+        _deref(value).value = self._to_float(rng, data)
+        return AD_RETURN_CODE_OK
+
+    ad_sample_to_float64 = ad_sample_to_float
+
+    def ad_float_to_sample(self, handle, channel, range_, value, data):
+        # the library receives the voltage as 32 bit float
+        return self.ad_float_to_sample64(handle, channel, range_,
+                                         c_float(value).value, data)
+
+    def ad_float_to_sample64(self, handle, channel, range_, value, data):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87
+        _deref(data).value = self._to_sample(rng, value)
+        return AD_RETURN_CODE_OK
+
+    def ad_analog_in(self, handle, channel, range_, value):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        channel |= AD_CHA_TYPE_ANALOG_IN
+        return_code, data = self._read(device, channel, range_)
+        if not return_code:
+            rng = device.range(channel, range_)
+            _deref(value).value = self._to_float(rng, data)
+        return return_code
+
+    def ad_analog_out(self, handle, channel, range_, value):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        channel |= AD_CHA_TYPE_ANALOG_OUT
+        rng = device.range(channel, range_)
+        if rng is None:
+            return AD_RETURN_CODE_87
+        return self._write(device, channel, range_,
+                           self._to_sample(rng, c_float(value).value))
+
+    def ad_digital_in(self, handle, channel, data):
+        return self.ad_discrete_in(handle, AD_CHA_TYPE_DIGITAL_IO | channel,
+                                   0, data)
+
+    def ad_digital_out(self, handle, channel, data):
+        return self.ad_discrete_out(handle, AD_CHA_TYPE_DIGITAL_IO | channel,
+                                    0, data)
+
+    def ad_set_digital_line(self, handle, channel, line, flag):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        if not (1 <= id_ <= device.model.digital_ports and
+                0 <= line < device.model.digital_lines):
+            return AD_RETURN_CODE_87
+        if flag:
+            device.digital[id_ - 1] |= 1 << line
+        else:
+            device.digital[id_ - 1] &= ~(1 << line)
+        return AD_RETURN_CODE_OK
+
+    def ad_get_digital_line(self, handle, channel, line, flag):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        if not (1 <= id_ <= device.model.digital_ports and
+                0 <= line < device.model.digital_lines):
+            return AD_RETURN_CODE_87
+        _deref(flag).value = (device.digital[id_ - 1] >> line) & 1
+        return AD_RETURN_CODE_OK
+
+    def ad_get_line_direction(self, handle, channel, mask):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        if not 1 <= id_ <= device.model.digital_ports:
+            return AD_RETURN_CODE_87
+        _deref(mask).value = device.direction[id_ - 1]
+        return AD_RETURN_CODE_OK
+
+    def ad_set_line_direction(self, handle, channel, mask):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        id_ = channel & ~AD_CHA_TYPE_MASK
+        if not 1 <= id_ <= device.model.digital_ports:
+            return AD_RETURN_CODE_87
+        device.direction[id_ - 1] = mask
+        return AD_RETURN_CODE_OK
+
+    def ad_get_version(self):
+        return self.version
+
+    def ad_get_drv_version(self, handle, version):
+        self._wait()
+        if self._device(handle) is None:
+            return AD_RETURN_CODE_6
+        _deref(version).value = self.driver_version
+        return AD_RETURN_CODE_OK
+
+    def ad_get_product_info(self, handle, id_, info, size):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        if id_ != 0:
+            return AD_RETURN_CODE_87
+        info = _deref(info)
+        info.serial = device.serial
+        info.fw_version = 0x0100
+        info.model = device.model.model
+        return AD_RETURN_CODE_OK
+
+    def ad_start_scan(self, handle, scan_desc, count, channel_descs):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+
+        scan_desc = _deref(scan_desc)
+        channels = [channel_descs[i].cha for i in range(count)]
+        ranges = [channel_descs[i].range for i in range(count)]
+        if (not count or scan_desc.sample_rate <= 0 or
+                not scan_desc.ticks_per_run):
+            return AD_RETURN_CODE_87
+        for channel, range_ in zip(channels, ranges):
+            if device.range(channel, range_) is None:
+                return AD_RETURN_CODE_87
+
+        samples_per_run = scan_desc.ticks_per_run
+        runs = -(-scan_desc.posthist // samples_per_run)
+        device.scan = SimulatedScan(channels, ranges, scan_desc.sample_rate,
+                                    samples_per_run, runs)
+        device.scan_started = device.scan.start
+        scan_desc.samples_per_run = samples_per_run
+        scan_desc.bytes_per_run = samples_per_run * count * 4
+        return AD_RETURN_CODE_OK
+
+    def ad_poll_scan_state(self, handle, state):
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+
+        state = _deref(state)
+        scan = device.scan
+        if scan is None:
+            state.flags = state.runs_pending = 0
+        else:
+            state.flags = AD_SF_SCANNING
+            state.runs_pending = scan.pending(time.time())
+        return AD_RETURN_CODE_OK
+
+    def ad_get_next_run(self, handle, state, run, buffer):
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        scan = device.scan
+        if scan is None or scan.finished():
+            return AD_RETURN_CODE_87
+
+        # block until the device clock has completed the run
+        delay = scan.due(scan.next_run) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        if not hasattr(buffer, '__setitem__'):
+            buffer = cast(buffer, POINTER(c_uint32))
+
+        count = len(scan.channels)
+        first = scan.next_run * scan.samples_per_run
+        offset = scan.start - device.opened
+        for i in range(scan.samples_per_run):
+            t = offset + (first + i) * scan.interval
+            for j, (channel, range_) in enumerate(zip(scan.channels,
+                                                      scan.ranges)):
+                buffer[i * count + j] = self._read(device, channel, range_,
+                                                   t)[1]
+
+        _deref(run).value = scan.next_run
+        scan.next_run += 1
+        return self.ad_poll_scan_state(handle, state)
+
+    def ad_stop_scan(self, handle, result):
+        self._wait()
+        device = self._device(handle)
+        if device is None:
+            return AD_RETURN_CODE_6
+        device.scan = None
+        _deref(result).value = AD_RETURN_CODE_OK
+        return AD_RETURN_CODE_OK
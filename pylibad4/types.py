@@ -6,7 +6,8 @@
 
 """
 
-from ctypes import Structure, c_double, c_char, c_int, c_uint32, c_uint8
+from ctypes import Structure, c_double, c_char, c_int, c_int32, c_uint32, \
+    c_uint64, c_uint8
 
 
 """
@@ -48,3 +49,57 @@ class SADProductInfo(Structure):
         ('model', c_char * 32),
         ('res', c_uint8 * 256)
     ]
+
+
+"""
+Scan settings
+
+"""
+AD_STORE_DISCRETE   = 0x0001
+AD_STORE_AVERAGE    = 0x0002
+AD_STORE_MIN        = 0x0004
+AD_STORE_MAX        = 0x0008
+AD_STORE_RMS        = 0x0010
+
+AD_TRG_NONE         = 0x0000
+
+AD_SF_SCANNING      = 0x0001
+
+
+class SADScanChaDesc(Structure):
+
+    _fields_ = [
+        ('cha', c_int32),
+        ('store', c_int32),
+        ('ratio', c_int32),
+        ('trg_mode', c_uint32),
+        ('trg_chan', c_int32),
+        ('trg_range', c_int32),
+        ('trg_par', c_uint32 * 2),
+        ('range', c_int32),
+        ('res', c_uint32 * 4)
+    ]
+
+
+class SADScanDesc(Structure):
+
+    _fields_ = [
+        ('sample_rate', c_double),
+        ('prehist', c_uint64),
+        ('posthist', c_uint64),
+        ('ticks_per_run', c_uint32),
+        ('bytes_per_run', c_uint32),
+        ('samples_per_run', c_uint32),
+        ('flags', c_uint32),
+        ('res', c_uint32 * 8)
+    ]
+
+
+class SADScanState(Structure):
+
+    _fields_ = [
+        ('flags', c_int32),
+        ('runs_pending', c_int32),
+        ('posthist', c_int32),
+        ('res', c_int32 * 5)
+    ]
@@ -0,0 +1,193 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+Waveform output on analog outputs.
+
+Generating a waveform with :func:`ad_analog_out` in a loop converts every
+point and calls the library once per point and output. A
+:class:`WaveformPlayer` converts the whole waveform to raw samples once,
+using the cached range information, and writes one row of samples per
+deadline to all outputs with a single :func:`ad_discrete_outv` call of an
+:class:`pylibad4.plan.AcquisitionPlan`. The deadlines are kept by a
+:class:`pylibad4.scheduler.Scheduler`::
+
+    >>> t = numpy.arange(1000) / 1000.0
+    >>> player = WaveformPlayer(handle, [AD_CHA_TYPE_ANALOG_OUT | 1],
+    ...                         5.0 * numpy.sin(2 * numpy.pi * t),
+    ...                         rate=1000.0)
+    >>> player.play(repeat=10)
+    >>> player.stats()
+    {'rate': 1000.0, 'achieved_rate': 999.98, 'written': 10000,
+     'missed': 0, ...}
+
+"""
+import time
+import numpy
+from .convert import info_to_samples
+from .libad4 import ad_get_range_info
+from .plan import AcquisitionPlan
+from .scheduler import Scheduler, SKIP
+
+
+class WaveformPlayer(object):
+    """
+    Plays a waveform on one or more outputs at a fixed rate.
+
+    With the policy :data:`pylibad4.scheduler.SKIP` a sample whose deadline
+    has been missed is left out, so the waveform stays in time. With
+    :data:`pylibad4.scheduler.CATCH_UP` every sample is written, late
+    samples are written as fast as possible until the player is back on
+    schedule.
+
+    :param int handle: device-handle
+    :param [int] channel_list: list of output channels
+    :param waveform: array-like of voltage values, one column per channel;
+                     a one-dimensional array for a single channel
+    :param float rate: samples per second and channel
+    :param [int] range_list: list of the used range numbers, defaults to
+                             range 0 for all channels
+    :param str policy: handling of missed deadlines
+
+    :ivar numpy.ndarray codes: uint64 array with the raw samples, one row
+                               per deadline
+    :ivar int written: count of rows written
+    :ivar int late: count of rows written after the deadline of the next row
+
+    :raises ValueError: if the shape of the waveform doesn't match the
+                        channel list
+    :raises LibAD4Error: if the range information can't be fetched
+
+    """
+
+    def __init__(self, handle, channel_list, waveform, rate, range_list=None,
+                 policy=SKIP):
+        if range_list is None:
+            range_list = [0] * len(channel_list)
+        if len(range_list) != len(channel_list):
+            raise ValueError('channel_list and range_list differ in length')
+
+        waveform = numpy.asarray(waveform, dtype=numpy.float64)
+        if waveform.ndim == 1:
+            waveform = waveform.reshape(-1, 1)
+        if waveform.ndim != 2 or waveform.shape[1] != len(channel_list):
+            raise ValueError('waveform needs one column per channel')
+        if not len(waveform):
+            raise ValueError('waveform is empty')
+
+        self.handle = handle
+        self.rate = float(rate)
+        self.codes = numpy.empty(waveform.shape, dtype=numpy.uint64)
+        for i, (channel, range_) in enumerate(zip(channel_list, range_list)):
+            info_to_samples(ad_get_range_info(handle, channel, range_),
+                            waveform[:, i], self.codes[:, i])
+        self._rows = list(self.codes)
+
+        self._plan = AcquisitionPlan(handle, channel_list, range_list)
+        self._scheduler = Scheduler()
+        self._job = self._scheduler.add(self._step, rate=self.rate,
+                                        policy=policy, name='waveform')
+        self._reset()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return '<WaveformPlayer handle={} channels={} samples={} {:g} Hz>' \
+            .format(self.handle, len(self._plan), len(self), self.rate)
+
+    def _reset(self):
+        self.written = 0
+        self.late = 0
+        self._first = self._last = None
+        self._job.reset_stats()
+
+    def _step(self):
+        job = self._job
+        # the index of the deadline selects the row, so skipped deadlines
+        # skip their rows
+        self._plan.write(self._rows[(job.runs + job.skipped) % len(self)])
+        now = time.monotonic()
+        if now - job.deadline > job.period:
+            self.late += 1
+        if self._first is None:
+            self._first = now
+        self._last = now
+        self.written += 1
+
+    def _duration(self, repeat):
+        if repeat is None:
+            return None
+        # ends between the last deadline and the one after it
+        return (repeat * len(self) - 0.5) / self.rate
+
+    def play(self, repeat=1):
+        """
+        Play the waveform *repeat* times in the calling thread, endlessly
+        until :meth:`stop` is called from another thread if *repeat* is
+        None. The statistics of a previous run are reset.
+
+        :raises LibAD4Error: if an error occured writing the outputs
+
+        """
+        self._reset()
+        self._scheduler.run(self._duration(repeat))
+
+    def start(self, repeat=None):
+        """
+        Play the waveform in a background thread, see :meth:`play`.
+
+        """
+        self._reset()
+        self._scheduler.start(self._duration(repeat))
+
+    def stop(self):
+        """
+        Stop the background thread.
+
+        :raises LibAD4Error: if an error occured writing the outputs
+
+        """
+        self._scheduler.stop()
+
+    @property
+    def running(self):
+        """
+        True if the waveform is played in a background thread.
+
+        """
+        return self._scheduler.running
+
+    @property
+    def achieved_rate(self):
+        """
+        Rows written per second, None before two rows have been written.
+
+        """
+        if self.written < 2 or self._last == self._first:
+            return None
+        return (self.written - 1) / (self._last - self._first)
+
+    @property
+    def missed(self):
+        """
+        Count of deadlines whose row has been skipped or written late.
+
+        """
+        return self._job.skipped + self.late
+
+    def stats(self):
+        """
+        Return a dictionary with the requested and the achieved rate, the
+        count of rows written, skipped and written late, the count of missed
+        deadlines and the summaries of the lateness and the durations of the
+        writes.
+
+        """
+        return {'rate': self.rate, 'achieved_rate': self.achieved_rate,
+                'written': self.written, 'skipped': self._job.skipped,
+                'late': self.late, 'missed': self.missed,
+                'lateness': self._job.lateness.summary(),
+                'durations': self._job.durations.summary()}
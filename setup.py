@@ -41,7 +41,11 @@ setup(
     author='Stefan Lehmann',
     author_email='stefan.st.lehmann@gmail.com',
     packages=['pylibad4'],
-    install_requires=['future'],
+    install_requires=['future', 'numpy'],
+    extras_require={'cffi': ['cffi']},
+    # multiprocessing.shared_memory, tracemalloc.reset_peak and the module
+    # __getattr__ of pylibad4 need Python 3.8
+    python_requires='>=3.8',
     provides=['pylibad4'],
     url='https://github.com/MrLeeh/pylibad4',
     classifiers=[
@@ -54,7 +58,12 @@ setup(
         'Operating System :: POSIX :: Linux',
         'Operating System :: MacOS',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 2',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
         'Topic :: Scientific/Engineering :: Interface Engine/Protocol Translator'
     ],
     cmdclass=cmdclass
@@ -0,0 +1,70 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+Build helper for the stub LIBAD4 shared library in *libad4.c*.
+
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'libad4.c')
+
+if sys.platform == 'win32':  # pragma: no cover
+    STUB_NAME = 'libad4.dll'
+elif sys.platform == 'darwin':  # pragma: no cover
+    STUB_NAME = 'libad4.dylib'
+else:
+    STUB_NAME = 'libad4.so'
+
+_built = {}
+
+
+def find_compiler():
+    """
+    Return the path of a C compiler or None if there is none.
+
+    """
+    for name in (os.environ.get('CC'), 'cc', 'gcc', 'clang'):
+        if name:
+            path = shutil.which(name)
+            if path:
+                return path
+    return None
+
+
+def build_stub_library(directory=None):
+    """
+    Compile the stub library and return the path of the shared object.
+
+    The library is built only once per directory and process.
+
+    :param str directory: output directory, a temporary directory is used
+                          if None
+    :rtype: str
+
+    :raises RuntimeError: if no C compiler is available
+
+    """
+    key = directory
+    if key in _built:
+        return _built[key]
+
+    compiler = find_compiler()
+    if compiler is None:
+        raise RuntimeError('No C compiler found to build the stub library')
+
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix='pylibad4-stub-')
+
+    path = os.path.join(directory, STUB_NAME)
+    subprocess.check_call([compiler, '-shared', '-fPIC', '-O2', '-o', path,
+                           SOURCE])
+    _built[key] = path
+    return path
@@ -0,0 +1,663 @@
+/*
+ * Stub implementation of the LIBAD4 entry points wrapped by pylibad4.
+ *
+ * The stub talks to no hardware. It is compiled in the test and benchmark
+ * setup (see tests/stub/__init__.py) so the ctypes call path of pylibad4 can
+ * be exercised and timed without a measurement device.
+ *
+ * Modelled device (the same for every name except ""):
+ *
+ *   AD_CHA_TYPE_ANALOG_IN  | 1..16   one range, -5.12 .. 5.12 V, 16 bit
+ *   AD_CHA_TYPE_ANALOG_OUT | 1..2    one range, -10 .. 10 V, 16 bit
+ *   AD_CHA_TYPE_DIGITAL_IO | 1..2    one range, 16 lines
+ *
+ * Scans deliver runs at the requested sample interval, measured with the
+ * monotonic clock. Sample i of analog input n is (i + n) & 0xffff.
+ *
+ * Error codes follow LIBAD4: 6 for an invalid handle, 87 for an invalid
+ * parameter.
+ */
+#define _POSIX_C_SOURCE 200809L
+#include <stdint.h>
+#include <string.h>
+#include <time.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT __attribute__((visibility("default")))
+#endif
+
+#define AD_CHA_TYPE_MASK        0xff000000
+#define AD_CHA_TYPE_ANALOG_IN   0x01000000
+#define AD_CHA_TYPE_ANALOG_OUT  0x02000000
+#define AD_CHA_TYPE_DIGITAL_IO  0x03000000
+
+#define ERR_INVALID_HANDLE      6
+#define ERR_INVALID_PARAMETER   87
+
+#define MAX_DEVICES             64
+#define ANALOG_IN_COUNT         16
+#define ANALOG_OUT_COUNT        2
+#define DIGITAL_COUNT           2
+#define MAX_SCAN_CHANNELS       64
+
+struct ad_range_info
+{
+  double min;
+  double max;
+  double res;
+  int bps;
+  char unit[24];
+};
+
+struct ad_product_info
+{
+  uint32_t serial;
+  uint32_t fw_version;
+  char model[32];
+  uint8_t res[256];
+};
+
+struct ad_scan_cha_desc
+{
+  int32_t cha;
+  int32_t store;
+  int32_t ratio;
+  uint32_t trg_mode;
+  int32_t trg_chan;
+  int32_t trg_range;
+  uint32_t trg_par[2];
+  int32_t range;
+  uint32_t res[4];
+};
+
+struct ad_scan_desc
+{
+  double sample_rate;
+  uint64_t prehist;
+  uint64_t posthist;
+  uint32_t ticks_per_run;
+  uint32_t bytes_per_run;
+  uint32_t samples_per_run;
+  uint32_t flags;
+  uint32_t res[8];
+};
+
+struct ad_scan_state
+{
+  int32_t flags;
+  int32_t runs_pending;
+  int32_t posthist;
+  int32_t res[5];
+};
+
+struct scan
+{
+  int active;
+  uint32_t chac;
+  int32_t chav[MAX_SCAN_CHANNELS];
+  uint32_t samples_per_run;
+  uint32_t runs;
+  uint32_t next_run;
+  int64_t start_ns;
+  int64_t interval_ns;
+};
+
+struct device
+{
+  int open;
+  uint32_t tick;
+  uint32_t analog_out[ANALOG_OUT_COUNT + 1];
+  uint32_t digital[DIGITAL_COUNT + 1];
+  uint32_t direction[DIGITAL_COUNT + 1];
+  struct scan scan;
+};
+
+static struct device devices[MAX_DEVICES];
+
+static struct device *get_device (int32_t adh)
+{
+  if (adh < 0 || adh >= MAX_DEVICES || !devices[adh].open)
+    return NULL;
+  return &devices[adh];
+}
+
+static int check_channel (int32_t cha)
+{
+  uint32_t type = (uint32_t) cha & AD_CHA_TYPE_MASK;
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  switch (type)
+    {
+    case AD_CHA_TYPE_ANALOG_IN:
+      return id >= 0 && id <= ANALOG_IN_COUNT;
+    case AD_CHA_TYPE_ANALOG_OUT:
+      return id >= 0 && id <= ANALOG_OUT_COUNT;
+    case AD_CHA_TYPE_DIGITAL_IO:
+      return id >= 0 && id <= DIGITAL_COUNT;
+    default:
+      return 0;
+    }
+}
+
+static int fill_range_info (int32_t cha, int32_t range,
+                            struct ad_range_info *info)
+{
+  if (!check_channel (cha) || range != 0)
+    return ERR_INVALID_PARAMETER;
+
+  memset (info, 0, sizeof (*info));
+  switch ((uint32_t) cha & AD_CHA_TYPE_MASK)
+    {
+    case AD_CHA_TYPE_ANALOG_IN:
+      info->min = -5.12;
+      info->max = 5.12;
+      info->bps = 16;
+      strcpy (info->unit, "V");
+      break;
+    case AD_CHA_TYPE_ANALOG_OUT:
+      info->min = -10.0;
+      info->max = 10.0;
+      info->bps = 16;
+      strcpy (info->unit, "V");
+      break;
+    default:
+      info->min = 0.0;
+      info->max = 65535.0;
+      info->bps = 16;
+      break;
+    }
+  info->res = (info->max - info->min) / (double) (1u << info->bps);
+  return 0;
+}
+
+static int read_sample (struct device *dev, int32_t cha, int32_t range,
+                        uint64_t *data)
+{
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (!check_channel (cha) || range != 0)
+    return ERR_INVALID_PARAMETER;
+
+  switch ((uint32_t) cha & AD_CHA_TYPE_MASK)
+    {
+    case AD_CHA_TYPE_ANALOG_IN:
+      *data = (0x8000u + (uint32_t) id * 257u + dev->tick++) & 0xffffu;
+      break;
+    case AD_CHA_TYPE_ANALOG_OUT:
+      *data = dev->analog_out[id];
+      break;
+    default:
+      *data = dev->digital[id];
+      break;
+    }
+  return 0;
+}
+
+static int write_sample (struct device *dev, int32_t cha, int32_t range,
+                         uint64_t data)
+{
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (!check_channel (cha) || range != 0)
+    return ERR_INVALID_PARAMETER;
+
+  switch ((uint32_t) cha & AD_CHA_TYPE_MASK)
+    {
+    case AD_CHA_TYPE_ANALOG_OUT:
+      dev->analog_out[id] = (uint32_t) (data & 0xffffu);
+      return 0;
+    case AD_CHA_TYPE_DIGITAL_IO:
+      dev->digital[id] = (uint32_t) (data & 0xffffu);
+      return 0;
+    default:
+      return ERR_INVALID_PARAMETER;
+    }
+}
+
+static double sample_to_double (const struct ad_range_info *info,
+                                uint64_t data)
+{
+  return info->min + (double) data * info->res;
+}
+
+static uint64_t double_to_sample (const struct ad_range_info *info,
+                                  double value)
+{
+  double top = (double) ((1u << info->bps) - 1u);
+  double code = (value - info->min) / info->res + 0.5;
+
+  if (code < 0.0)
+    code = 0.0;
+  if (code > top)
+    code = top;
+  return (uint64_t) code;
+}
+
+EXPORT int32_t ad_open (const char *name)
+{
+  int32_t adh;
+
+  if (name == NULL || name[0] == '\0')
+    return -1;
+
+  for (adh = 1; adh < MAX_DEVICES; adh++)
+    {
+      if (!devices[adh].open)
+        {
+          memset (&devices[adh], 0, sizeof (devices[adh]));
+          devices[adh].open = 1;
+          devices[adh].direction[1] = devices[adh].direction[2] = 0xffffu;
+          return adh;
+        }
+    }
+  return -1;
+}
+
+EXPORT int32_t ad_close (int32_t adh)
+{
+  struct device *dev = get_device (adh);
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  dev->open = 0;
+  return 0;
+}
+
+EXPORT int32_t ad_get_range_count (int32_t adh, int32_t cha, int32_t *cnt)
+{
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  if (!check_channel (cha))
+    return ERR_INVALID_PARAMETER;
+  *cnt = 1;
+  return 0;
+}
+
+EXPORT int32_t ad_get_range_info (int32_t adh, int32_t cha, int32_t range,
+                                  struct ad_range_info *info)
+{
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  return fill_range_info (cha, range, info);
+}
+
+EXPORT int32_t ad_discrete_in (int32_t adh, int32_t cha, int32_t range,
+                               uint32_t *data)
+{
+  struct device *dev = get_device (adh);
+  uint64_t sample;
+  int rc;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  rc = read_sample (dev, cha, range, &sample);
+  if (rc == 0)
+    *data = (uint32_t) sample;
+  return rc;
+}
+
+EXPORT int32_t ad_discrete_in64 (int32_t adh, int32_t cha, uint64_t range,
+                                 uint64_t *data)
+{
+  struct device *dev = get_device (adh);
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  return read_sample (dev, cha, (int32_t) range, data);
+}
+
+EXPORT int32_t ad_discrete_inv (int32_t adh, int32_t chac, int32_t chav[],
+                                int32_t rangev[], uint64_t datav[])
+{
+  struct device *dev = get_device (adh);
+  int32_t i;
+  int rc;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  for (i = 0; i < chac; i++)
+    {
+      rc = read_sample (dev, chav[i], rangev[i], &datav[i]);
+      if (rc)
+        return rc;
+    }
+  return 0;
+}
+
+EXPORT int32_t ad_discrete_out (int32_t adh, int32_t cha, int32_t range,
+                                uint32_t data)
+{
+  struct device *dev = get_device (adh);
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  return write_sample (dev, cha, range, data);
+}
+
+EXPORT int32_t ad_discrete_out64 (int32_t adh, int32_t cha, uint64_t range,
+                                  uint64_t data)
+{
+  struct device *dev = get_device (adh);
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  return write_sample (dev, cha, (int32_t) range, data);
+}
+
+EXPORT int32_t ad_discrete_outv (int32_t adh, int32_t chac, int32_t chav[],
+                                 int32_t rangev[], uint64_t datav[])
+{
+  struct device *dev = get_device (adh);
+  int32_t i;
+  int rc;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  for (i = 0; i < chac; i++)
+    {
+      rc = write_sample (dev, chav[i], rangev[i], datav[i]);
+      if (rc)
+        return rc;
+    }
+  return 0;
+}
+
+EXPORT int32_t ad_sample_to_float (int32_t adh, int32_t cha, int32_t range,
+                                   uint32_t data, float *flt)
+{
+  struct ad_range_info info;
+  int rc;
+
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  rc = fill_range_info (cha, range, &info);
+  if (rc == 0)
+    *flt = (float) sample_to_double (&info, data);
+  return rc;
+}
+
+EXPORT int32_t ad_sample_to_float64 (int32_t adh, int32_t cha, uint64_t range,
+                                     uint64_t data, double *dbl)
+{
+  struct ad_range_info info;
+  int rc;
+
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  rc = fill_range_info (cha, (int32_t) range, &info);
+  if (rc == 0)
+    *dbl = sample_to_double (&info, data);
+  return rc;
+}
+
+EXPORT int32_t ad_float_to_sample (int32_t adh, int32_t cha, int32_t range,
+                                   float flt, uint32_t *data)
+{
+  struct ad_range_info info;
+  int rc;
+
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  rc = fill_range_info (cha, range, &info);
+  if (rc == 0)
+    *data = (uint32_t) double_to_sample (&info, flt);
+  return rc;
+}
+
+EXPORT int32_t ad_float_to_sample64 (int32_t adh, int32_t cha, uint64_t range,
+                                     double dbl, uint64_t *data)
+{
+  struct ad_range_info info;
+  int rc;
+
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  rc = fill_range_info (cha, (int32_t) range, &info);
+  if (rc == 0)
+    *data = double_to_sample (&info, dbl);
+  return rc;
+}
+
+EXPORT int32_t ad_analog_in (int32_t adh, int32_t cha, int32_t range,
+                             float *volt)
+{
+  uint32_t data;
+  int rc;
+
+  cha |= AD_CHA_TYPE_ANALOG_IN;
+  rc = ad_discrete_in (adh, cha, range, &data);
+  if (rc == 0)
+    rc = ad_sample_to_float (adh, cha, range, data, volt);
+  return rc;
+}
+
+EXPORT int32_t ad_analog_out (int32_t adh, int32_t cha, int32_t range,
+                              float volt)
+{
+  uint32_t data;
+  int rc;
+
+  cha |= AD_CHA_TYPE_ANALOG_OUT;
+  rc = ad_float_to_sample (adh, cha, range, volt, &data);
+  if (rc == 0)
+    rc = ad_discrete_out (adh, cha, range, data);
+  return rc;
+}
+
+EXPORT int32_t ad_digital_in (int32_t adh, int32_t cha, uint32_t *data)
+{
+  return ad_discrete_in (adh, AD_CHA_TYPE_DIGITAL_IO | cha, 0, data);
+}
+
+EXPORT int32_t ad_digital_out (int32_t adh, int32_t cha, uint32_t data)
+{
+  return ad_discrete_out (adh, AD_CHA_TYPE_DIGITAL_IO | cha, 0, data);
+}
+
+EXPORT int32_t ad_set_digital_line (int32_t adh, int32_t cha, int32_t line,
+                                    uint32_t flag)
+{
+  struct device *dev = get_device (adh);
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  if (id < 0 || id > DIGITAL_COUNT || line < 0 || line > 15)
+    return ERR_INVALID_PARAMETER;
+  if (flag)
+    dev->digital[id] |= 1u << line;
+  else
+    dev->digital[id] &= ~(1u << line);
+  return 0;
+}
+
+EXPORT int32_t ad_get_digital_line (int32_t adh, int32_t cha, int32_t line,
+                                    uint32_t *flag)
+{
+  struct device *dev = get_device (adh);
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  if (id < 0 || id > DIGITAL_COUNT || line < 0 || line > 15)
+    return ERR_INVALID_PARAMETER;
+  *flag = (dev->digital[id] >> line) & 1u;
+  return 0;
+}
+
+EXPORT int32_t ad_get_line_direction (int32_t adh, int32_t cha,
+                                      uint32_t *mask)
+{
+  struct device *dev = get_device (adh);
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  if (id < 0 || id > DIGITAL_COUNT)
+    return ERR_INVALID_PARAMETER;
+  *mask = dev->direction[id];
+  return 0;
+}
+
+EXPORT int32_t ad_set_line_direction (int32_t adh, int32_t cha, uint32_t mask)
+{
+  struct device *dev = get_device (adh);
+  int32_t id = cha & ~AD_CHA_TYPE_MASK;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  if (id < 0 || id > DIGITAL_COUNT)
+    return ERR_INVALID_PARAMETER;
+  dev->direction[id] = mask;
+  return 0;
+}
+
+EXPORT uint32_t ad_get_version (void)
+{
+  return 0x04000000u;
+}
+
+EXPORT int32_t ad_get_drv_version (int32_t adh, uint32_t *vers)
+{
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  *vers = 0x01000000u;
+  return 0;
+}
+
+EXPORT int32_t ad_get_product_info (int32_t adh, int id,
+                                    struct ad_product_info *info, int32_t size)
+{
+  if (get_device (adh) == NULL)
+    return ERR_INVALID_HANDLE;
+  if (id != 0 || size < (int32_t) sizeof (*info))
+    return ERR_INVALID_PARAMETER;
+  memset (info, 0, sizeof (*info));
+  info->serial = 157;
+  info->fw_version = 0x0100;
+  strcpy (info->model, "STUB");
+  return 0;
+}
+
+static int64_t now_ns (void)
+{
+  struct timespec ts;
+
+  clock_gettime (CLOCK_MONOTONIC, &ts);
+  return (int64_t) ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
+static int64_t run_due_ns (const struct scan *scan, uint32_t run)
+{
+  return scan->start_ns
+    + (int64_t) (run + 1) * scan->samples_per_run * scan->interval_ns;
+}
+
+EXPORT int32_t ad_start_scan (int32_t adh, struct ad_scan_desc *sd,
+                              uint32_t chac, struct ad_scan_cha_desc *chav)
+{
+  struct device *dev = get_device (adh);
+  struct scan *scan;
+  uint32_t i;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  if (chac == 0 || chac > MAX_SCAN_CHANNELS || sd->sample_rate <= 0.0
+      || sd->ticks_per_run == 0)
+    return ERR_INVALID_PARAMETER;
+  for (i = 0; i < chac; i++)
+    if (!check_channel (chav[i].cha) || chav[i].range != 0)
+      return ERR_INVALID_PARAMETER;
+
+  scan = &dev->scan;
+  memset (scan, 0, sizeof (*scan));
+  scan->chac = chac;
+  for (i = 0; i < chac; i++)
+    scan->chav[i] = chav[i].cha;
+  scan->samples_per_run = sd->ticks_per_run;
+  scan->runs = (uint32_t) ((sd->posthist + sd->ticks_per_run - 1)
+                           / sd->ticks_per_run);
+  scan->interval_ns = (int64_t) (sd->sample_rate * 1e9);
+  scan->start_ns = now_ns ();
+  scan->active = 1;
+
+  sd->samples_per_run = scan->samples_per_run;
+  sd->bytes_per_run = scan->samples_per_run * chac * sizeof (uint32_t);
+  return 0;
+}
+
+EXPORT int32_t ad_poll_scan_state (int32_t adh, struct ad_scan_state *state)
+{
+  struct device *dev = get_device (adh);
+  struct scan *scan;
+  int64_t run_ns;
+  uint64_t done;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+
+  scan = &dev->scan;
+  memset (state, 0, sizeof (*state));
+  if (!scan->active)
+    return 0;
+
+  /* count of runs completed by the device clock */
+  run_ns = scan->samples_per_run * scan->interval_ns;
+  done = (uint64_t) ((now_ns () - scan->start_ns) / (run_ns > 0 ? run_ns : 1));
+  if (scan->runs && done > scan->runs)
+    done = scan->runs;
+  state->flags = 1;
+  state->runs_pending = done > scan->next_run
+    ? (int32_t) (done - scan->next_run) : 0;
+  return 0;
+}
+
+EXPORT int32_t ad_get_next_run (int32_t adh, struct ad_scan_state *state,
+                                uint32_t *run, void *p)
+{
+  struct device *dev = get_device (adh);
+  struct scan *scan;
+  uint32_t *samples = p;
+  uint64_t index;
+  int64_t wait;
+  uint32_t i, j;
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+
+  scan = &dev->scan;
+  if (!scan->active || (scan->runs && scan->next_run >= scan->runs))
+    return ERR_INVALID_PARAMETER;
+
+  /* block until the device clock has completed the run */
+  wait = run_due_ns (scan, scan->next_run) - now_ns ();
+  if (wait > 0)
+    {
+      struct timespec ts;
+      ts.tv_sec = wait / 1000000000;
+      ts.tv_nsec = wait % 1000000000;
+      nanosleep (&ts, NULL);
+    }
+
+  index = (uint64_t) scan->next_run * scan->samples_per_run;
+  for (i = 0; i < scan->samples_per_run; i++)
+    for (j = 0; j < scan->chac; j++)
+      samples[i * scan->chac + j] = (uint32_t)
+        ((index + i + (scan->chav[j] & ~AD_CHA_TYPE_MASK)) & 0xffffu);
+
+  *run = scan->next_run++;
+  return ad_poll_scan_state (adh, state);
+}
+
+EXPORT int32_t ad_stop_scan (int32_t adh, int32_t *rc)
+{
+  struct device *dev = get_device (adh);
+
+  if (dev == NULL)
+    return ERR_INVALID_HANDLE;
+  dev->scan.active = 0;
+  *rc = 0;
+  return 0;
+}
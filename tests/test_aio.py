@@ -0,0 +1,184 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+"""
+import asyncio
+import threading
+import unittest
+from unittest import TestCase
+from pylibad4 import aio, libad4
+from pylibad4.convert import conversion_table
+from pylibad4.libad4 import LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    AD_CHA_TYPE_DIGITAL_IO, AD_RETURN_CODE_6
+
+
+class RecordingLibrary(SimulatedLibrary):
+    """
+    Simulated library recording the called functions and their threads.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingLibrary, self).__init__(*args, **kwargs)
+        self.calls = []
+
+    def __getattribute__(self, name):
+        attr = super(RecordingLibrary, self).__getattribute__(name)
+        if name.startswith('ad_'):
+            self.calls.append((name, threading.current_thread()))
+        return attr
+
+
+class AioTestCase(TestCase):
+
+    def setUp(self):
+        self.library = RecordingLibrary(latency=0.002, noise=0.0)
+        self.library.waveform = lambda channel, t: 0.25 * channel
+        libad4.set_backend(self.library)
+
+    def tearDown(self):
+        aio.shutdown()
+        libad4.set_backend(None)
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    def test_worker_thread(self):
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            del self.library.calls[:]
+            values = await asyncio.gather(
+                *[aio.ad_analog_in(handle, 1, 0) for _ in range(20)])
+            await aio.ad_close(handle)
+            return handle, values
+
+        handle, values = self.run_async(main())
+        for value in values:
+            self.assertAlmostEqual(value, 0.25, places=3)
+
+        # all calls are made by the worker of the handle
+        threads = set(thread for _, thread in self.library.calls)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads.pop(), threading.current_thread())
+        self.assertNotIn(handle, self.library.devices)
+
+    def test_batching(self):
+        channels = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 5)]
+
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            expected = [libad4.ad_analog_in(handle, i, 0)
+                        for i in range(1, 5)]
+            w = aio.worker(handle)
+
+            # analog reads without a conversion table aren't batched
+            calls = w.calls
+            values = await asyncio.gather(
+                *[aio.ad_analog_in(handle, i, 0)
+                  for _ in range(5) for i in range(1, 5)])
+            self.assertEqual(values, expected * 5)
+            self.assertEqual(w.calls - calls, 20)
+            self.assertEqual(w.batched, 0)
+
+            latency, self.library.latency = self.library.latency, 0.0
+            for channel in channels:
+                conversion_table(handle, channel, 0)
+            self.library.latency = latency
+
+            calls = w.calls
+            values = await asyncio.gather(
+                *[aio.ad_analog_in(handle, i, 0)
+                  for _ in range(25) for i in range(1, 5)])
+            self.assertGreater(w.batched, 0)
+            samples = await asyncio.gather(
+                *[aio.ad_discrete_in(handle, channel, 0)
+                  for _ in range(25) for channel in channels])
+            await aio.ad_close(handle)
+            return expected, values, samples, w.calls - calls, w.batched
+
+        expected, values, samples, calls, batched = self.run_async(main())
+        # batched values are the ones of the library
+        self.assertEqual(values, expected * 25)
+        self.assertEqual(len(samples), 100)
+        self.assertLess(calls, 200)
+        self.assertGreater(batched, 0)
+
+    def test_order(self):
+        channel = AD_CHA_TYPE_ANALOG_OUT | 1
+
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            tasks = []
+            for i in range(50):
+                tasks.append(aio.ad_discrete_out(handle, channel, 0, i))
+                tasks.append(aio.ad_discrete_in(handle, channel, 0))
+            results = await asyncio.gather(*tasks)
+            await aio.ad_close(handle)
+            return results[1::2]
+
+        # every read sees the write queued before it
+        self.assertEqual(self.run_async(main()), list(range(50)))
+
+    def test_digital(self):
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            await aio.ad_digital_out(handle, 1, 0x00f0)
+            await aio.ad_set_digital_line(handle, 1, 0, 1)
+            data = await aio.ad_digital_in(handle, 1)
+            line = await aio.ad_get_digital_line(handle, 1, 4)
+            inv = await aio.ad_discrete_inv(
+                handle, [AD_CHA_TYPE_DIGITAL_IO | 1], [0])
+            await aio.ad_close(handle)
+            return data, line, inv
+
+        self.assertEqual(self.run_async(main()), (0x00f1, 1, [0x00f1]))
+
+    def test_errors(self):
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            results = await asyncio.gather(
+                aio.ad_analog_in(handle, 1, 0),
+                aio.ad_analog_in(handle, 99, 0),
+                aio.ad_analog_in(handle, 2, 0),
+                return_exceptions=True)
+            await aio.ad_close(handle)
+            with self.assertRaises(LibAD4Error) as ctx:
+                await aio.ad_analog_in(handle, 1, 0)
+            return results, ctx.exception
+
+        results, exception = self.run_async(main())
+        self.assertAlmostEqual(results[0], 0.25, places=3)
+        self.assertIsInstance(results[1], LibAD4Error)
+        self.assertAlmostEqual(results[2], 0.5, places=3)
+        self.assertEqual(exception.error_code, AD_RETURN_CODE_6)
+
+    def test_bad_request_in_batch(self):
+        channel = AD_CHA_TYPE_ANALOG_OUT | 1
+
+        async def main():
+            handle = await aio.ad_open('usbbase')
+            results = await asyncio.gather(
+                aio.ad_discrete_in(handle, channel, 0),
+                aio.ad_discrete_in(handle, 'bad', 0),
+                aio.ad_discrete_in(handle, channel, 0),
+                return_exceptions=True)
+            # the worker is still alive
+            await aio.ad_discrete_out(handle, channel, 0, 0x1234)
+            data = await aio.ad_discrete_in(handle, channel, 0)
+            await aio.ad_close(handle)
+            return results, data, aio.worker(handle).is_alive()
+
+        results, data, alive = self.run_async(main())
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(data, 0x1234)
+        self.assertTrue(alive)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import unittest
+from unittest import TestCase
+from ctypes import c_uint32, c_uint64
+import numpy
+from pylibad4 import libad4
+from pylibad4.arrays import compile_channels, ad_discrete_inv_array
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_out, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO, \
+    AD_RETURN_CODE_6
+
+
+INVALID_HANDLE = -1
+
+
+class DiscreteInvArrayTestCase(TestCase):
+
+    def setUp(self):
+        libad4.set_backend(SimulatedLibrary())
+        self.handle = ad_open('usbbase')
+        self.channel_list = [AD_CHA_TYPE_ANALOG_OUT | 1,
+                             AD_CHA_TYPE_DIGITAL_IO | 1]
+        ad_discrete_out(self.handle, self.channel_list[0], 0, 0x1234)
+        ad_discrete_out(self.handle, self.channel_list[1], 0, 0x00ff)
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_compile_channels(self):
+        channels, ranges = compile_channels(self.channel_list, [0, 0])
+        self.assertEqual(list(channels), self.channel_list)
+        self.assertEqual(list(ranges), [0, 0])
+
+        with self.assertRaises(ValueError):
+            compile_channels(self.channel_list, [0])
+
+    def test_read(self):
+        channels, ranges = compile_channels(self.channel_list, [0, 0])
+
+        data = ad_discrete_inv_array(self.handle, channels, ranges)
+        self.assertEqual(data.dtype, numpy.uint64)
+        self.assertEqual(data.tolist(), [0x1234, 0x00ff])
+
+    def test_read_into(self):
+        channels, ranges = compile_channels(self.channel_list, [0, 0])
+        out = numpy.zeros(2, dtype=numpy.uint64)
+
+        data = ad_discrete_inv_array(self.handle, channels, ranges, out=out)
+        self.assertIs(data, out)
+        self.assertEqual(out.tolist(), [0x1234, 0x00ff])
+
+        # rows of a 2d array can be filled in place
+        block = numpy.zeros((3, 2), dtype=numpy.uint64)
+        ad_discrete_inv_array(self.handle, channels, ranges, out=block[1])
+        self.assertEqual(block.tolist(), [[0, 0], [0x1234, 0x00ff], [0, 0]])
+
+        # ctypes arrays are used directly
+        out = (c_uint64 * 2)()
+        ad_discrete_inv_array(self.handle, channels, ranges, out=out)
+        self.assertEqual(list(out), [0x1234, 0x00ff])
+
+    def test_errors(self):
+        channels, ranges = compile_channels(self.channel_list, [0, 0])
+
+        with self.assertRaises(ValueError):
+            ad_discrete_inv_array(self.handle, channels, ranges,
+                                  out=numpy.zeros(3, dtype=numpy.uint64))
+
+        with self.assertRaises(ValueError):
+            ad_discrete_inv_array(self.handle, channels, ranges,
+                                  out=numpy.zeros(2, dtype=numpy.float64))
+
+        # ctypes arrays are checked as well, the library would write past
+        # the end of a short array
+        for out in ((c_uint64 * 1)(), (c_uint64 * 3)(), (c_uint32 * 2)()):
+            with self.assertRaises(ValueError):
+                ad_discrete_inv_array(self.handle, channels, ranges, out=out)
+
+        with self.assertRaises(LibAD4Error) as cm:
+            ad_discrete_inv_array(INVALID_HANDLE, channels, ranges)
+        self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_6)
+
+
+if __name__ == '__main__':
+    unittest.main()
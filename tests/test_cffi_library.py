@@ -0,0 +1,210 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+from ctypes import addressof, byref, pointer, create_string_buffer, \
+    c_int32, c_uint32, c_uint64, ArgumentError
+import numpy
+from pylibad4 import libad4, cffi_library
+from pylibad4.cffi_library import CffiLibrary, declarations
+from pylibad4.convert import conversion_table
+from pylibad4.device import Device
+from pylibad4.libad4 import *  # noqa
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.scan import Scan
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT
+from tests.stub import build_stub_library, find_compiler
+
+
+AI = AD_CHA_TYPE_ANALOG_IN
+AO = AD_CHA_TYPE_ANALOG_OUT
+
+
+def exercise():
+    # results of all wrappers for a freshly opened stub device
+    handle = ad_open('usbbase')
+    info = ad_get_range_info(handle, AI | 1, 0)
+    results = [
+        ad_get_range_count(handle, AI | 1),
+        (info.min, info.max, info.res, info.bps, info.unit),
+        ad_discrete_in(handle, AI | 1, 0),
+        ad_discrete_in64(handle, AI | 2, 0),
+        ad_discrete_inv(handle, [AI | 1, AI | 2, AI | 3], [0, 0, 0]),
+        ad_discrete_out(handle, AO | 1, 0, 0x9000),
+        ad_discrete_out64(handle, AO | 2, 0, 0xa000),
+        ad_discrete_outv(handle, [AO | 1, AO | 2], [0, 0], [1, 2]),
+        ad_discrete_inv(handle, [AO | 1, AO | 2], [0, 0]),
+        ad_sample_to_float(handle, AI | 1, 0, 0x9000),
+        ad_sample_to_float64(handle, AI | 1, 0, 0x9000),
+        ad_float_to_sample(handle, AO | 1, 0, 2.5),
+        ad_float_to_sample64(handle, AO | 1, 0, 2.5),
+        ad_analog_in(handle, 1, 0),
+        ad_analog_out(handle, 1, 0, 1.5),
+        ad_digital_out(handle, 1, 0xa5),
+        ad_digital_in(handle, 1),
+        ad_set_digital_line(handle, 1, 1, True),
+        ad_get_digital_line(handle, 1, 1),
+        ad_set_line_direction(handle, 1, 0xff00),
+        ad_get_line_direction(handle, 1),
+        ad_get_version(),
+        ad_get_drv_version(handle),
+        ad_get_product_info(handle).model,
+    ]
+    for func, args in [(ad_discrete_in, (handle, AI | 99, 0)),
+                       (ad_get_range_info, (handle, AI | 1, 7)),
+                       (ad_digital_in, (999, 1))]:
+        try:
+            func(*args)
+        except LibAD4Error as e:
+            results.append(e.error_code)
+    with Scan(handle, [AI | 1, AI | 2], sample_rate=1e5,
+              samples_per_run=4, runs=2) as scan:
+        results.append([block.tolist() for block in scan.blocks()])
+    ad_close(handle)
+    return results
+
+
+def exercise_conversions():
+    # values ctypes converts by the argument types of the prototypes
+    handle = ad_open('usbbase')
+    results = []
+    for func, args in [(ad_discrete_out, (handle, AO | 1, 0, -1)),
+                       (ad_discrete_inv, (handle, [AO | 1], [0])),
+                       (ad_discrete_out64, (handle, AO | 2, 0, -1)),
+                       (ad_discrete_inv, (handle, [AO | 2], [0])),
+                       (ad_set_line_direction, (handle, 1, -1)),
+                       (ad_get_line_direction, (handle, 1)),
+                       (ad_digital_out, (handle, 1, 0x1FFFFFFFF)),
+                       (ad_digital_in, (handle, 1)),
+                       (ad_discrete_out, (handle, AO | 1, 0, 1.5)),
+                       (ad_set_line_direction, (handle, 1, 1.5))]:
+        try:
+            results.append(func(*args))
+        except Exception as e:
+            results.append(type(e))
+    ad_close(handle)
+    return results
+
+
+@skipUnless(cffi_library.available() and find_compiler(),
+            'Skipping cffi test. cffi or C compiler not available.')
+class CffiLibraryTestCase(TestCase):
+
+    def setUp(self):
+        self.path = build_stub_library()
+        self.library = libad4.load_library(self.path, ffi='cffi')
+
+    def tearDown(self):
+        libad4.set_backend(None)
+
+    def test_declarations(self):
+        text = declarations()
+        self.assertIn('int32_t ad_open(const char *);', text)
+        self.assertIn('uint32_t ad_get_version(void);', text)
+        self.assertIn('int32_t ad_discrete_inv(int32_t, int32_t, uintptr_t, '
+                      'uintptr_t, uintptr_t);', text)
+
+    def test_same_results_as_ctypes(self):
+        self.assertIsInstance(libad4.libad4_dll, CffiLibrary)
+        results = exercise()
+        libad4.load_library(self.path, ffi='ctypes')
+        self.assertEqual(exercise(), results)
+
+    def test_same_conversions_as_ctypes(self):
+        results = exercise_conversions()
+        # the stub keeps the 16 bits of its channels
+        self.assertEqual(results[:8], [None, [0xffff], None, [0xffff], None,
+                                       0xffffffff, None, 0xffff])
+        self.assertEqual(results[8:], [ArgumentError, ArgumentError])
+        libad4.load_library(self.path, ffi='ctypes')
+        self.assertEqual(exercise_conversions(), results)
+
+    def test_pointer_arguments(self):
+        library = self.library
+        handle = library.ad_open(b'usbbase')
+        try:
+            for wrap in (lambda x: x, byref, pointer):
+                data = c_uint32()
+                self.assertEqual(library.ad_discrete_in(
+                    handle, AI | 1, 0, wrap(data)), 0)
+                self.assertGreaterEqual(data.value, 0x8000)
+
+            # arrays as ctypes arrays and NumPy arrays
+            channels = (c_int32 * 2)(AI | 1, AI | 2)
+            ranges = (c_int32 * 2)()
+            out = numpy.zeros(2, dtype=numpy.uint64)
+            self.assertEqual(library.ad_discrete_inv(
+                handle, 2, channels, ranges, out), 0)
+            self.assertTrue((out != 0).all())
+
+            # objects supporting the buffer protocol
+            array = numpy.zeros(1, dtype=numpy.uint32)
+            self.assertEqual(library.ad_discrete_in(
+                handle, AI | 1, 0, array), 0)
+            self.assertNotEqual(array[0], 0)
+            with self.assertRaises(ArgumentError):
+                library.ad_discrete_in(handle, AI | 1, 0,
+                                       numpy.zeros(2, dtype=numpy.uint8))
+        finally:
+            library.ad_close(handle)
+
+    def test_pointer_types(self):
+        # arguments of the wrong type are rejected by both backends instead
+        # of letting the library write past the end of the object
+        for ffi in ('cffi', 'ctypes'):
+            library = libad4.load_library(self.path, ffi=ffi)
+            handle = library.ad_open(b'usbbase')
+            try:
+                for name, args in [
+                        ('ad_get_range_info', (handle, AI | 1, 0, c_uint32())),
+                        ('ad_get_next_run', (handle, c_uint32(), c_uint32(),
+                                             create_string_buffer(64))),
+                        ('ad_digital_in', (handle, 1, c_uint64())),
+                        ('ad_digital_in', (handle, 1,
+                                           addressof(c_uint32()))),
+                        ('ad_discrete_inv', (handle, 1, (c_int32 * 1)(AI | 1),
+                                             (c_int32 * 1)(),
+                                             (c_uint32 * 2)()))]:
+                    with self.assertRaises(ArgumentError) as cm:
+                        getattr(library, name)(*args)
+                    self.assertIn('expected LP_', str(cm.exception))
+
+                # the types ctypes accepts
+                for data in (c_uint32(), byref(c_uint32()),
+                             pointer(c_uint32()), (c_uint32 * 2)()):
+                    self.assertEqual(library.ad_digital_in(handle, 1, data),
+                                     0)
+            finally:
+                library.ad_close(handle)
+
+    def test_bound_objects(self):
+        with Device('usbbase') as device:
+            channel = device.analog_input(1)
+            self.assertEqual(channel.read_raw() + 1, channel.read_raw())
+
+            plan = AcquisitionPlan(device.handle, [AI | 1, AI | 2])
+            data = plan.read()
+            self.assertEqual(data.tolist(), [0x8103, 0x8205])
+
+            table = conversion_table(device.handle, AI | 1, 0)
+            self.assertEqual(table[0x8000], 0.0)
+            self.assertEqual(
+                table[0x9000], ad_sample_to_float(device.handle, AI | 1, 0,
+                                                  0x9000))
+
+    def test_missing_entry_point(self):
+        prototypes = {'ad_does_not_exist': ([c_int32], c_int32)}
+        library = CffiLibrary(self.path, prototypes)
+        with self.assertRaises(AttributeError):
+            library.ad_does_not_exist
+        with self.assertRaises(AttributeError):
+            library.ad_open
+
+
+if __name__ == '__main__':
+    unittest.main()
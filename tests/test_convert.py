@@ -0,0 +1,162 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+import numpy
+from pylibad4 import libad4
+from pylibad4.convert import samples_to_float, samples_to_float64, \
+    float_to_samples, float64_to_samples, conversion_table, \
+    samples_to_float_lut
+from pylibad4.libad4 import ad_open, ad_close, ad_sample_to_float, \
+    ad_sample_to_float64, ad_float_to_sample, ad_float_to_sample64, \
+    range_cache
+from pylibad4.simulator import SimulatedLibrary, SimulatedRange
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT
+from tests.stub import build_stub_library, find_compiler
+
+
+@skipUnless(find_compiler(), 'Skipping stub test. No C compiler found.')
+class ConvertTestCase(TestCase):
+    """
+    Compare the vectorized conversion with the conversion of the stub
+    library bit by bit.
+
+    """
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+        self.handle = ad_open('usbbase')
+        self.channel = AD_CHA_TYPE_ANALOG_IN | 1
+        self.codes = numpy.arange(0, 1 << 16, 7, dtype=numpy.uint64)
+        self.values = numpy.linspace(-12.0, 12.0, 2001)
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_samples_to_float(self):
+        result = samples_to_float(self.handle, self.channel, 0, self.codes)
+        expected = numpy.array(
+            [ad_sample_to_float(self.handle, self.channel, 0, int(x))
+             for x in self.codes], dtype=numpy.float32
+        )
+        self.assertEqual(result.dtype, numpy.float32)
+        self.assertEqual(result.tobytes(), expected.tobytes())
+
+    def test_samples_to_float64(self):
+        result = samples_to_float64(self.handle, self.channel, 0, self.codes)
+        expected = numpy.array(
+            [ad_sample_to_float64(self.handle, self.channel, 0, int(x))
+             for x in self.codes]
+        )
+        self.assertEqual(result.dtype, numpy.float64)
+        self.assertEqual(result.tobytes(), expected.tobytes())
+
+    def test_float_to_samples(self):
+        channel = AD_CHA_TYPE_ANALOG_OUT | 1
+        result = float_to_samples(self.handle, channel, 0, self.values)
+        expected = numpy.array(
+            [ad_float_to_sample(self.handle, channel, 0, x)
+             for x in self.values], dtype=numpy.uint32
+        )
+        self.assertEqual(result.tolist(), expected.tolist())
+
+        # out of range values are clipped
+        self.assertEqual(result[0], 0)
+        self.assertEqual(result[-1], 0xffff)
+
+    def test_float64_to_samples(self):
+        channel = AD_CHA_TYPE_ANALOG_OUT | 1
+        result = float64_to_samples(self.handle, channel, 0, self.values)
+        expected = [ad_float_to_sample64(self.handle, channel, 0, x)
+                    for x in self.values]
+        self.assertEqual(result.dtype, numpy.uint64)
+        self.assertEqual(result.tolist(), expected)
+
+    def test_out(self):
+        out = numpy.empty(len(self.codes), dtype=numpy.float32)
+        result = samples_to_float(self.handle, self.channel, 0, self.codes,
+                                  out=out)
+        self.assertIs(result, out)
+
+    def test_samples_to_float_lut(self):
+        result = samples_to_float_lut(self.handle, self.channel, 0,
+                                      self.codes)
+        expected = numpy.array(
+            [ad_sample_to_float(self.handle, self.channel, 0, int(x))
+             for x in self.codes], dtype=numpy.float32
+        )
+        self.assertEqual(result.dtype, numpy.float32)
+        self.assertEqual(result.tobytes(), expected.tobytes())
+
+        # the table is built once and dropped when the device is closed
+        table = conversion_table(self.handle, self.channel, 0)
+        self.assertIs(conversion_table(self.handle, self.channel, 0), table)
+        self.assertEqual(table.shape, (1 << 16,))
+
+        out = numpy.empty(len(self.codes), dtype=numpy.float32)
+        self.assertIs(samples_to_float_lut(self.handle, self.channel, 0,
+                                           self.codes, out), out)
+
+        with self.assertRaises(IndexError):
+            samples_to_float_lut(self.handle, self.channel, 0, [1 << 16])
+
+        ad_close(self.handle)
+        self.assertNotIn(self.handle, libad4.conversion_tables)
+        self.handle = ad_open('usbbase')
+
+    def test_table_without_range_cache(self):
+        # the tables are kept apart from the range cache and its counters
+        range_cache.enabled = False
+        try:
+            table = conversion_table(self.handle, self.channel, 0)
+            range_cache.reset_stats()
+            self.assertIs(conversion_table(self.handle, self.channel, 0),
+                          table)
+            samples_to_float_lut(self.handle, self.channel, 0, self.codes)
+            self.assertEqual((range_cache.hits, range_cache.misses), (0, 0))
+        finally:
+            range_cache.enabled = True
+
+        libad4.set_backend(libad4.libad4_dll)
+        self.assertEqual(libad4.conversion_tables, {})
+
+
+class ConversionTableTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary()
+        libad4.set_backend(self.library)
+        self.handle = ad_open('usbbase')
+        self.channel = AD_CHA_TYPE_ANALOG_IN | 1
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_table(self):
+        table = conversion_table(self.handle, self.channel, 1)
+        self.assertEqual(table[0], -5.12)
+        self.assertEqual(table[0x8000], 0.0)
+
+    def test_wide_range(self):
+        # ranges with more than 16 bit use the arithmetic conversion
+        device = self.library.devices[self.handle]
+        device.model = device.model._replace(
+            analog_in_ranges=[SimulatedRange(-10.0, 10.0, 24, b'V')])
+        codes = numpy.array([0, 1 << 23, (1 << 24) - 1], dtype=numpy.uint64)
+
+        self.assertIsNone(conversion_table(self.handle, self.channel, 0))
+        result = samples_to_float_lut(self.handle, self.channel, 0, codes)
+        self.assertEqual(
+            result.tolist(),
+            samples_to_float(self.handle, self.channel, 0, codes).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+"""
+import threading
+import time
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4 import libad4
+from pylibad4.coordinator import Coordinator
+from pylibad4.libad4 import ad_discrete_out, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    AD_CHA_TYPE_DIGITAL_IO
+
+
+NAMES = ['usbbase:{}'.format(i) for i in range(4)]
+CHANNELS = [AD_CHA_TYPE_ANALOG_OUT | 1, AD_CHA_TYPE_DIGITAL_IO | 1]
+
+
+class CoordinatorTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary()
+        libad4.set_backend(self.library)
+
+    def tearDown(self):
+        libad4.set_backend(None)
+
+    def test_acquire(self):
+        with Coordinator(NAMES, CHANNELS) as coordinator:
+            self.assertEqual(len(coordinator), 4)
+            for i, handle in enumerate(coordinator.handles):
+                ad_discrete_out(handle, CHANNELS[0], 0, 0x1000 + i)
+                ad_discrete_out(handle, CHANNELS[1], 0, i)
+
+            snapshot = coordinator.acquire()
+            self.assertEqual(snapshot.cycle, 1)
+            self.assertEqual(snapshot.data.dtype, numpy.uint64)
+            self.assertEqual(snapshot.data.tolist(),
+                             [[0x1000 + i, i] for i in range(4)])
+            self.assertEqual(snapshot.timestamps.shape, (4,))
+            self.assertGreaterEqual(snapshot.skew, 0.0)
+
+            # snapshots are independent of each other
+            out = numpy.zeros((4, 2), dtype=numpy.uint64)
+            ad_discrete_out(coordinator.handles[0], CHANNELS[1], 0, 0xff)
+            self.assertIs(coordinator.acquire(out).data, out)
+            self.assertEqual(out[0, 1], 0xff)
+            self.assertEqual(snapshot.data[0, 1], 0)
+
+            cycles = [s.cycle for s in coordinator.snapshots(3)]
+            self.assertEqual(cycles, [3, 4, 5])
+
+        self.assertEqual(self.library.devices, {})
+        with self.assertRaises(RuntimeError):
+            coordinator.acquire()
+
+        # closing twice has no effect
+        coordinator.close()
+
+    def test_parallel(self):
+        self.library.latency = 0.02
+        with Coordinator(NAMES, CHANNELS) as coordinator:
+            coordinator.acquire()
+            start = time.monotonic()
+            snapshot = coordinator.acquire()
+            elapsed = time.monotonic() - start
+
+        # the reads of the four devices overlap
+        self.assertLess(elapsed, 3 * self.library.latency)
+        self.assertLess(snapshot.skew, self.library.latency)
+
+    def test_errors(self):
+        with self.assertRaises(LibAD4Error):
+            Coordinator(NAMES + ['unknown'], CHANNELS)
+        # the devices opened before are closed again
+        self.assertEqual(self.library.devices, {})
+
+        with Coordinator(NAMES, [AD_CHA_TYPE_ANALOG_IN | 99]) as coordinator:
+            with self.assertRaises(LibAD4Error):
+                coordinator.acquire()
+            self.assertEqual(coordinator.cycle, 1)
+
+    def test_exception(self):
+        # exceptions other than LibAD4Error don't stop the worker threads
+        ad_discrete_inv = self.library.ad_discrete_inv
+        failing = [True]
+
+        def read(handle, *args):
+            if failing[0] and handle == 1:
+                raise ValueError('device gone')
+            return ad_discrete_inv(handle, *args)
+
+        self.library.ad_discrete_inv = read
+        with Coordinator(NAMES, CHANNELS) as coordinator:
+            with self.assertRaises(ValueError):
+                coordinator.acquire()
+            failing[0] = False
+            self.assertEqual(coordinator.acquire().cycle, 2)
+
+    def test_close_while_acquiring(self):
+        self.library.latency = 0.05
+        coordinator = Coordinator(NAMES, CHANNELS)
+        errors = []
+
+        def acquire():
+            try:
+                coordinator.acquire()
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        time.sleep(0.01)
+        coordinator.close()
+        thread.join(1.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import gc
+import unittest
+from unittest import TestCase, skipUnless
+from pylibad4 import libad4
+from pylibad4.device import Device, AnalogInput, AnalogOutput, DigitalIO
+from pylibad4.libad4 import ad_discrete_in, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    AD_CHA_TYPE_DIGITAL_IO, AD_RETURN_CODE_6
+from tests.stub import build_stub_library, find_compiler
+
+
+class DeviceTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary(noise=0.0)
+        self.library.waveform = lambda channel, t: 0.25 * channel
+        libad4.set_backend(self.library)
+
+    def tearDown(self):
+        libad4.set_backend(None)
+
+    def test_context_manager(self):
+        with Device('usbbase') as device:
+            self.assertFalse(device.closed)
+            self.assertIn(device.handle, self.library.devices)
+            self.assertEqual(device.product_info.model, b'USB-AD16f')
+
+        self.assertTrue(device.closed)
+        self.assertNotIn(device.handle, self.library.devices)
+
+        # closing twice has no effect
+        device.close()
+
+    def test_finalizer(self):
+        device = Device('usbbase')
+        handle = device.handle
+        del device
+        gc.collect()
+        self.assertNotIn(handle, self.library.devices)
+
+    def test_open_error(self):
+        with self.assertRaises(LibAD4Error):
+            Device('')
+
+    def test_channel(self):
+        with Device('usbbase') as device:
+            self.assertIsInstance(
+                device.channel(AD_CHA_TYPE_ANALOG_IN | 1), AnalogInput)
+            self.assertIsInstance(
+                device.channel(AD_CHA_TYPE_ANALOG_OUT | 1), AnalogOutput)
+            self.assertIsInstance(
+                device.channel(AD_CHA_TYPE_DIGITAL_IO | 1), DigitalIO)
+
+            ch = device.analog_input(3, range_=1)
+            self.assertEqual(ch.id, AD_CHA_TYPE_ANALOG_IN | 3)
+            self.assertEqual(ch.number, 3)
+            self.assertEqual(ch.range_info.max, 5.12)
+
+            with self.assertRaises(LibAD4Error):
+                device.analog_input(3, range_=10)
+
+    def test_analog(self):
+        with Device('usbbase') as device:
+            ch = device.analog_input(2)
+            self.assertAlmostEqual(ch.read(), 0.5, places=3)
+            self.assertEqual(
+                ch.read_raw(),
+                ad_discrete_in(device.handle, AD_CHA_TYPE_ANALOG_IN | 2, 0)
+            )
+
+            out = device.analog_output(1)
+            out.write(2.5)
+            self.assertEqual(out.read_raw(), 0x8000 + 0x2000)
+            out.write_raw(0x1234)
+            self.assertEqual(out.read_raw(), 0x1234)
+
+    def test_digital(self):
+        with Device('usbbase') as device:
+            ch = device.digital_io(1)
+            ch.write(0x0f0f)
+            self.assertEqual(ch.read(), 0x0f0f)
+
+    def test_closed_device(self):
+        with Device('usbbase') as device:
+            ch = device.analog_input(1)
+
+        with self.assertRaises(LibAD4Error) as cm:
+            ch.read()
+        self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_6)
+
+
+@skipUnless(find_compiler(), 'Skipping stub test. No C compiler found.')
+class StubDeviceTestCase(TestCase):
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+
+    def tearDown(self):
+        libad4.set_backend(None)
+
+    def test_prebuilt_calls(self):
+        with Device('usbbase') as device:
+            ch = device.analog_input(1)
+            self.assertIsInstance(ch.read(), float)
+            self.assertIsInstance(ch.read_raw(), int)
+
+            out = device.analog_output(1)
+            out.write(-10.0)
+            self.assertEqual(out.read_raw(), 0)
+
+            with self.assertRaises(LibAD4Error):
+                device.analog_output(5)
+
+        with self.assertRaises(LibAD4Error) as cm:
+            ch.read()
+        self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+import numpy
+from pylibad4 import libad4, instrument
+from pylibad4.device import Device
+from pylibad4.digital import DigitalPort, PortGroup, unpack_lines, \
+    pack_lines
+from pylibad4.libad4 import ad_open, ad_close, ad_digital_in, \
+    ad_digital_out, ad_get_line_direction, ad_set_line_direction, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from tests.stub import build_stub_library, find_compiler
+
+
+class LinesTestCase(TestCase):
+
+    def test_unpack(self):
+        self.assertEqual(unpack_lines(0x8005, 16).nonzero()[0].tolist(),
+                         [0, 2, 15])
+        # bits above the count of lines are ignored
+        self.assertEqual(unpack_lines(0x1ff, 8).tolist(), [True] * 8)
+
+        block = numpy.array([[0x0001, 0x8000], [0xffff, 0x0000]],
+                            dtype=numpy.uint32)
+        flags = unpack_lines(block, 16)
+        self.assertEqual(flags.shape, (2, 2, 16))
+        self.assertEqual(flags.dtype, bool)
+        self.assertEqual(flags.sum(axis=-1).tolist(), [[1, 1], [16, 0]])
+        self.assertTrue(flags[0, 1, 15])
+
+        self.assertEqual(unpack_lines([], 16).shape, (0, 16))
+        with self.assertRaises(ValueError):
+            unpack_lines(0, 65)
+
+    def test_pack(self):
+        words = numpy.random.randint(0, 1 << 16, 1000).astype(numpy.uint16)
+        self.assertEqual(pack_lines(unpack_lines(words, 16)).tolist(),
+                         words.tolist())
+        words = numpy.random.randint(0, 1 << 62, (10, 3), dtype=numpy.int64)
+        packed = pack_lines(unpack_lines(words, 64), numpy.uint64)
+        self.assertEqual(packed.dtype, numpy.uint64)
+        self.assertEqual(packed.tolist(), words.tolist())
+
+        self.assertEqual(pack_lines([True, False, True]), 5)
+        self.assertEqual(pack_lines([[False] * 9 + [True]]).tolist(),
+                         [0x200])
+        with self.assertRaises(ValueError):
+            pack_lines([True] * 9, numpy.uint8)
+
+
+class DigitalPortTestCase(TestCase):
+
+    def setUp(self):
+        libad4.set_backend(SimulatedLibrary())
+        self.handle = ad_open('usbbase')
+        ad_set_line_direction(self.handle, 1, 0xff00)
+        ad_digital_out(self.handle, 1, 0x8001)
+
+    def tearDown(self):
+        instrument.disable()
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_sync(self):
+        port = DigitalPort(self.handle, 1)
+        self.assertEqual(port.lines, 16)
+        self.assertEqual(port.word, 0x8001)
+        self.assertEqual(port.direction, 0xff00)
+        self.assertEqual(port.outputs, 0x00ff)
+        self.assertFalse(port.dirty)
+
+        port.set_line(1, True)
+        ad_digital_out(self.handle, 1, 0x0010)
+        port.sync()
+        self.assertEqual((port.word, port.staged), (0x0010, 0x0010))
+
+    def test_stage(self):
+        port = DigitalPort(self.handle, 1)
+        port.set_line(1, True)
+        port.set_line(0, False)
+        port.toggle_line(7)
+        port.stage(0x0030, 0xffff)
+        self.assertEqual(port.staged, 0x80b2)
+        self.assertTrue(port.get_line(7))
+        self.assertFalse(port.get_line(0))
+        # nothing is written before the commit
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x8001)
+
+        port.discard()
+        self.assertFalse(port.dirty)
+
+        with self.assertRaises(ValueError):
+            port.set_line(8, True)
+        with self.assertRaises(ValueError):
+            port.stage(0x10000, 0)
+        self.assertEqual(port.staged, 0x8001)
+
+    def test_commit(self):
+        port = DigitalPort(self.handle, 1)
+        library = instrument.enable()
+        for line in range(8):
+            port.set_line(line, True)
+        self.assertTrue(port.commit())
+        # unchanged ports aren't written
+        port.set_line(3, True)
+        self.assertFalse(port.commit())
+
+        self.assertEqual(library.stats['ad_digital_out'].calls, 1)
+        self.assertNotIn('ad_set_digital_line', library.stats)
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x80ff)
+        self.assertEqual(port.word, 0x80ff)
+        self.assertEqual(port.writes, 1)
+        self.assertEqual(port.changes, 7)
+
+    def test_lines(self):
+        port = DigitalPort(self.handle, 1)
+        library = instrument.enable()
+        flags = port.read_lines()
+        self.assertEqual(flags.nonzero()[0].tolist(), [0, 15])
+        self.assertEqual(library.stats['ad_digital_in'].calls, 1)
+
+        # input lines are kept
+        port.stage_lines([line % 2 == 1 for line in range(16)])
+        self.assertEqual(port.staged, 0x80aa)
+        port.stage_lines([True] * 16, mask=0x0003)
+        self.assertEqual(port.staged, 0x80ab)
+        with self.assertRaises(ValueError):
+            port.stage_lines([True] * 16, mask=0x0100)
+        with self.assertRaises(ValueError):
+            port.stage_lines([True] * 8)
+
+    def test_direction(self):
+        port = DigitalPort(self.handle, 1)
+        port.set_direction(0x0000)
+        self.assertEqual(ad_get_line_direction(self.handle, 1), 0x0000)
+        port.set_line(15, False)
+        port.commit()
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x0001)
+
+    def test_error(self):
+        port = DigitalPort(self.handle, 1)
+        port.set_line(0, False)
+        ad_close(self.handle)
+        with self.assertRaises(LibAD4Error):
+            port.commit()
+        # the staged changes are kept
+        self.assertTrue(port.dirty)
+        self.handle = ad_open('usbbase')
+
+    def test_device(self):
+        with Device('usbbase') as device:
+            port = device.digital_port(1)
+            self.assertEqual(port.handle, device.handle)
+            self.assertEqual(port.word, 0)
+
+
+@skipUnless(find_compiler(), 'no C compiler available')
+class PortGroupTestCase(TestCase):
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+        self.handle = ad_open('usbbase')
+        for number in (1, 2):
+            ad_set_line_direction(self.handle, number, 0x0000)
+
+    def tearDown(self):
+        instrument.disable()
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_commit(self):
+        # the plan of the group binds the instrumented backend
+        library = instrument.enable()
+        group = PortGroup(self.handle, [1, 2])
+        self.assertEqual(len(group), 2)
+        with self.assertRaises(KeyError):
+            group[3]
+
+        group[1].set_line(0, True)
+        group[1].set_line(4, True)
+        group[2].stage(0xff00, 0xab00)
+        self.assertTrue(group.commit())
+        self.assertFalse(group.commit())
+
+        self.assertEqual(library.stats['ad_discrete_outv'].calls, 1)
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x0011)
+        self.assertEqual(ad_digital_in(self.handle, 2), 0xab00)
+        self.assertEqual(group.writes, 1)
+        self.assertEqual(group.changes, 7)
+        self.assertFalse(group.dirty)
+
+        flags = group.read_lines()
+        self.assertEqual(flags.shape, (2, 16))
+        self.assertEqual(pack_lines(flags).tolist(), [0x0011, 0xab00])
+        self.assertEqual(library.stats['ad_discrete_inv'].calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
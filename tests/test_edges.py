@@ -0,0 +1,101 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4.digital import unpack_lines
+from pylibad4.edges import EdgeDetector, detect_edges, EVENT_DTYPE, \
+    RISING, FALLING
+
+
+def reference(words, initial, rising, falling, lines=16):
+    # line by line comparison of consecutive samples
+    events = []
+    previous = initial
+    for index, word in enumerate(words):
+        if previous is not None:
+            for line in range(lines):
+                before = (previous >> line) & 1
+                after = (word >> line) & 1
+                if not before and after and (rising >> line) & 1:
+                    events.append((index, line, RISING))
+                elif before and not after and (falling >> line) & 1:
+                    events.append((index, line, FALLING))
+        previous = word
+    return events
+
+
+class EdgeDetectorTestCase(TestCase):
+
+    def test_detect(self):
+        events = detect_edges([0x0000, 0x0001, 0x0003, 0x0002, 0x8000])
+        self.assertEqual(events.dtype, EVENT_DTYPE)
+        self.assertEqual(events.tolist(), [
+            (1, 0, RISING), (2, 1, RISING), (3, 0, FALLING),
+            (4, 1, FALLING), (4, 15, RISING)])
+
+        # the first sample sets the state only
+        self.assertEqual(len(detect_edges([0xffff])), 0)
+        self.assertEqual(len(detect_edges([])), 0)
+        with self.assertRaises(ValueError):
+            detect_edges([[1, 2]])
+
+    def test_masks(self):
+        words = [0, 3, 0, 3]
+        self.assertEqual(
+            detect_edges(words, rising=0x0001, falling=0x0000).tolist(),
+            [(1, 0, RISING), (3, 0, RISING)])
+        self.assertEqual(
+            detect_edges(words, rising=0x0000, falling=0x0002).tolist(),
+            [(2, 1, FALLING)])
+        # lines above the count of lines are ignored
+        self.assertEqual(len(detect_edges([0, 0x100, 0], lines=8)), 0)
+
+    def test_stream(self):
+        numpy.random.seed(0)
+        words = numpy.random.randint(0, 1 << 16, 2000).astype(numpy.uint16)
+        # mostly unchanged words with a few changes, like a real port
+        words = words[numpy.repeat(numpy.arange(200), 10)]
+        rising, falling = 0x00ff, 0xf00f
+
+        detector = EdgeDetector(rising, falling, initial=0)
+        events = numpy.concatenate([detector.process(block) for block in
+                                    numpy.array_split(words, 7)])
+        self.assertEqual(events.tolist(),
+                         reference(words, 0, rising, falling))
+        self.assertEqual(detector.position, len(words))
+
+        flags = unpack_lines(words)
+        pulses = (flags[1:] & ~flags[:-1]).sum(axis=0) + flags[0]
+        self.assertEqual(detector.rising_count[:8].tolist(),
+                         pulses[:8].tolist())
+        self.assertEqual(detector.rising_count[8:].sum(), 0)
+        self.assertEqual(detector.falling_count.sum(),
+                         (events['direction'] == FALLING).sum())
+
+        # edges between two blocks
+        detector.reset()
+        self.assertEqual(detector.position, 0)
+        self.assertEqual(len(detector.process([0x0001])), 1)
+        self.assertEqual(detector.process([0x0000, 0x0000]).tolist(),
+                         [(1, 0, FALLING)])
+
+    def test_dtype(self):
+        # recorded samples of any integer type, 32 and 64 lines
+        detector = EdgeDetector(lines=32)
+        events = detector.process(numpy.array([0, 1 << 31, 0],
+                                              dtype=numpy.uint64))
+        self.assertEqual(events.tolist(), [(1, 31, RISING), (2, 31, FALLING)])
+        events = detect_edges([1 << 63, 1], lines=64)
+        self.assertEqual(events.tolist(), [(1, 0, RISING), (1, 63, FALLING)])
+        with self.assertRaises(ValueError):
+            EdgeDetector(lines=65)
+
+
+if __name__ == '__main__':
+    unittest.main()
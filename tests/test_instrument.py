@@ -0,0 +1,119 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+from pylibad4 import instrument, libad4
+from pylibad4.device import Device
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_in, \
+    ad_analog_in, ad_get_version, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_RETURN_CODE_87
+from tests.stub import build_stub_library, find_compiler
+
+
+class InstrumentTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary()
+        libad4.set_backend(self.library)
+
+    def tearDown(self):
+        instrument.disable()
+        libad4.set_backend(None)
+
+    def test_enable(self):
+        self.assertIsNone(instrument.instrumented_library())
+        self.assertEqual(instrument.snapshot(), {})
+
+        proxy = instrument.enable()
+        self.assertIs(instrument.enable(), proxy)
+        self.assertIs(proxy.library, self.library)
+        self.assertIs(libad4.load_library(), proxy)
+
+        self.assertEqual(instrument.disable(), {})
+        self.assertIs(libad4.libad4_dll, self.library)
+        self.assertEqual(instrument.disable(), {})
+
+    def test_snapshot(self):
+        instrument.enable()
+        handle = ad_open('usbbase')
+        for _ in range(10):
+            ad_discrete_in(handle, AD_CHA_TYPE_ANALOG_IN | 1, 0)
+        for _ in range(3):
+            with self.assertRaises(LibAD4Error):
+                ad_analog_in(handle, 99, 0)
+        with self.assertRaises(LibAD4Error):
+            ad_open('unknown')
+        ad_get_version()
+        ad_close(handle)
+
+        stats = instrument.snapshot()
+        self.assertEqual(
+            sorted(stats), ['ad_analog_in', 'ad_close', 'ad_discrete_in',
+                            'ad_get_version', 'ad_open'])
+        self.assertEqual(stats['ad_discrete_in']['calls'], 10)
+        self.assertEqual(stats['ad_discrete_in']['errors'], {})
+        self.assertEqual(stats['ad_analog_in']['errors'],
+                         {AD_RETURN_CODE_87: 3})
+        self.assertEqual(stats['ad_open']['calls'], 2)
+        self.assertEqual(stats['ad_open']['errors'], {-1: 1})
+        self.assertEqual(stats['ad_get_version']['errors'], {})
+
+        discrete_in = stats['ad_discrete_in']
+        self.assertGreater(discrete_in['total'], 0.0)
+        self.assertLessEqual(discrete_in['min'], discrete_in['p50'])
+        self.assertLessEqual(discrete_in['p99'], discrete_in['max'])
+        self.assertEqual(sum(b[2] for b in discrete_in['buckets']), 10)
+
+        instrument.reset()
+        self.assertEqual(instrument.snapshot(), {})
+
+        # the statistics are returned when disabling
+        ad_get_version()
+        self.assertEqual(instrument.disable()['ad_get_version']['calls'], 1)
+        ad_get_version()
+        self.assertEqual(instrument.snapshot(), {})
+
+    def test_bound_objects(self):
+        with Device('usbbase') as device:
+            before = device.analog_input(1)
+            instrument.enable()
+            after = device.analog_input(1)
+            before.read()
+            after.read()
+            after.read()
+
+        self.assertEqual(instrument.snapshot()['ad_analog_in']['calls'], 2)
+
+
+@skipUnless(find_compiler(), 'no C compiler available')
+class StubInstrumentTestCase(TestCase):
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+
+    def tearDown(self):
+        instrument.disable()
+        libad4.set_backend(None)
+
+    def test_foreign_functions(self):
+        instrument.enable()
+        with Device('usbbase') as device:
+            channel = device.analog_input(1)
+            for _ in range(5):
+                channel.read()
+            with self.assertRaises(LibAD4Error):
+                device.analog_input(99)
+
+        stats = instrument.snapshot()
+        self.assertEqual(stats['ad_analog_in']['calls'], 5)
+        self.assertEqual(len(stats['ad_get_range_info']['errors']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
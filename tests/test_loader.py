@@ -0,0 +1,95 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import os
+import subprocess
+import sys
+import unittest
+from unittest import TestCase, skipUnless
+from pylibad4 import libad4, cffi_library
+from tests.stub import build_stub_library, find_compiler
+
+
+def run_python(code, **env):
+    environ = dict(os.environ)
+    environ.update(env)
+    return subprocess.check_output([sys.executable, '-c', code],
+                                   env=environ).decode().strip()
+
+
+class LazyLoadingTestCase(TestCase):
+
+    def test_import_doesnt_load_library(self):
+        output = run_python(
+            'import pylibad4.libad4 as m; print(type(m.libad4_dll).__name__)',
+            PYLIBAD4_LIBRARY='/does/not/exist'
+        )
+        self.assertEqual(output, '_LazyLibrary')
+
+    def test_find_library_env(self):
+        output = run_python(
+            'import pylibad4.libad4 as m; print(m.find_library())',
+            PYLIBAD4_LIBRARY='/opt/bmcm/libad4.so'
+        )
+        self.assertEqual(output, '/opt/bmcm/libad4.so')
+
+    def test_missing_library(self):
+        saved = libad4.libad4_dll
+        try:
+            libad4.libad4_dll = libad4._LazyLibrary()
+            with self.assertRaises(OSError):
+                libad4.load_library('/does/not/exist/libad4.so')
+        finally:
+            libad4.libad4_dll = saved
+
+
+@skipUnless(find_compiler(), 'Skipping stub test. No C compiler found.')
+class StubLoadingTestCase(TestCase):
+
+    def setUp(self):
+        self.path = build_stub_library()
+        self.saved = libad4.libad4_dll
+        libad4.libad4_dll = libad4._LazyLibrary()
+
+    def tearDown(self):
+        libad4.libad4_dll = self.saved
+
+    def test_load_on_first_call(self):
+        output = run_python(
+            'import pylibad4.libad4 as m; m.ad_get_version(); '
+            'print(type(m.libad4_dll).__name__)',
+            PYLIBAD4_LIBRARY=self.path, PYLIBAD4_FFI='ctypes'
+        )
+        self.assertEqual(output, 'CDLL')
+
+    @skipUnless(cffi_library.available(), 'cffi is not installed')
+    def test_load_cffi_by_default(self):
+        output = run_python(
+            'import pylibad4.libad4 as m; m.ad_get_version(); '
+            'print(type(m.libad4_dll).__name__)',
+            PYLIBAD4_LIBRARY=self.path, PYLIBAD4_FFI=''
+        )
+        self.assertEqual(output, 'CffiLibrary')
+
+    def test_unknown_ffi(self):
+        with self.assertRaises(ValueError):
+            libad4.load_library(self.path, ffi='swig')
+
+    def test_load_library(self):
+        dll = libad4.load_library(self.path)
+        self.assertIs(libad4.libad4_dll, dll)
+
+        # the loaded library is cached
+        self.assertIs(libad4.load_library(), dll)
+
+        handle = libad4.ad_open('usbbase')
+        self.assertIsInstance(libad4.ad_get_version(), int)
+        libad4.ad_close(handle)
+
+
+if __name__ == '__main__':
+    unittest.main()
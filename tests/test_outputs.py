@@ -0,0 +1,118 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import unittest
+from unittest import TestCase
+from pylibad4 import libad4, instrument
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_in, \
+    ad_digital_in, ad_float_to_sample, LibAD4Error
+from pylibad4.outputs import OutputManager
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO
+
+
+AO1 = AD_CHA_TYPE_ANALOG_OUT | 1
+DIO1 = AD_CHA_TYPE_DIGITAL_IO | 1
+
+
+class OutputManagerTestCase(TestCase):
+
+    def setUp(self):
+        libad4.set_backend(SimulatedLibrary())
+        self.handle = ad_open('usbbase')
+        self.outputs = OutputManager(self.handle)
+        self.library = instrument.enable()
+
+    def tearDown(self):
+        instrument.disable()
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def calls(self):
+        stats = self.library.stats.get('ad_discrete_outv')
+        return 0 if stats is None else stats.calls
+
+    def test_flush(self):
+        outputs = self.outputs
+        outputs.set(AO1, 0x1234)
+        outputs.set(DIO1, 0x00ff)
+        self.assertEqual(outputs.flush(), 2)
+        self.assertEqual(self.calls(), 1)
+        self.assertEqual(ad_discrete_in(self.handle, AO1, 0), 0x1234)
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x00ff)
+
+        # unchanged values are dropped, the changed ones written with one call
+        for cycle in range(10):
+            outputs.set(AO1, 0x1234)
+            outputs.set(DIO1, 0x00ff if cycle < 5 else 0x0f0f)
+            outputs.flush()
+        self.assertEqual(self.calls(), 2)
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x0f0f)
+        self.assertEqual(outputs.stats(), {'requested': 22, 'written': 3,
+                                           'saved': 19, 'calls': 2})
+
+        # nothing to write
+        self.assertEqual(outputs.flush(), 0)
+        self.assertEqual(self.calls(), 2)
+
+    def test_pending(self):
+        outputs = self.outputs
+        outputs.set(AO1, 0x1000)
+        outputs.flush()
+
+        # the last value set in a cycle is written
+        outputs.set(AO1, 0x2000)
+        outputs.set(AO1, 0x3000)
+        self.assertEqual(outputs.pending, {(AO1, 0): 0x3000})
+        # setting the committed value again cancels the write
+        outputs.set(AO1, 0x1000)
+        self.assertEqual(outputs.pending, {})
+        self.assertEqual(outputs.saved, 3)
+
+        outputs.set(AO1, 0x4000)
+        outputs.discard()
+        self.assertEqual(outputs.flush(), 0)
+        self.assertEqual(ad_discrete_in(self.handle, AO1, 0), 0x1000)
+
+    def test_set_voltage(self):
+        self.outputs.set_voltage(AO1, 2.5)
+        self.assertEqual(self.outputs.pending[(AO1, 0)],
+                         ad_float_to_sample(self.handle, AO1, 0, 2.5))
+        self.outputs.flush()
+        self.outputs.set_voltage(AO1, 2.5)
+        self.assertEqual(self.outputs.flush(), 0)
+
+    def test_invalidate(self):
+        outputs = self.outputs
+        outputs.set(AO1, 0x1234)
+        outputs.set(DIO1, 0x0001)
+        outputs.flush()
+
+        outputs.invalidate(AO1)
+        outputs.set(AO1, 0x1234)
+        outputs.set(DIO1, 0x0001)
+        self.assertEqual(outputs.flush(), 1)
+
+        outputs.invalidate()
+        outputs.set(AO1, 0x1234)
+        outputs.set(DIO1, 0x0001)
+        self.assertEqual(outputs.flush(), 2)
+
+    def test_error(self):
+        outputs = self.outputs
+        outputs.set(AO1, 0x1234)
+        ad_close(self.handle)
+        with self.assertRaises(LibAD4Error):
+            outputs.flush()
+        # the value is written by the next flush
+        self.assertEqual(outputs.pending, {(AO1, 0): 0x1234})
+        self.assertEqual(outputs.committed, {})
+        self.handle = ad_open('usbbase')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+import numpy
+from pylibad4 import libad4
+from pylibad4.device import Device
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_in, \
+    ad_discrete_inv, ad_discrete_out, LibAD4Error
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    AD_CHA_TYPE_DIGITAL_IO, AD_RETURN_CODE_6
+from tests.stub import build_stub_library, find_compiler
+
+
+class SimulatedPlanTestCase(TestCase):
+
+    def setUp(self):
+        libad4.set_backend(SimulatedLibrary())
+        self.handle = ad_open('usbbase')
+        self.channel_list = [AD_CHA_TYPE_ANALOG_OUT | 1,
+                             AD_CHA_TYPE_DIGITAL_IO | 1]
+        self.plan = AcquisitionPlan(self.handle, self.channel_list)
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_attributes(self):
+        self.assertEqual(len(self.plan), 2)
+        self.assertEqual(self.plan.channels, self.channel_list)
+        self.assertEqual(self.plan.ranges, [0, 0])
+        self.assertEqual(self.plan.data.dtype, numpy.uint64)
+
+        with self.assertRaises(ValueError):
+            AcquisitionPlan(self.handle, self.channel_list, [0])
+
+    def test_read(self):
+        ad_discrete_out(self.handle, self.channel_list[0], 0, 0x1234)
+        ad_discrete_out(self.handle, self.channel_list[1], 0, 0x00ff)
+
+        data = self.plan.read()
+        self.assertIs(data, self.plan.data)
+        self.assertEqual(data.tolist(), [0x1234, 0x00ff])
+
+        # rows of a 2d array are filled in place
+        out = numpy.zeros((3, 2), dtype=numpy.uint64)
+        row = out[1]
+        self.assertIs(self.plan.read(row), row)
+        self.assertEqual(out.tolist(),
+                         [[0, 0], [0x1234, 0x00ff], [0, 0]])
+
+    def test_write(self):
+        self.plan.write(numpy.array([0x4321, 0x0f0f], dtype=numpy.uint64))
+        self.assertEqual(
+            ad_discrete_inv(self.handle, self.channel_list, [0, 0]),
+            [0x4321, 0x0f0f])
+
+        # write the current content of the data buffer
+        self.plan.data[1] = 0xf0f0
+        self.plan.write()
+        self.assertEqual(
+            ad_discrete_in(self.handle, self.channel_list[1], 0), 0xf0f0)
+
+    def test_errors(self):
+        plan = AcquisitionPlan(self.handle, [AD_CHA_TYPE_ANALOG_IN | 99])
+        with self.assertRaises(LibAD4Error):
+            plan.read()
+
+        plan = AcquisitionPlan(self.handle, [AD_CHA_TYPE_ANALOG_IN | 1])
+        with self.assertRaises(LibAD4Error):
+            plan.write([0])
+
+        ad_close(self.handle)
+        with self.assertRaises(LibAD4Error) as ctx:
+            self.plan.read()
+        self.assertEqual(ctx.exception.error_code, AD_RETURN_CODE_6)
+        self.handle = ad_open('usbbase')
+
+    def test_device(self):
+        with Device('usbbase') as device:
+            plan = device.acquisition_plan(self.channel_list, [0, 0])
+            self.assertEqual(plan.handle, device.handle)
+            plan.write([1, 2])
+            self.assertEqual(plan.read().tolist(), [1, 2])
+
+
+@skipUnless(find_compiler(), 'no C compiler available')
+class StubPlanTestCase(TestCase):
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+        self.handle = ad_open('usbbase')
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_read_write(self):
+        channel_list = [AD_CHA_TYPE_ANALOG_OUT | 1, AD_CHA_TYPE_ANALOG_OUT | 2,
+                        AD_CHA_TYPE_DIGITAL_IO | 1]
+        plan = AcquisitionPlan(self.handle, channel_list)
+
+        plan.write([0x1000, 0x2000, 0xff])
+        self.assertEqual(ad_discrete_inv(self.handle, channel_list,
+                                         [0, 0, 0]),
+                         [0x1000, 0x2000, 0xff])
+
+        out = numpy.empty(3, dtype=numpy.uint64)
+        self.assertIs(plan.read(out), out)
+        self.assertEqual(out.tolist(), [0x1000, 0x2000, 0xff])
+
+    def test_error(self):
+        plan = AcquisitionPlan(self.handle, [AD_CHA_TYPE_ANALOG_IN | 99])
+        with self.assertRaises(LibAD4Error):
+            plan.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import unittest
+from unittest import TestCase, skipUnless
+from ctypes import CDLL, c_int32, c_uint32
+from pylibad4.prototypes import PROTOTYPES, bind_prototypes
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+from tests.stub import build_stub_library, find_compiler
+
+
+@skipUnless(find_compiler(), 'Skipping stub test. No C compiler found.')
+class PrototypesTestCase(TestCase):
+
+    def setUp(self):
+        self.dll = bind_prototypes(CDLL(build_stub_library()))
+
+    def test_bind_prototypes(self):
+        for name, (argtypes, restype) in PROTOTYPES.items():
+            func = getattr(self.dll, name)
+            self.assertEqual(func.argtypes, argtypes)
+            self.assertIs(func.restype, restype)
+
+    def test_bound_call(self):
+        handle = self.dll.ad_open(b'usbbase')
+        self.assertGreater(handle, 0)
+
+        # out parameters are passed by reference automatically
+        data = c_uint32()
+        return_code = self.dll.ad_discrete_in(
+            handle, AD_CHA_TYPE_ANALOG_IN | 1, 0, data)
+        self.assertEqual(return_code, 0)
+        self.assertNotEqual(data.value, 0)
+
+        self.assertEqual(self.dll.ad_close(handle), 0)
+
+    def test_missing_entry_point(self):
+        prototypes = {'ad_does_not_exist': ([c_int32], c_int32)}
+        bind_prototypes(self.dll, prototypes)
+
+        with self.assertRaises(AttributeError):
+            self.dll.ad_does_not_exist
+
+
+if __name__ == '__main__':
+    unittest.main()
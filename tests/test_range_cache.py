@@ -0,0 +1,101 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import unittest
+from unittest import TestCase
+from pylibad4 import libad4
+from pylibad4.libad4 import ad_open, ad_close, ad_get_range_count, \
+    ad_get_range_info, range_cache, LibAD4Error
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+
+
+class CountingLibrary(SimulatedLibrary):
+
+    def __init__(self):
+        super(CountingLibrary, self).__init__()
+        self.calls = 0
+
+    def ad_get_range_count(self, *args):
+        self.calls += 1
+        return super(CountingLibrary, self).ad_get_range_count(*args)
+
+    def ad_get_range_info(self, *args):
+        self.calls += 1
+        return super(CountingLibrary, self).ad_get_range_info(*args)
+
+
+class RangeCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.library = CountingLibrary()
+        libad4.set_backend(self.library)
+        range_cache.reset_stats()
+        self.handle = ad_open('usbbase')
+        self.channels = [AD_CHA_TYPE_ANALOG_IN | i for i in range(1, 5)]
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+        range_cache.enabled = True
+
+    def configure(self):
+        for channel in self.channels:
+            for range_ in range(ad_get_range_count(self.handle, channel)):
+                ad_get_range_info(self.handle, channel, range_)
+
+    def test_lazy(self):
+        self.configure()
+        self.assertEqual(self.library.calls, 20)
+        self.assertEqual(range_cache.stats(),
+                         {'hits': 0, 'misses': 20, 'entries': 20})
+
+        # reconfiguration doesn't call the library
+        self.configure()
+        self.assertEqual(self.library.calls, 20)
+        self.assertEqual(range_cache.hits, 20)
+
+        info = ad_get_range_info(self.handle, self.channels[0], 1)
+        self.assertIs(ad_get_range_info(self.handle, self.channels[0], 1),
+                      info)
+        self.assertEqual(info.max, 5.12)
+
+    def test_preload(self):
+        range_cache.preload(self.handle, self.channels)
+        calls = self.library.calls
+        range_cache.reset_stats()
+
+        self.configure()
+        self.assertEqual(self.library.calls, calls)
+        self.assertEqual(range_cache.misses, 0)
+
+    def test_invalidate_on_close(self):
+        handle = ad_open('usbbase')
+        ad_get_range_count(handle, self.channels[0])
+        ad_get_range_count(self.handle, self.channels[0])
+        self.assertEqual(len(range_cache), 2)
+
+        ad_close(handle)
+        self.assertEqual(len(range_cache), 1)
+
+    def test_errors_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(LibAD4Error):
+                ad_get_range_info(self.handle, self.channels[0], 10)
+        self.assertEqual(self.library.calls, 2)
+        self.assertEqual(len(range_cache), 0)
+
+    def test_disabled(self):
+        range_cache.enabled = False
+        self.configure()
+        self.configure()
+        self.assertEqual(self.library.calls, 40)
+        self.assertEqual(len(range_cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
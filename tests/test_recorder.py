@@ -0,0 +1,120 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4 import libad4
+from pylibad4.convert import samples_to_float
+from pylibad4.libad4 import ad_open, ad_close, LibAD4Error
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.recorder import Recorder, open_recording, ALIGNMENT
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+
+
+CHANNELS = [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 2]
+
+
+class RecorderTestCase(TestCase):
+
+    def setUp(self):
+        libad4.set_backend(SimulatedLibrary())
+        self.handle = ad_open('usbbase')
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'test.ad4')
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_record(self):
+        blocks = [numpy.arange(i, i + 8, dtype=numpy.uint16).reshape(4, 2)
+                  for i in range(0, 80, 8)]
+
+        with Recorder(self.path, self.handle, CHANNELS, [0, 1],
+                      dtype=numpy.uint16, block_size=4,
+                      capacity=2) as recorder:
+            for i, block in enumerate(blocks):
+                recorder.append(block, timestamp=float(i))
+            recorder.append(blocks[0][:3], timestamp=10.0)
+            self.assertEqual(recorder.blocks, 11)
+            self.assertEqual(recorder.capacity, 16)
+
+            with self.assertRaises(ValueError):
+                recorder.append(numpy.zeros((5, 2)))
+
+        rec = open_recording(self.path)
+        self.assertEqual(len(rec.records), 11)
+        self.assertEqual(len(rec), 43)
+        self.assertEqual(rec.timestamps.tolist(), [float(i) for i in range(11)])
+        self.assertEqual(rec.counts.tolist(), [4] * 10 + [3])
+        self.assertEqual(rec.block(10).tolist(), blocks[0][:3].tolist())
+        numpy.testing.assert_array_equal(
+            rec.samples(), numpy.concatenate(blocks + [blocks[0][:3]]))
+
+        # range information of the channels
+        self.assertEqual(rec.channels['channel'].tolist(), CHANNELS)
+        self.assertEqual(rec.channels['range'].tolist(), [0, 1])
+        self.assertEqual(rec.channels['max'].tolist(), [10.24, 5.12])
+        self.assertEqual(rec.channels['bps'].tolist(), [16, 16])
+
+        # the file is trimmed to the written blocks
+        self.assertEqual(os.path.getsize(self.path),
+                         ALIGNMENT + 11 * rec.records.dtype.itemsize)
+
+    def test_voltages(self):
+        samples = numpy.array([[0, 0x8000], [0xffff, 0x1234]],
+                              dtype=numpy.uint64)
+        with Recorder(self.path, self.handle, CHANNELS, block_size=2) as r:
+            r.append(samples)
+
+        volts = open_recording(self.path).voltages()
+        self.assertEqual(volts.dtype, numpy.float32)
+        for i, channel in enumerate(CHANNELS):
+            numpy.testing.assert_array_equal(
+                volts[:, i],
+                samples_to_float(self.handle, channel, 0, samples[:, i]))
+
+    def test_reserve(self):
+        plan = AcquisitionPlan(self.handle, CHANNELS)
+        with Recorder(self.path, self.handle, CHANNELS,
+                      capacity=1) as recorder:
+            for _ in range(5):
+                plan.read(recorder.reserve()[0])
+                recorder.commit()
+            recorder.flush()
+
+            # a recording can be opened while it is written
+            self.assertEqual(len(open_recording(self.path)), 5)
+
+        rec = open_recording(self.path)
+        self.assertEqual(rec.samples().shape, (5, 2))
+        self.assertTrue((rec.timestamps > 0).all())
+
+    def test_errors(self):
+        with self.assertRaises(LibAD4Error):
+            Recorder(self.path, self.handle, [AD_CHA_TYPE_ANALOG_IN | 99])
+        with self.assertRaises(ValueError):
+            Recorder(self.path, self.handle, CHANNELS, [0])
+
+        with open(self.path, 'wb') as f:
+            f.write(b'no recording')
+        with self.assertRaises(ValueError):
+            open_recording(self.path)
+
+        # empty recordings can be opened
+        Recorder(self.path, self.handle, CHANNELS).close()
+        self.assertEqual(len(open_recording(self.path)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
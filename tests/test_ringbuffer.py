@@ -0,0 +1,167 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-13
+
+"""
+import threading
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4 import libad4
+from pylibad4.libad4 import ad_open, ad_close, ad_discrete_out
+from pylibad4.plan import AcquisitionPlan
+from pylibad4.ringbuffer import RingBuffer, BLOCK, BufferFull
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT, AD_CHA_TYPE_DIGITAL_IO
+
+
+def ramp(start, count, channels=2):
+    # sample i holds the values i, i + 1000, ...
+    rows = numpy.arange(start, start + count, dtype=numpy.uint64)
+    return rows[:, None] + 1000 * numpy.arange(channels, dtype=numpy.uint64)
+
+
+class RingBufferTestCase(TestCase):
+
+    def test_push(self):
+        ring = RingBuffer(2, 4)
+        self.assertEqual(len(ring), 0)
+        self.assertEqual(ring.dtype, numpy.uint64)
+
+        ring.push([1, 2])
+        self.assertEqual(len(ring), 1)
+        self.assertEqual(ring.read_latest(10).tolist(), [[1, 2]])
+
+    def test_push_block(self):
+        ring = RingBuffer(2, 5)
+        ring.push_block(ramp(0, 3))
+        ring.push_block(ramp(3, 4))  # wraps around
+        self.assertEqual(ring.written, 7)
+        self.assertEqual(len(ring), 5)
+        numpy.testing.assert_array_equal(ring.read_latest(5), ramp(2, 5))
+        numpy.testing.assert_array_equal(ring.read_latest(2), ramp(5, 2))
+
+        # only the end of a block larger than the buffer is kept
+        ring.push_block(ramp(7, 12))
+        self.assertEqual(ring.written, 19)
+        numpy.testing.assert_array_equal(ring.read_latest(5), ramp(14, 5))
+
+        out = numpy.zeros((10, 2), dtype=numpy.uint64)
+        latest = ring.read_latest(3, out)
+        self.assertIs(latest.base, out)
+        numpy.testing.assert_array_equal(out[:3], ramp(16, 3))
+
+    def test_reserve(self):
+        ring = RingBuffer(2, 3, dtype=numpy.float32)
+        for i in range(4):
+            row = ring.reserve()
+            row[:] = [i, -i]
+            ring.commit()
+        self.assertEqual(ring.read_latest(3).tolist(),
+                         [[1, -1], [2, -2], [3, -3]])
+
+        # the view ends at the end of the buffer
+        self.assertEqual(len(ring.reserve(3)), 2)
+        with self.assertRaises(ValueError):
+            ring.reserve(4)
+
+    def test_reader(self):
+        ring = RingBuffer(2, 5)
+        ring.push_block(ramp(0, 2))
+        reader = ring.reader()
+        self.assertEqual(reader.available, 0)
+        self.assertEqual(reader.read().shape, (0, 2))
+
+        ring.push_block(ramp(2, 3))
+        self.assertEqual(reader.available, 3)
+        numpy.testing.assert_array_equal(reader.read(2), ramp(2, 2))
+        numpy.testing.assert_array_equal(reader.read(), ramp(4, 1))
+
+        # samples overwritten before reading are counted as lost
+        ring.push_block(ramp(5, 8))
+        numpy.testing.assert_array_equal(reader.read(), ramp(8, 5))
+        self.assertEqual(reader.lost, 3)
+
+        out = numpy.zeros((2, 2), dtype=numpy.uint64)
+        ring.push_block(ramp(13, 3))
+        numpy.testing.assert_array_equal(reader.read(out=out), ramp(13, 2))
+        numpy.testing.assert_array_equal(reader.read(), ramp(15, 1))
+
+    def test_uncommitted(self):
+        # rows reserved but not committed are neither returned nor valid
+        ring = RingBuffer(1, 4)
+        reader = ring.reader()
+        ring.push_block(numpy.arange(4).reshape(4, 1))
+        ring.reserve(1)[:] = 99
+        self.assertEqual(reader.read().ravel().tolist(), [1, 2, 3])
+        self.assertEqual(reader.lost, 1)
+        self.assertEqual(ring.read_latest(4).ravel().tolist(), [1, 2, 3])
+
+        ring.commit()
+        self.assertEqual(reader.read().ravel().tolist(), [99])
+        self.assertEqual(reader.lost, 1)
+        self.assertEqual(ring.read_latest(4).ravel().tolist(), [1, 2, 3, 99])
+
+    def test_block_policy(self):
+        ring = RingBuffer(2, 4, policy=BLOCK)
+        reader = ring.reader()
+        ring.push_block(ramp(0, 4))
+        with self.assertRaises(BufferFull):
+            ring.push([0, 0], timeout=0.01)
+        with self.assertRaises(ValueError):
+            ring.push_block(ramp(0, 5))
+
+        reader.read(1)
+        ring.push([4, 1004])
+        numpy.testing.assert_array_equal(reader.read(), ramp(1, 4))
+
+        # closed readers don't hold back the writer
+        reader.close()
+        ring.push_block(ramp(5, 4), timeout=0.01)
+
+        with self.assertRaises(ValueError):
+            RingBuffer(2, 4, policy='unknown')
+
+    def test_threads(self):
+        ring = RingBuffer(2, 64, policy=BLOCK)
+        reader = ring.reader()
+        blocks = []
+
+        def consume():
+            count = 0
+            while count < 1000:
+                block = reader.read()
+                count += len(block)
+                blocks.append(block)
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        for start in range(0, 1000, 10):
+            ring.push_block(ramp(start, 10), timeout=5.0)
+        thread.join(5.0)
+
+        numpy.testing.assert_array_equal(numpy.concatenate(blocks),
+                                         ramp(0, 1000))
+        self.assertEqual(reader.lost, 0)
+
+    def test_plan(self):
+        libad4.set_backend(SimulatedLibrary())
+        handle = ad_open('usbbase')
+        try:
+            channels = [AD_CHA_TYPE_ANALOG_OUT | 1, AD_CHA_TYPE_DIGITAL_IO | 1]
+            plan = AcquisitionPlan(handle, channels)
+            ring = RingBuffer(len(plan), 8)
+            for i in range(3):
+                ad_discrete_out(handle, channels[1], 0, i)
+                plan.read(ring.reserve())
+                ring.commit()
+            self.assertEqual(ring.read_latest(3)[:, 1].tolist(), [0, 1, 2])
+        finally:
+            ad_close(handle)
+            libad4.set_backend(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
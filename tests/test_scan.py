@@ -0,0 +1,135 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import time
+import unittest
+from unittest import TestCase, skipUnless
+import numpy
+from pylibad4 import libad4
+from pylibad4.convert import samples_to_float
+from pylibad4.libad4 import ad_open, ad_close, LibAD4Error
+from pylibad4.scan import Scan, scan
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_DIGITAL_IO
+from tests.stub import build_stub_library, find_compiler
+
+
+class SimulatedScanTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary(noise=0.0)
+        libad4.set_backend(self.library)
+        self.handle = ad_open('usbbase')
+        self.channels = [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 2]
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_scan(self):
+        t0 = time.time()
+        blocks = list(scan(self.handle, self.channels, sample_rate=2000.0,
+                           samples_per_run=20, runs=5))
+        elapsed = time.time() - t0
+
+        # 100 samples at 2 kHz are delivered by the device clock
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertEqual(len(blocks), 5)
+        for block in blocks:
+            self.assertEqual(block.shape, (20, 2))
+            self.assertEqual(block.dtype, numpy.uint32)
+
+        # the samples follow the waveform at the sample times, counted from
+        # the start of the scan
+        device = self.library.devices[self.handle]
+        self.assertGreaterEqual(device.scan_started, t0)
+        data = numpy.concatenate(blocks)
+        volts = samples_to_float(self.handle, self.channels[0], 0, data[:, 0])
+        t = device.scan_started - device.opened + numpy.arange(100) / 2000.0
+        numpy.testing.assert_allclose(volts, numpy.sin(2 * numpy.pi * t),
+                                      atol=1e-3)
+        self.assertIsNone(self.library.devices[self.handle].scan)
+
+    def test_reuse_buffer(self):
+        with Scan(self.handle, self.channels, sample_rate=10000.0,
+                  samples_per_run=10, runs=3) as s:
+            blocks = list(s.blocks(copy=False))
+            self.assertEqual(s.run, 2)
+        self.assertTrue(all(block is blocks[0] for block in blocks))
+
+    def test_read_run_out(self):
+        out = numpy.zeros((10, 2), dtype=numpy.uint32)
+        with Scan(self.handle, self.channels, sample_rate=10000.0,
+                  samples_per_run=10) as s:
+            self.assertIs(s.read_run(out), out)
+            self.assertTrue(out.any())
+
+            with self.assertRaises(ValueError):
+                s.read_run(numpy.zeros((5, 2), dtype=numpy.uint32))
+
+    def test_stop_generator(self):
+        blocks = scan(self.handle, self.channels, sample_rate=10000.0,
+                      samples_per_run=10)
+        next(blocks)
+        self.assertIsNotNone(self.library.devices[self.handle].scan)
+        blocks.close()
+        self.assertIsNone(self.library.devices[self.handle].scan)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            Scan(self.handle, self.channels, ranges=[0])
+
+        with self.assertRaises(LibAD4Error):
+            Scan(self.handle, [AD_CHA_TYPE_ANALOG_IN | 1], [10]).start()
+
+    def test_sample_size(self):
+        # an unexpected sample size stops the scan started on the device
+        ad_start_scan = self.library.ad_start_scan
+
+        def start_scan(handle, scan_desc, count, channel_descs):
+            return_code = ad_start_scan(handle, scan_desc, count,
+                                        channel_descs)
+            desc = getattr(scan_desc, '_obj', scan_desc)
+            desc.bytes_per_run = 3 * desc.samples_per_run
+            return return_code
+
+        self.library.ad_start_scan = start_scan
+        with self.assertRaises(ValueError) as cm:
+            with Scan(self.handle, self.channels[:1], sample_rate=1000.0,
+                      samples_per_run=10, runs=1):
+                pass
+        self.assertIn('30 bytes per run of 10 samples', str(cm.exception))
+        self.assertIsNone(self.library.devices[self.handle].scan)
+
+
+@skipUnless(find_compiler(), 'Skipping stub test. No C compiler found.')
+class StubScanTestCase(TestCase):
+
+    def setUp(self):
+        libad4.load_library(build_stub_library())
+        self.handle = ad_open('usbbase')
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_scan(self):
+        channels = [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 4,
+                    AD_CHA_TYPE_DIGITAL_IO | 1]
+        with Scan(self.handle, channels, sample_rate=5000.0,
+                  samples_per_run=50, runs=4) as s:
+            self.assertEqual(s.runs_pending, 0)
+            data = numpy.concatenate(list(s))
+            self.assertEqual(s.run, 3)
+
+        index = numpy.arange(200)
+        self.assertEqual(data[:, 0].tolist(), (index + 1).tolist())
+        self.assertEqual(data[:, 1].tolist(), (index + 4).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import time
+import unittest
+from unittest import TestCase
+from pylibad4 import libad4
+from pylibad4.device import Device
+from pylibad4.histogram import Histogram
+from pylibad4.scheduler import Scheduler, SKIP, CATCH_UP
+from pylibad4.simulator import SimulatedLibrary
+
+
+class HistogramTestCase(TestCase):
+
+    def test_add(self):
+        h = Histogram(base=1e-6, buckets=8)
+        self.assertIsNone(h.mean)
+        self.assertIsNone(h.percentile(50))
+
+        for value in (-1e-6, 0.0, 0.5e-6, 1e-6, 3e-6, 1.0):
+            h.add(value)
+        self.assertEqual(len(h), 6)
+        self.assertEqual(h.counts, [3, 1, 1, 0, 0, 0, 0, 1])
+        self.assertEqual(h.min, -1e-6)
+        self.assertEqual(h.max, 1.0)
+        self.assertAlmostEqual(h.mean, (1.0 + 4e-6 - 0.5e-6) / 6)
+
+        self.assertEqual(h.bounds(0), (0.0, 1e-6))
+        self.assertEqual(h.bounds(2), (2e-6, 4e-6))
+        self.assertEqual(h.bounds(7)[1], float('inf'))
+        self.assertEqual([b[2] for b in h.buckets()], [3, 1, 1, 1])
+
+        h.reset()
+        self.assertEqual(h.count, 0)
+        self.assertEqual(sum(h.counts), 0)
+
+    def test_percentile(self):
+        h = Histogram(base=1e-6)
+        for _ in range(99):
+            h.add(1.5e-6)
+        h.add(1e-3)
+        self.assertEqual(h.percentile(50), 2e-6)
+        self.assertEqual(h.percentile(99), 2e-6)
+        self.assertEqual(h.percentile(100), 1e-3)
+
+        summary = h.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 1e-3)
+
+
+class SchedulerTestCase(TestCase):
+
+    def test_rate(self):
+        scheduler = Scheduler()
+        # catching up keeps the count of runs exact if the test process is
+        # stalled for longer than a period
+        fast = scheduler.add(lambda: None, rate=500.0, name='fast',
+                             policy=CATCH_UP)
+        slow = scheduler.add(lambda: None, period=0.02, policy=CATCH_UP)
+        self.assertEqual(repr(fast), "<Job 'fast' 500 Hz>")
+
+        start = time.monotonic()
+        scheduler.run(duration=0.2)
+        self.assertLess(time.monotonic() - start, 0.25)
+
+        # no drift: the count of runs is given by the deadlines
+        self.assertEqual(fast.runs, 100)
+        self.assertEqual(slow.runs, 10)
+        self.assertEqual(fast.skipped, 0)
+        self.assertEqual(fast.lateness.count, 100)
+        self.assertLess(fast.lateness.percentile(50), 0.01)
+
+        stats = scheduler.stats()
+        self.assertEqual([s['name'] for s in stats], ['fast', '<lambda>'])
+        self.assertEqual(stats[0]['runs'], 100)
+
+    def test_skip(self):
+        scheduler = Scheduler()
+        job = scheduler.add(time.sleep, period=0.01, policy=SKIP,
+                            args=(0.025,))
+        scheduler.run(duration=0.1)
+        self.assertLess(job.runs, 6)
+        self.assertGreater(job.skipped, 0)
+        self.assertLess(job.lateness.max, 0.01)
+
+    def test_catch_up(self):
+        scheduler = Scheduler()
+        job = scheduler.add(time.sleep, period=0.01, policy=CATCH_UP,
+                            args=(0.015,))
+        scheduler.run(duration=0.1)
+        self.assertEqual(job.skipped, 0)
+        # the runs are started late instead of being skipped
+        self.assertGreater(job.lateness.max, 0.01)
+
+        with self.assertRaises(ValueError):
+            scheduler.add(time.sleep, period=0.01, policy='unknown')
+        with self.assertRaises(ValueError):
+            scheduler.add(time.sleep)
+
+    def test_background(self):
+        scheduler = Scheduler()
+        job = scheduler.add(lambda: None, rate=1000.0)
+        scheduler.start()
+        self.assertTrue(scheduler.running)
+        with self.assertRaises(RuntimeError):
+            scheduler.start()
+        time.sleep(0.05)
+        scheduler.stop()
+        self.assertFalse(scheduler.running)
+        self.assertGreater(job.runs, 10)
+
+    def test_error(self):
+        scheduler = Scheduler()
+
+        def fail():
+            raise KeyError('fail')
+
+        scheduler.add(fail, rate=100.0)
+        with self.assertRaises(KeyError):
+            scheduler.run(duration=0.1)
+
+        scheduler.start()
+        time.sleep(0.02)
+        with self.assertRaises(KeyError):
+            scheduler.stop()
+
+    def test_device(self):
+        libad4.set_backend(SimulatedLibrary())
+        try:
+            with Device('usbbase') as device:
+                values = []
+                scheduler = Scheduler()
+                channel = device.analog_input(1)
+                scheduler.add(lambda: values.append(channel.read()),
+                              rate=200.0, policy=CATCH_UP)
+                scheduler.run(duration=0.05)
+            self.assertEqual(len(values), 10)
+        finally:
+            libad4.set_backend(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
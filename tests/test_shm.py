@@ -0,0 +1,130 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import multiprocessing
+import time
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4.libad4 import LibAD4Error
+from pylibad4.shm import AcquisitionProcess, SharedMemoryClient
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN
+
+
+CHANNELS = [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 2]
+
+
+def consume(name, blocks, queue):
+    # consumer attaching from a separate process
+    with SharedMemoryClient(name) as client:
+        received = 0
+        while received < blocks and client.wait(5.0):
+            sequence, timestamps, data = client.read()
+            received += len(data)
+        queue.put((received, client.block_size, client.lost))
+
+
+class AcquisitionProcessTestCase(TestCase):
+
+    def setUp(self):
+        self.process = AcquisitionProcess(
+            'usbbase', CHANNELS, [0, 1], block_size=10, capacity=8,
+            rate=5000.0, backend=SimulatedLibrary)
+
+    def tearDown(self):
+        self.process.close()
+
+    def test_fetch(self):
+        with self.process.client() as client:
+            self.assertTrue(client.running)
+            self.assertIsNone(client.error_code)
+            self.assertEqual(client.channels['channel'].tolist(), CHANNELS)
+            self.assertEqual(client.channels['range'].tolist(), [0, 1])
+            self.assertEqual(client.channels['max'].tolist(), [10.24, 5.12])
+
+            expected = client.position
+            for _ in range(5):
+                self.assertTrue(client.wait(5.0))
+                lost = client.lost
+                sequence, timestamps, data = client.fetch()
+                # blocks are only skipped if the test process stalled
+                self.assertEqual(sequence, expected + client.lost - lost)
+                self.assertTrue(client.intact(sequence, len(data)))
+                self.assertEqual(data.shape[1:], (10, 2))
+                self.assertEqual(len(timestamps), len(data))
+                self.assertFalse(data.flags.writeable)
+                self.assertTrue(((data > 0x6000) & (data < 0xa000)).all())
+                expected = sequence + len(data)
+
+            with self.assertRaises(ValueError):
+                data[0, 0, 0] = 0
+
+    def test_read_lost(self):
+        with self.process.client() as client:
+            time.sleep(0.1)
+            sequence, timestamps, data = client.read()
+            self.assertGreater(client.lost, 0)
+            self.assertEqual(sequence, client.position - len(data))
+            self.assertLessEqual(len(data), 8)
+            self.assertTrue(data.flags.writeable)
+            self.assertTrue((numpy.diff(timestamps) >= 0).all())
+            self.assertFalse(client.intact(sequence - 8))
+
+    def test_clients(self):
+        first = self.process.client()
+        second = self.process.client()
+        self.assertTrue(first.wait(5.0))
+        position = first.position
+        sequence, timestamps, data = first.fetch(1)
+        second.position = position
+        self.assertEqual(second.fetch(1)[2].tolist(), data.tolist())
+        first.close()
+        second.close()
+
+        queue = multiprocessing.Queue()
+        consumers = [multiprocessing.Process(target=consume,
+                                             args=(self.process.name, 20,
+                                                   queue))
+                     for _ in range(2)]
+        for consumer in consumers:
+            consumer.start()
+        results = [queue.get(timeout=10.0) for _ in consumers]
+        for consumer in consumers:
+            consumer.join()
+        for received, block_size, lost in results:
+            self.assertGreaterEqual(received, 20)
+            self.assertEqual(block_size, 10)
+
+    def test_close(self):
+        client = self.process.client()
+        self.process.close()
+        self.process.close()
+        self.assertFalse(client.running)
+        self.assertEqual(client.available, client.written - client.position)
+        client.close()
+        client.close()
+
+        with self.assertRaises(FileNotFoundError):
+            SharedMemoryClient(self.process.name)
+
+
+class AcquisitionProcessErrorTestCase(TestCase):
+
+    def test_open_error(self):
+        with self.assertRaises(LibAD4Error) as cm:
+            AcquisitionProcess('unknown', CHANNELS, backend=SimulatedLibrary)
+        self.assertEqual(cm.exception.error_code, -1)
+
+    def test_range_error(self):
+        with self.assertRaises(LibAD4Error):
+            AcquisitionProcess('usbbase', CHANNELS, [0, 17],
+                               backend=SimulatedLibrary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-12
+
+"""
+import time
+import unittest
+from unittest import TestCase
+from pylibad4 import libad4
+from pylibad4.libad4 import ad_open, ad_close, ad_get_range_count, \
+    ad_get_range_info, ad_discrete_in, ad_discrete_inv, ad_analog_in, \
+    ad_analog_out, ad_discrete_out, ad_float_to_sample, ad_sample_to_float, \
+    ad_digital_in, ad_digital_out, ad_set_digital_line, ad_get_digital_line, \
+    ad_set_line_direction, ad_get_line_direction, ad_get_product_info, \
+    LibAD4Error
+from pylibad4.simulator import SimulatedLibrary, SimulatedScan
+from pylibad4.types import AD_CHA_TYPE_ANALOG_IN, AD_CHA_TYPE_ANALOG_OUT, \
+    AD_CHA_TYPE_DIGITAL_IO, AD_RETURN_CODE_6, AD_RETURN_CODE_87
+
+
+INVALID_HANDLE = -1
+
+
+class SimulatorTestCase(TestCase):
+
+    def setUp(self):
+        self.library = SimulatedLibrary(seed=0)
+        libad4.set_backend(self.library)
+        self.handle = ad_open('usbbase:0')
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_open(self):
+        handle = ad_open('lanbase:192.168.1.10')
+        self.assertNotEqual(handle, self.handle)
+        self.assertEqual(ad_get_product_info(handle).model, b'LAN-AD16f')
+        ad_close(handle)
+
+        with self.assertRaises(LibAD4Error):
+            ad_open('')
+
+        with self.assertRaises(LibAD4Error) as cm:
+            ad_close(INVALID_HANDLE)
+        self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_6)
+
+    def test_range_info(self):
+        channel = AD_CHA_TYPE_ANALOG_IN | 1
+        self.assertEqual(ad_get_range_count(self.handle, channel), 4)
+
+        range_info = ad_get_range_info(self.handle, channel, 1)
+        self.assertEqual(range_info.min, -5.12)
+        self.assertEqual(range_info.max, 5.12)
+        self.assertEqual(range_info.bps, 16)
+        self.assertEqual(range_info.res, 10.24 / 65536)
+        self.assertEqual(range_info.unit, b'V')
+
+        with self.assertRaises(LibAD4Error) as cm:
+            ad_get_range_info(self.handle, channel, 4)
+        self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_87)
+
+    def test_channel_numbers(self):
+        # channels are numbered from 1 to the count of the device
+        model = self.library.devices[self.handle].model
+        for type_, count in [(AD_CHA_TYPE_ANALOG_IN, model.analog_inputs),
+                             (AD_CHA_TYPE_ANALOG_OUT, model.analog_outputs),
+                             (AD_CHA_TYPE_DIGITAL_IO, model.digital_ports)]:
+            ad_discrete_in(self.handle, type_ | 1, 0)
+            ad_discrete_in(self.handle, type_ | count, 0)
+            for id_ in (0, count + 1):
+                with self.assertRaises(LibAD4Error) as cm:
+                    ad_discrete_in(self.handle, type_ | id_, 0)
+                self.assertEqual(cm.exception.error_code, AD_RETURN_CODE_87)
+
+        for func, args in [(ad_digital_in, ()), (ad_get_line_direction, ()),
+                           (ad_set_line_direction, (0,)),
+                           (ad_get_digital_line, (0,)),
+                           (ad_set_digital_line, (0, True))]:
+            with self.assertRaises(LibAD4Error):
+                func(self.handle, AD_CHA_TYPE_DIGITAL_IO | 0, *args)
+
+    def test_scan_pending(self):
+        scan = SimulatedScan([AD_CHA_TYPE_ANALOG_IN | 1], [0], 0.001, 10, 3)
+        self.assertEqual(scan.pending(scan.start - 1.0), 0)
+        self.assertEqual(scan.pending(scan.start + 0.025), 2)
+        scan.next_run = 1
+        self.assertEqual(scan.pending(scan.start + 0.025), 1)
+        # no more runs than the scan has
+        self.assertEqual(scan.pending(scan.start + 10.0), 2)
+
+        scan.runs = 0
+        self.assertEqual(scan.pending(scan.start + 10.0), 999)
+
+    def test_analog_in(self):
+        self.library.waveform = lambda channel, t: 0.5 * channel
+
+        value = ad_analog_in(self.handle, 2, 0)
+        self.assertAlmostEqual(value, 1.0, places=2)
+
+        data = ad_discrete_in(self.handle, AD_CHA_TYPE_ANALOG_IN | 2, 0)
+        value = ad_sample_to_float(self.handle, AD_CHA_TYPE_ANALOG_IN | 2, 0,
+                                   data)
+        self.assertAlmostEqual(value, 1.0, places=2)
+
+        data = ad_discrete_inv(
+            self.handle, [AD_CHA_TYPE_ANALOG_IN | 1, AD_CHA_TYPE_ANALOG_IN | 3],
+            [0, 0]
+        )
+        self.assertEqual(len(data), 2)
+        self.assertLess(data[0], data[1])
+
+    def test_analog_out(self):
+        channel = AD_CHA_TYPE_ANALOG_OUT | 1
+
+        ad_analog_out(self.handle, 1, 0, 5.0)
+        data = ad_discrete_in(self.handle, channel, 0)
+        self.assertEqual(data, ad_float_to_sample(self.handle, channel, 0, 5.0))
+
+        ad_discrete_out(self.handle, channel, 0, 0x1234)
+        self.assertEqual(ad_discrete_in(self.handle, channel, 0), 0x1234)
+
+    def test_digital(self):
+        ad_digital_out(self.handle, 1, 0x00f0)
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x00f0)
+
+        ad_set_digital_line(self.handle, 1, 0, True)
+        self.assertTrue(ad_get_digital_line(self.handle, 1, 0))
+        self.assertEqual(ad_digital_in(self.handle, 1), 0x00f1)
+
+        ad_set_line_direction(self.handle, AD_CHA_TYPE_DIGITAL_IO | 1, 0x00ff)
+        self.assertEqual(
+            ad_get_line_direction(self.handle, AD_CHA_TYPE_DIGITAL_IO | 1),
+            0x00ff
+        )
+
+    def test_latency(self):
+        self.library.latency = 0.01
+        t0 = time.time()
+        for _ in range(5):
+            ad_analog_in(self.handle, 1, 0)
+        self.assertGreaterEqual(time.time() - t0, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
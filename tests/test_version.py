@@ -0,0 +1,45 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import subprocess
+import sys
+import unittest
+from unittest import TestCase
+import pylibad4
+from pylibad4._version import get_versions
+
+
+# prints the count of processes started by importing the package
+COUNT_SUBPROCESSES = '''
+import sys
+started = []
+sys.addaudithook(
+    lambda event, args: started.append(args)
+    if event == 'subprocess.Popen' else None)
+import pylibad4
+print(len(started))
+'''
+
+
+class VersionTestCase(TestCase):
+
+    def test_version(self):
+        self.assertEqual(pylibad4.__version__, get_versions()['version'])
+        from pylibad4 import __version__
+        self.assertEqual(__version__, pylibad4.__version__)
+
+        with self.assertRaises(AttributeError):
+            pylibad4.unknown
+
+    def test_import_without_subprocess(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c', COUNT_SUBPROCESSES])
+        self.assertEqual(output.strip(), b'0')
+
+
+if __name__ == '__main__':
+    unittest.main()
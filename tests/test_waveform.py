@@ -0,0 +1,142 @@
+#!-*- coding: utf-8 -*-
+"""
+:author: Stefan Lehmann
+:email: stefan.st.lehmann@gmail.com
+:created: 2016-10-14
+
+"""
+import time
+import unittest
+from unittest import TestCase
+import numpy
+from pylibad4 import libad4
+from pylibad4.convert import float_to_samples
+from pylibad4.libad4 import ad_open, ad_close, ad_float_to_sample, \
+    LibAD4Error
+from pylibad4.scheduler import CATCH_UP
+from pylibad4.simulator import SimulatedLibrary
+from pylibad4.types import AD_CHA_TYPE_ANALOG_OUT
+from pylibad4.waveform import WaveformPlayer
+
+
+AO1 = AD_CHA_TYPE_ANALOG_OUT | 1
+AO2 = AD_CHA_TYPE_ANALOG_OUT | 2
+
+
+class RecordingLibrary(SimulatedLibrary):
+
+    def __init__(self, **kwargs):
+        super(RecordingLibrary, self).__init__(**kwargs)
+        self.writes = []
+
+    def ad_discrete_outv(self, handle, count, channels, ranges, data):
+        self.writes.append([data[i] for i in range(count)])
+        return super(RecordingLibrary, self).ad_discrete_outv(
+            handle, count, channels, ranges, data)
+
+
+class WaveformPlayerTestCase(TestCase):
+
+    def setUp(self):
+        self.library = RecordingLibrary()
+        libad4.set_backend(self.library)
+        self.handle = ad_open('memaddausb')
+        t = numpy.arange(20) / 20.0
+        self.waveform = numpy.column_stack(
+            (4.5 * numpy.sin(2 * numpy.pi * t), numpy.linspace(-4.5, 4.5, 20)))
+
+    def tearDown(self):
+        ad_close(self.handle)
+        libad4.set_backend(None)
+
+    def test_codes(self):
+        player = WaveformPlayer(self.handle, [AO1, AO2], self.waveform,
+                                rate=1000.0)
+        self.assertEqual(len(player), 20)
+        self.assertEqual(player.codes.dtype, numpy.uint64)
+        for i, channel in enumerate((AO1, AO2)):
+            self.assertEqual(
+                player.codes[:, i].tolist(),
+                float_to_samples(self.handle, channel, 0,
+                                 self.waveform[:, i]).tolist())
+        self.assertEqual(player.codes[3, 0],
+                         ad_float_to_sample(self.handle, AO1, 0,
+                                            self.waveform[3, 0]))
+
+        # a single channel takes a one-dimensional waveform
+        player = WaveformPlayer(self.handle, [AO1], self.waveform[:, 0],
+                                rate=1000.0)
+        self.assertEqual(player.codes.shape, (20, 1))
+
+        with self.assertRaises(ValueError):
+            WaveformPlayer(self.handle, [AO1], self.waveform, rate=1000.0)
+        with self.assertRaises(ValueError):
+            WaveformPlayer(self.handle, [AO1, AO2], self.waveform,
+                           rate=1000.0, range_list=[0])
+        with self.assertRaises(ValueError):
+            WaveformPlayer(self.handle, [AO1], [], rate=1000.0)
+
+    def test_play(self):
+        player = WaveformPlayer(self.handle, [AO1, AO2], self.waveform,
+                                rate=2000.0, policy=CATCH_UP)
+        player.play(repeat=3)
+
+        # every row is written once per repetition in order, with one call
+        self.assertEqual(player.written, 60)
+        self.assertEqual(self.library.writes,
+                         numpy.tile(player.codes, (3, 1)).tolist())
+
+        stats = player.stats()
+        self.assertEqual(stats['written'], 60)
+        self.assertEqual(stats['skipped'], 0)
+        self.assertEqual(stats['missed'], stats['late'])
+        self.assertEqual(stats['lateness']['count'], 60)
+        self.assertGreater(stats['achieved_rate'], 1000.0)
+
+        # a new run resets the statistics
+        player.play(repeat=1)
+        self.assertEqual(player.written, 20)
+
+    def test_skip(self):
+        # writing takes longer than a period, so deadlines are skipped and
+        # the rows of the skipped deadlines are left out
+        player = WaveformPlayer(self.handle, [AO1], self.waveform[:, 1],
+                                rate=1000.0)
+        self.library.latency = 0.003
+        player.play(repeat=1)
+
+        stats = player.stats()
+        self.assertLess(player.written, 20)
+        self.assertGreater(stats['skipped'], 0)
+        self.assertGreaterEqual(stats['missed'], stats['skipped'])
+        self.assertLess(stats['achieved_rate'], 1000.0)
+
+        # the rows written are increasing, as is the ramp
+        writes = [row[0] for row in self.library.writes]
+        self.assertEqual(len(writes), player.written)
+        self.assertEqual(writes, sorted(set(writes)))
+
+    def test_start_stop(self):
+        player = WaveformPlayer(self.handle, [AO1], self.waveform[:, 0],
+                                rate=1000.0)
+        player.start()
+        self.assertTrue(player.running)
+        # the waveform is repeated until the player is stopped
+        timeout = time.monotonic() + 5.0
+        while player.written <= len(player) and time.monotonic() < timeout:
+            time.sleep(0.01)
+        player.stop()
+        self.assertFalse(player.running)
+        self.assertGreater(player.written, len(player))
+
+    def test_error(self):
+        player = WaveformPlayer(self.handle, [AO1], self.waveform[:, 0],
+                                rate=1000.0)
+        ad_close(self.handle)
+        with self.assertRaises(LibAD4Error):
+            player.play()
+        self.handle = ad_open('memaddausb')
+
+
+if __name__ == '__main__':
+    unittest.main()